@@ -0,0 +1,67 @@
+"""
+Measure import time of ngv_reports_ibkr modules with `python -X importtime`.
+
+Each module is imported in a fresh interpreter. Prints the total and the slowest imports it
+pulls in; with --budget, exits non-zero if a module takes longer.
+
+Usage:
+    uv run python benchmarks/bench_import_time.py [--budget 0.5] [--top 10] [module ...]
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict
+
+MODULES = [
+    "ngv_reports_ibkr.flex_client",
+    "ngv_reports_ibkr.download_trades",
+    "ngv_reports_ibkr.custom_flex_report",
+    "ngv_reports_ibkr.adapters",
+]
+
+
+def import_times(module: str) -> Dict[str, float]:
+    """Cumulative import time in seconds of every module imported by `import module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--budget", type=float, default=None, help="max seconds per module")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        times = import_times(module)
+        total = times[module]
+        print(f"{module}: {total * 1000:.0f}ms")
+        slowest = sorted(((t, name) for name, t in times.items() if "." not in name and name != module), reverse=True)
+        for t, name in slowest[: args.top]:
+            print(f"    {name:<24} {t * 1000:>6.0f}ms")
+        if args.budget is not None and total > args.budget:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"over the {args.budget}s budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark parse_datetime_series on a synthetic 1M-row Flex trades frame.
+
+Usage:
+    uv run python benchmarks/bench_parse_datetime.py [--rows 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ngv_reports_ibkr.transforms import parse_datetime_series
+
+
+def make_trades(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build dateTime/orderTime columns shaped like Flex trades, in New York time.
+
+    Executions come in small bursts (multi-leg orders, partial fills) that share an orderTime
+    and often a dateTime. mixedTz has the same instants as dateTime, with half the rows written
+    in Chicago time.
+    """
+    rng = np.random.default_rng(seed)
+    orders = rows // 4
+    # regular trading hours over a year, so no time falls in a DST gap
+    seconds = rng.integers(0, 365, orders) * 24 * 3600 + rng.integers(0, int(6.5 * 3600), orders)
+    order_times = pd.Timestamp("2025-01-02 09:30:00") + pd.to_timedelta(np.sort(seconds), unit="s")
+    order_of_row = np.sort(rng.integers(0, orders, rows))
+    fill_delay = pd.to_timedelta(rng.choice([0, 0, 0, 1, 2], rows), unit="s")
+
+    order_time = order_times[order_of_row]
+    new_york = np.full(rows, "America/New_York")
+    mixed = np.where(rng.random(rows) < 0.5, "America/New_York", "America/Chicago")
+    return pd.DataFrame(
+        {
+            "orderTime": ibkr(order_time, new_york),
+            "dateTime": ibkr(order_time + fill_delay, new_york),
+            "mixedTz": ibkr(order_time + fill_delay, mixed),
+        }
+    )
+
+
+def ibkr(ts: pd.DatetimeIndex, zones: np.ndarray) -> pd.Series:
+    """Format New York wall times like IBKR does, in the zone of each row, labeled EST/EDT or CST/CDT."""
+    labels = {"America/New_York": ("EST", "EDT"), "America/Chicago": ("CST", "CDT")}
+    instants = pd.Series(ts.tz_localize("America/New_York"))
+    out = pd.Series(index=instants.index, dtype=object)
+    for zone, (standard, daylight) in labels.items():
+        rows = zones == zone
+        if not rows.any():
+            continue
+        wall = instants[rows].dt.tz_convert(zone)
+        is_dst = wall.map(lambda t: bool(t.dst())).to_numpy()
+        out[rows] = wall.dt.strftime("%Y-%m-%d;%H:%M:%S") + " " + np.where(is_dst, daylight, standard)
+    return out
+
+
+def bench(raw: pd.Series, unique: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse_datetime_series(raw, unique=unique)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_trades(args.rows)
+    # orderTime/dateTime: one timezone; mixedTz: New York and Chicago rows, across DST changes
+    assert parse_datetime_series(df.mixedTz).equals(parse_datetime_series(df.dateTime))
+    for column in df.columns:
+        raw = df[column]
+        assert parse_datetime_series(raw, unique=True).equals(parse_datetime_series(raw, unique=False))
+        per_row = bench(raw, unique=False, repeat=args.repeat)
+        per_unique = bench(raw, unique=True, repeat=args.repeat)
+        print(
+            f"{column:>10}: {args.rows:,} rows, {raw.nunique():,} unique | "
+            f"per row {per_row:.3f}s | unique values {per_unique:.3f}s | {per_row / per_unique:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
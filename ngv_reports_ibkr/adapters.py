@@ -1,25 +1,116 @@
+import os
+import uuid
+from pathlib import Path
+
 from loguru import logger
 import pandas as pd
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, ConfigDict
+from typing import TYPE_CHECKING, ClassVar, Dict, Iterator, List, Optional, Tuple
 
 from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+from ngv_reports_ibkr.sync_watermarks import SyncWatermark, WatermarkStore
+from ngv_reports_ibkr.transforms import Transforms
+
+if TYPE_CHECKING:
+    import pyarrow
 
-class ReportOutputAdapterCSV(BaseModel):
+
+def _account_sections(
+    report: CustomFlexReport, aid: str
+) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[pd.DataFrame]]:
     """
-    Adapter responsible for writing Report Sections to disk.
+    Trades, closed trades and open positions of one account.
+
+    Closed trades are a filter over the report's cached trades frame, so trades are parsed once.
     """
+    trades = report.trades_by_account_id(aid)
+    if trades is None:
+        logger.warning(
+            f"AccountId={aid}. Unable to get trades data from report. "
+            "Does the Flex Report have Trades turned on?"
+        )
+        close_trades = None
+    else:
+        close_trades = report.closed_trades_by_account_id(aid)
 
-    class Config:
-        arbitrary_types_allowed = True
+    open_positions = report.open_positions_by_account_id(aid)
+    if open_positions is None:
+        logger.warning(
+            f"AccountId={aid}. Unable to get positions data from report. "
+            "Does the Flex Report have Positions turned on?"
+        )
+    return trades, close_trades, open_positions
+
+
+# Columns identifying a row of an append-only section, in order of preference. Sections not
+# listed (open positions) are snapshots and always overwritten.
+SECTION_KEYS: Dict[str, Tuple[str, ...]] = {
+    "trades": ("transactionID", "ibExecID"),
+    "close_trades": ("transactionID", "ibExecID"),
+}
+
+
+def _section_key(df: pd.DataFrame, section: str) -> Optional[str]:
+    """Key column of an append-only section, None for snapshot sections or if df has no key column."""
+    return next((key for key in SECTION_KEYS.get(section, ()) if key in df.columns), None)
+
+
+def _unstored_rows(df: pd.DataFrame, key: str, stored_keys: pd.Series) -> pd.DataFrame:
+    """Rows of df whose key is not in stored_keys."""
+    return df[~df[key].isin(stored_keys)]
+
+
+class _ReportAdapter(BaseModel):
+    """
+    Base of the output adapters: a report and its sections, account by account.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # name of the closed trades section in the dicts of sections
+    CLOSE_TRADES_SECTION: ClassVar[str] = "close_trades"
 
-    data_folder: str = "data"
     report: CustomFlexReport
 
-    def process_accounts(self):
+    def sections(self, aid: str) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Sections of one account.
+
+        Args:
+            aid (str): account id
+
+        Returns:
+            dict of dfs (trades, closed trades, open_positions), None for missing sections
+        """
+        trades, close_trades, open_positions = _account_sections(self.report, aid)
+        return {"trades": trades, self.CLOSE_TRADES_SECTION: close_trades, "open_positions": open_positions}
+
+    def by_account(self) -> Iterator[Tuple[str, Dict[str, Optional[pd.DataFrame]]]]:
+        """
+        Iterate over accounts with their sections (see sections).
+
+        Yields:
+            (account id, dict of dfs, None for missing sections)
+        """
         for account_id in self.report.account_ids():
+            yield account_id, self.sections(account_id)
+
+
+class ReportOutputAdapterCSV(_ReportAdapter):
+    """
+    Adapter responsible for writing Report Sections to disk.
+    """
+
+    data_folder: str = "data"
+    # append rows not yet in the file (by SECTION_KEYS) instead of rewriting it
+    incremental: bool = False
+
+    def process_accounts(self):
+        for account_id, sections in self.by_account():
             logger.info(f"CSV output adapter for {account_id}")
-            self.put_all(aid=account_id)
+            for section, df in sections.items():
+                if df is not None:
+                    self._put_df(account_id, df, section)
 
     def put_all(self, aid: str):
         self.put_trades(aid)
@@ -30,9 +121,74 @@ class ReportOutputAdapterCSV(BaseModel):
         return f"{self.data_folder}/{aid}_{name}.csv"
 
     def _put_df(self, aid: str, df: pd.DataFrame, section: str) -> None:
+        key = _section_key(df, section) if self.incremental else None
+        if key is not None:
+            self._put_new_rows(aid, df, section, key)
+            return
         fn = self._gen_file_name(aid, section)
         df.to_csv(fn)
 
+    def _put_new_rows(self, aid: str, df: pd.DataFrame, section: str, key: str) -> None:
+        """Append the rows of df whose key is not in the file yet, reading only the key column of the file."""
+        fn = self._gen_file_name(aid, section)
+        if os.path.exists(fn):
+            try:
+                stored_keys = pd.read_csv(fn, usecols=[key])[key]
+            except ValueError:
+                logger.warning(f"AccountId={aid}. {fn} has no {key} column, rewriting it")
+                df.to_csv(fn)
+                return
+            df = _unstored_rows(df, key, stored_keys)
+        logger.info(f"AccountId={aid}. {len(df.index)} new {section} rows")
+        if len(df.index):
+            self._append_df(aid, df, section)
+
+    def _append_df(self, aid: str, df: pd.DataFrame, section: str) -> None:
+        fn = self._gen_file_name(aid, section)
+        if not os.path.exists(fn):
+            df.to_csv(fn)
+            return
+        # keep the column order of the existing file
+        columns = pd.read_csv(fn, index_col=0, nrows=0).columns
+        dropped = set(df.columns) - set(columns)
+        if dropped:
+            logger.warning(f"AccountId={aid}. Columns not in {fn} are not appended: {sorted(dropped)}")
+        df.reindex(columns=columns).to_csv(fn, mode="a", header=False)
+
+    def sync_accounts(self, store: WatermarkStore, query_id: str) -> None:
+        """
+        Incremental version of process_accounts.
+
+        Trades past each account's watermark are appended to the trades and close_trades files,
+        open positions (a snapshot) are overwritten. Accounts without a watermark for query_id
+        are written in full, like process_accounts does, so the report must hold their full
+        history (see WatermarkStore.since).
+
+        Args:
+            store: Watermark store, updated for each account
+            query_id: Query ID the report was fetched with
+        """
+        for account_id in self.report.account_ids():
+            watermark = store.get(query_id, account_id)
+            if watermark is None:
+                logger.info(f"CSV output adapter for {account_id}: no watermark, writing all sections")
+                self.put_all(aid=account_id)
+                df = self.report.trades_by_account_id(account_id)
+                # an account without trades still gets a (blank) watermark: it has been synced
+                store.put(SyncWatermark.from_trades(account_id, query_id, df) if df is not None else SyncWatermark(account_id, str(query_id)))
+                continue
+
+            logger.info(f"CSV output adapter for {account_id}: appending trades after {watermark.date_time}")
+            df = self.report.trades_by_account_id(account_id)
+            if df is not None:
+                new_df = watermark.new_rows(df)
+                logger.info(f"AccountId={account_id}. {len(new_df.index)} new trades")
+                if len(new_df.index):
+                    self._append_df(account_id, new_df, "trades")
+                    self._append_df(account_id, Transforms.closed_trades(new_df), "close_trades")
+                    store.put(SyncWatermark.from_trades(account_id, query_id, new_df, previous=watermark))
+            self.put_open_positions(account_id)
+
     def put_trades(self, aid):
         df = self.report.trades_by_account_id(aid)
         if df is None:
@@ -64,14 +220,12 @@ class ReportOutputAdapterCSV(BaseModel):
         self._put_df(aid, df, "open_positions")
 
 
-class ReportOutputAdapterPandas(BaseModel):
+class ReportOutputAdapterPandas(_ReportAdapter):
     """
     Adapter responsible for returning Report Sections as dictionary of Panda DataFrames.
     """
-    class Config:
-        arbitrary_types_allowed = True
-    
-    report: CustomFlexReport
+
+    CLOSE_TRADES_SECTION: ClassVar[str] = "closed_trades"
 
     def process_accounts(self) -> List[dict]:
         """
@@ -81,9 +235,8 @@ class ReportOutputAdapterPandas(BaseModel):
             List[dict]: list of dicts of dfs (generated by put_all)
         """
         results = []
-        for account_id in self.report.account_ids():
+        for account_id, dict_of_dfs in self.by_account():
             logger.info(f"Pandas output adapter for {account_id}")
-            dict_of_dfs = self.put_all(aid=account_id)
             results.append(dict_of_dfs)
         return results
 
@@ -159,3 +312,192 @@ class ReportOutputAdapterPandas(BaseModel):
             "closed_trades": self.put_close_trades(aid),
             "open_positions": self.put_open_positions(aid),
         }
+
+
+def _to_arrow_table(df: pd.DataFrame, types: Optional[Dict[str, "pyarrow.DataType"]] = None) -> "pyarrow.Table":
+    """
+    DataFrame to Arrow table, keeping dtypes (tz-aware timestamps included).
+
+    Flex uses "" for missing values: columns listed in `types` (see arrow_topics.topic_arrow_types)
+    have those nulled and are cast to their type, so files of different accounts and runs share
+    one schema. Other columns mixing numbers and "" get nulls too, and a column that still
+    doesn't convert is written as strings.
+    """
+    import pyarrow as pa
+
+    types = types or {}
+    arrays = {}
+    for name, column in df.items():
+        arrow_type = types.get(name)
+        if arrow_type is not None:
+            try:
+                arrays[name] = pa.array(column.replace("", None), from_pandas=True).cast(arrow_type)
+                continue
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                logger.warning(f"Column {name} doesn't convert to {arrow_type}, writing it as is")
+        try:
+            arrays[name] = pa.array(column, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            column = column.replace("", None)
+            try:
+                arrays[name] = pa.array(column, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                logger.warning(f"Column {name} has mixed types, writing it as string")
+                arrays[name] = pa.array(column.map(lambda v: v if v is None else str(v)), type=pa.string())
+    return pa.table(arrays)
+
+
+class ReportOutputAdapterParquet(_ReportAdapter):
+    """
+    Adapter responsible for writing Report Sections to a Hive-partitioned Parquet dataset.
+
+    Files are written to
+    {data_folder}/section={section}/account={aid}/{date partition}={yyyy-mm-dd}/part-0.parquet,
+    the date partition being the section's column in SECTION_DATE_PARTITIONS (trade_date for
+    trades, report_date for open positions). Readers can prune by section, account and date,
+    eg pd.read_parquet(data_folder, filters=[("account", "=", aid)]), and get typed columns
+    back, including tz-aware datetimes, without parsing them again.
+
+    Writing a section of an account replaces the date partitions present in the new rows and
+    leaves the others alone. In incremental mode, only the key column of the stored files is
+    read, and the rows whose key isn't stored yet are written as new files; compact merges the
+    small files this leaves in each partition.
+    """
+
+    # section: (partition name, column its value is taken from)
+    SECTION_DATE_PARTITIONS: ClassVar[Dict[str, Tuple[str, str]]] = {
+        "trades": ("trade_date", "tradeDate"),
+        "close_trades": ("trade_date", "tradeDate"),
+        "open_positions": ("report_date", "reportDate"),
+    }
+    # section: Flex topic its column types come from
+    SECTION_TOPICS: ClassVar[Dict[str, str]] = {
+        "trades": "Trade",
+        "close_trades": "Trade",
+        "open_positions": "OpenPosition",
+    }
+
+    data_folder: str = "data"
+    compression: str = "zstd"
+    row_group_size: int = 128 * 1024
+    # add files with the rows not stored yet (by SECTION_KEYS) instead of replacing partitions
+    incremental: bool = False
+
+    def process_accounts(self) -> None:
+        for account_id, sections in self.by_account():
+            logger.info(f"Parquet output adapter for {account_id}")
+            self._put_sections(account_id, sections)
+
+    def put_all(self, aid: str) -> None:
+        self._put_sections(aid, self.sections(aid))
+
+    def _put_sections(self, aid: str, sections: Dict[str, Optional[pd.DataFrame]]) -> None:
+        for section, df in sections.items():
+            if df is not None and len(df.index):
+                self._put_df(aid, df, section)
+
+    def _section_path(self, aid: str, section: str) -> str:
+        return os.path.join(self.data_folder, f"section={section}", f"account={aid}")
+
+    def _put_df(self, aid: str, df: pd.DataFrame, section: str) -> None:
+        key = _section_key(df, section) if self.incremental else None
+        if key is None:
+            self._write(aid, df, section, "part-{i}.parquet", "delete_matching")
+            return
+        df = _unstored_rows(df, key, self._stored_keys(aid, section, key))
+        logger.info(f"AccountId={aid}. {len(df.index)} new {section} rows")
+        if len(df.index):
+            self._write(aid, df, section, f"part-{uuid.uuid4().hex}-{{i}}.parquet", "overwrite_or_ignore")
+
+    def _stored_keys(self, aid: str, section: str, key: str) -> pd.Series:
+        import pyarrow.dataset as ds
+
+        path = self._section_path(aid, section)
+        if not os.path.exists(path):
+            return pd.Series(dtype=object)
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        if key not in dataset.schema.names:
+            return pd.Series(dtype=object)
+        return dataset.to_table(columns=[key]).column(key).to_pandas()
+
+    def _write(self, aid: str, df: pd.DataFrame, section: str, basename_template: str, existing_data_behavior: str) -> None:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        from ngv_reports_ibkr.arrow_topics import topic_arrow_types
+
+        table = _to_arrow_table(df, topic_arrow_types(self.SECTION_TOPICS.get(section, "")))
+        partitioning = None
+        partition, date_column = self.SECTION_DATE_PARTITIONS.get(section, (None, None))
+        if partition is not None and date_column in df.columns:
+            dates = pd.to_datetime(df[date_column]).dt.strftime("%Y-%m-%d")
+            table = table.append_column(partition, pa.array(dates.fillna("unknown"), type=pa.string()))
+            partitioning = ds.partitioning(pa.schema([(partition, pa.string())]), flavor="hive")
+
+        ds.write_dataset(
+            table,
+            self._section_path(aid, section),
+            format="parquet",
+            partitioning=partitioning,
+            basename_template=basename_template,
+            existing_data_behavior=existing_data_behavior,
+            file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+            min_rows_per_group=min(self.row_group_size, table.num_rows),
+            max_rows_per_group=self.row_group_size,
+        )
+
+    def read_section(self, section: str, account_id: Optional[str] = None, filters=None) -> Optional[pd.DataFrame]:
+        """
+        Read a section back, optionally for one account.
+
+        Args:
+            section (str): trades, close_trades or open_positions
+            account_id (str, optional): only read this account's partition
+            filters: pyarrow/pandas filters on columns or partitions, eg [("trade_date", ">=", "2026-01-01")]
+
+        Returns:
+            pd.DataFrame or None: rows, with account and the date partition as columns; None if nothing was written
+        """
+        path = os.path.join(self.data_folder, f"section={section}")
+        if account_id is not None:
+            filters = [("account", "=", account_id)] + list(filters or [])
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path, filters=filters, partitioning="hive")
+
+    def compact(self, section: Optional[str] = None, account_id: Optional[str] = None, min_files: int = 2) -> int:
+        """
+        Merge the files of each date partition into one, eg after incremental runs.
+
+        The merged file is written before the small ones are removed, so readers never miss rows
+        (a crash in between can leave both, ie duplicate rows, until the next compact).
+
+        Args:
+            section (str, optional): only compact this section
+            account_id (str, optional): only compact this account
+            min_files (int): only compact partitions with at least this many files. Defaults to 2.
+
+        Returns:
+            int: number of partitions compacted
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pattern = os.path.join(f"section={section or '*'}", f"account={account_id or '*'}", "*")
+        compacted = 0
+        for partition in sorted(Path(self.data_folder).glob(pattern)):
+            files = sorted(partition.glob("*.parquet"), key=lambda p: p.stat().st_mtime_ns)
+            if not partition.is_dir() or len(files) < min_files:
+                continue
+            table = pa.concat_tables([pq.read_table(f, partitioning=None) for f in files], promote_options="permissive")
+            pq.write_table(
+                table,
+                partition / f"part-{uuid.uuid4().hex}-0.parquet",
+                compression=self.compression,
+                row_group_size=self.row_group_size,
+            )
+            for f in files:
+                f.unlink()
+            compacted += 1
+        logger.info(f"Parquet output adapter compacted {compacted} partitions")
+        return compacted
@@ -0,0 +1,85 @@
+"""
+Typed Arrow tables for Flex topics.
+
+Flex statements carry every value as an XML attribute string. Instead of building an
+object/str DataFrame and coercing columns later (pandera does it per column, on every
+validation), the builder here turns each attribute column of a topic straight into an Arrow
+array of the right type:
+
+- Types come from the pandera schemas of known topics (see TOPIC_SCHEMAS): float64 and int64
+  columns become numeric arrays, everything else stays a string array.
+- Empty strings and attributes missing on an element become nulls.
+- Datetime columns stay strings ("2026-01-15;10:30:00 EST"); use parse_datetime_series for
+  the IBKR timezone handling.
+
+A column whose values don't fit the schema type (eg, "1.5" in an int64 column) falls back to
+float64, then to string, with a warning, rather than failing the whole table.
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from loguru import logger
+from pandera.pandas import DataFrameSchema
+
+from ngv_reports_ibkr.schemas.ibkr_flex_report import ibkr_flex_report_trades_schema
+
+# pandera schemas with the known column types of Flex topics
+TOPIC_SCHEMAS: Dict[str, DataFrameSchema] = {
+    "Trade": ibkr_flex_report_trades_schema,
+}
+
+_ARROW_TYPES = {
+    "float64": pa.float64(),
+    "int64": pa.int64(),
+}
+
+
+@lru_cache(maxsize=None)
+def topic_arrow_types(topic: str) -> Dict[str, pa.DataType]:
+    """
+    Arrow types of the numeric columns of a topic, from its pandera schema.
+
+    Args:
+        topic: Flex topic, eg Trade
+
+    Returns:
+        Dict[str, pa.DataType]: type per column; columns not listed are strings
+    """
+    schema = TOPIC_SCHEMAS.get(topic)
+    if schema is None:
+        return {}
+    return {name: _ARROW_TYPES[str(column.dtype)] for name, column in schema.columns.items() if str(column.dtype) in _ARROW_TYPES}
+
+
+def _to_arrow(name: str, values: list, arrow_type: pa.DataType) -> pa.Array:
+    # NaN marks a missing attribute (from_pandas=True turns it into a null)
+    array = pa.array(values, type=pa.string(), from_pandas=True)
+    array = pc.if_else(pc.equal(array, ""), pa.scalar(None, pa.string()), array)
+    if arrow_type == pa.string():
+        return array
+
+    for candidate in (arrow_type, pa.float64()):
+        try:
+            return pc.cast(array, candidate)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    logger.warning(f"Column {name} doesn't parse as {arrow_type}, keeping it as string")
+    return array
+
+
+def build_arrow_table(columns: Dict[str, list], types: Optional[Dict[str, pa.DataType]] = None) -> pa.Table:
+    """
+    Build an Arrow table from attribute columns.
+
+    Args:
+        columns: Attribute values per column, NaN where an element lacks the attribute
+        types: Arrow type per column; other columns are strings
+
+    Returns:
+        pa.Table: typed table, columns in attribute order
+    """
+    types = types or {}
+    return pa.table({name: _to_arrow(name, values, types.get(name, pa.string())) for name, values in columns.items()})
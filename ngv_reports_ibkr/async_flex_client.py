@@ -0,0 +1,447 @@
+"""
+Asyncio Flex Web Service client for IBKR API.
+
+This module mirrors flex_client.FlexClient for use under an asyncio event loop, so that
+many token/query pairs can be fetched concurrently. Waiting for statement generation and
+retry backoff use asyncio.sleep instead of blocking the process, and the number of reports
+in flight at once is capped by a configurable concurrency limit.
+
+Error classification (RETRYABLE_ERROR_CODES, TOKEN_ERROR_CODES, _raise_for_error) is shared
+with the synchronous client through BaseFlexClient.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, List, Optional, Protocol, Sequence, Union
+
+from loguru import logger
+
+from ngv_reports_ibkr.flex_client import (
+    BaseFlexClient,
+    DateRange,
+    FlexClientError,
+    FlexRequestError,
+    FlexStatementError,
+    FlexTokenError,
+    HTTPFlexClient,
+)
+from ngv_reports_ibkr.rate_limit import RateLimiter
+from ngv_reports_ibkr.statement_polling import StatementPollScheduler
+
+if TYPE_CHECKING:
+    from ngv_reports_ibkr.flex_cache import FlexStatementCache
+    from ngv_reports_ibkr.flex_journal import FetchJournal
+
+# =============================================================================
+# Request Model
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class FlexReportRequest:
+    """A single token/query pair to fetch, with an optional custom date range."""
+
+    token: str
+    query_id: str
+    date_range: Optional[DateRange] = None
+
+
+# =============================================================================
+# Async HTTP Client Protocol
+# =============================================================================
+
+
+class AsyncFlexHTTPClient(Protocol):
+    """Async protocol for Flex API HTTP operations - enables testing with mocks."""
+
+    async def send_request(
+        self,
+        token: str,
+        query_id: str,
+        version: str = "3",
+        date_range: Optional[DateRange] = None,
+    ) -> str:
+        """Send flex request, return XML response."""
+        ...
+
+    async def get_statement(self, token: str, reference_code: str, version: str = "3") -> str:
+        """Get statement, return XML response."""
+        ...
+
+
+# =============================================================================
+# Async HTTP Client Implementation
+# =============================================================================
+
+
+class AsyncHTTPFlexClient:
+    """
+    Async HTTP implementation of Flex API client.
+
+    Runs the blocking HTTPFlexClient calls in the default executor so that the event loop
+    stays free while requests are in flight. This avoids taking on an async HTTP dependency.
+
+    requests.Session is not guaranteed to be thread-safe, so each executor thread gets its
+    own HTTPFlexClient (and with it its own session) from http_client_factory.
+    """
+
+    def __init__(
+        self,
+        timeout: int = 30,
+        http_client: Optional[HTTPFlexClient] = None,
+        http_client_factory: Optional[Callable[[], HTTPFlexClient]] = None,
+    ):
+        """
+        Initialize async HTTP client.
+
+        Args:
+            timeout: Request timeout in seconds
+            http_client: Synchronous client shared by every thread. It must be thread-safe
+                (default: none, one client per thread from http_client_factory)
+            http_client_factory: Builds the synchronous client of each executor thread
+                (defaults to HTTPFlexClient(timeout=timeout))
+        """
+        self.http_client = http_client
+        self.http_client_factory = http_client_factory or (lambda: HTTPFlexClient(timeout=timeout))
+        self._local = threading.local()
+
+    def _thread_client(self) -> HTTPFlexClient:
+        """Synchronous client of the calling thread, created on first use."""
+        if self.http_client is not None:
+            return self.http_client
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.http_client_factory()
+        return client
+
+    def _send_request(self, **kwargs) -> str:
+        """HTTPFlexClient.send_request on the calling thread's client."""
+        return self._thread_client().send_request(**kwargs)
+
+    def _get_statement(self, **kwargs) -> str:
+        """HTTPFlexClient.get_statement on the calling thread's client."""
+        return self._thread_client().get_statement(**kwargs)
+
+    async def send_request(
+        self,
+        token: str,
+        query_id: str,
+        version: str = "3",
+        date_range: Optional[DateRange] = None,
+    ) -> str:
+        """
+        Send flex request to IBKR API.
+
+        Args:
+            token: Flex Web Service access token
+            query_id: Query ID for the flex report
+            version: API version (default: "3")
+            date_range: Optional custom date range
+
+        Returns:
+            XML response string
+        """
+        return await asyncio.to_thread(
+            self._send_request,
+            token=token,
+            query_id=query_id,
+            version=version,
+            date_range=date_range,
+        )
+
+    async def get_statement(self, token: str, reference_code: str, version: str = "3") -> str:
+        """
+        Get flex statement from IBKR API.
+
+        Args:
+            token: Flex Web Service access token
+            reference_code: Reference code from send_request
+            version: API version (default: "3")
+
+        Returns:
+            XML response string
+        """
+        return await asyncio.to_thread(
+            self._get_statement,
+            token=token,
+            reference_code=reference_code,
+            version=version,
+        )
+
+
+# =============================================================================
+# Async Flex Request Service
+# =============================================================================
+
+
+class AsyncFlexClient(BaseFlexClient):
+    """
+    Asyncio client for IBKR Flex Web Service operations.
+
+    Same workflow, retry policy and error classification as FlexClient, but every wait
+    is an asyncio.sleep so multiple reports can be generated and downloaded concurrently.
+
+    Example:
+        >>> client = AsyncFlexClient(max_concurrency=8)
+        >>> results = asyncio.run(
+        ...     client.fetch_flex_reports(
+        ...         [FlexReportRequest("token_a", "123456"), FlexReportRequest("token_b", "654321")]
+        ...     )
+        ... )
+    """
+
+    def __init__(
+        self,
+        http_client: Optional[AsyncFlexHTTPClient] = None,
+        max_retries: int = 5,
+        base_retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+        statement_poll_delay: float = 2.0,
+        poll_scheduler: Optional[StatementPollScheduler] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional["FlexStatementCache"] = None,
+        journal: Optional["FetchJournal"] = None,
+        max_concurrency: int = 4,
+    ):
+        """
+        Initialize async flex client.
+
+        Args:
+            http_client: Async HTTP client (defaults to AsyncHTTPFlexClient)
+            max_retries: Maximum retry attempts for API calls
+            base_retry_delay: Base delay in seconds for exponential backoff
+            max_retry_delay: Maximum delay between retries
+            statement_poll_delay: Initial delay before fetching statement
+            poll_scheduler: GetStatement probe scheduler (defaults to an in-memory StatementPollScheduler)
+            rate_limiter: Paces SendRequest/GetStatement calls per token (default: no pacing)
+            cache: Statement cache consulted by fetch_flex_report (default: no caching)
+            journal: Records in-flight reference codes so fetch_flex_report can resume
+                them after a restart (default: no journal)
+            max_concurrency: Maximum number of reports fetched at the same time
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be >= 1 (got {max_concurrency})")
+
+        super().__init__(
+            max_retries=max_retries,
+            base_retry_delay=base_retry_delay,
+            max_retry_delay=max_retry_delay,
+            statement_poll_delay=statement_poll_delay,
+            poll_scheduler=poll_scheduler,
+            rate_limiter=rate_limiter,
+            cache=cache,
+            journal=journal,
+        )
+        self.http_client = http_client or AsyncHTTPFlexClient()
+        self.max_concurrency = max_concurrency
+
+    async def _wait_for_rate_limit(self, token: str) -> None:
+        """Wait until the rate limiter allows the next request for token."""
+        delay = self._rate_limit_delay(token)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def send_flex_request(
+        self,
+        token: str,
+        query_id: str,
+        date_range: Optional[DateRange] = None,
+    ) -> str:
+        """
+        Send flex request and return reference code.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            date_range: Optional custom date range
+
+        Returns:
+            Reference code for retrieving statement
+
+        Raises:
+            FlexRequestError: On API errors
+            FlexTokenError: On token-related errors
+            FlexRetryableError: On transient errors (after max retries)
+        """
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries):
+            try:
+                await self._wait_for_rate_limit(token)
+                xml_response = await self.http_client.send_request(
+                    token=token,
+                    query_id=query_id,
+                    date_range=date_range,
+                )
+                response = self._parse_send_request_response(xml_response)
+
+                if response.is_success:
+                    logger.info(f"Flex request sent successfully: reference_code={response.reference_code}")
+                    return response.reference_code
+
+                # API returned an error
+                self._raise_for_error(response.error_code, response.error_message)
+
+            except Exception as e:
+                last_error = e
+                # Token errors are re-raised here and never retried
+                delay = self._retry_delay_for_error(e, attempt)
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(delay)
+
+        raise FlexRequestError(f"Failed after {self.max_retries} attempts: {last_error}")
+
+    async def get_flex_statement(self, token: str, reference_code: str) -> str:
+        """
+        Get flex statement XML.
+
+        Args:
+            token: Flex Web Service token
+            reference_code: Reference code from send_flex_request
+
+        Returns:
+            XML statement data
+
+        Raises:
+            FlexStatementError: On API errors
+            FlexRetryableError: On transient errors (after max retries)
+        """
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries):
+            try:
+                await self._wait_for_rate_limit(token)
+                xml_response = await self.http_client.get_statement(token=token, reference_code=reference_code)
+                response = self._parse_statement_response(xml_response)
+
+                if response.is_success:
+                    logger.info("Flex statement retrieved successfully")
+                    return response.xml_data
+
+                # API returned an error
+                self._raise_for_error(response.error_code, response.error_message)
+
+            except Exception as e:
+                last_error = e
+                delay = self._retry_delay_for_error(e, attempt)
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(delay)
+
+        raise FlexStatementError(f"Failed after {self.max_retries} attempts: {last_error}")
+
+    async def fetch_flex_report(
+        self,
+        token: str,
+        query_id: str,
+        date_range: Optional[DateRange] = None,
+    ) -> str:
+        """
+        Complete flex report fetch: send request + get statement.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            date_range: Optional custom date range
+
+        Returns:
+            XML statement data
+
+        Raises:
+            FlexClientError: On any API error
+        """
+        if self.cache is not None:
+            xml_data = self.cache.get(token, query_id, date_range)
+            if xml_data is not None:
+                return xml_data
+
+        xml_data = await self._resume_from_journal(token, query_id, date_range)
+        if xml_data is None:
+            reference_code = await self.send_flex_request(token, query_id, date_range)
+            if self.journal is not None:
+                self.journal.record(token, query_id, reference_code, date_range)
+            xml_data = await self.poll_flex_statement(token, query_id, reference_code)
+
+        if self.journal is not None:
+            self.journal.remove(token, query_id, date_range)
+        if self.cache is not None:
+            self.cache.put(token, query_id, xml_data, date_range)
+        return xml_data
+
+    async def _resume_from_journal(self, token: str, query_id: str, date_range: Optional[DateRange]) -> Optional[str]:
+        """
+        Poll a reference code left in the journal by an earlier run, if one is still valid.
+
+        Returns:
+            XML statement data, or None if there is nothing to resume (or resuming failed)
+        """
+        entry = self.journal.find(token, query_id, date_range) if self.journal is not None else None
+        if entry is None:
+            return None
+
+        logger.info(f"Resuming flex request: reference_code={entry.reference_code}, issued {entry.age:.0f}s ago")
+        try:
+            return await self.poll_flex_statement(token, query_id, entry.reference_code, elapsed=entry.age)
+        except FlexTokenError:
+            raise
+        except FlexClientError as e:
+            logger.warning(f"Could not resume reference_code={entry.reference_code}: {e}. Sending a new request")
+            self.journal.remove(token, query_id, date_range)
+            return None
+
+    async def poll_flex_statement(self, token: str, query_id: str, reference_code: str, elapsed: float = 0.0) -> str:
+        """
+        Poll GetStatement on the poll scheduler's schedule until the statement is ready.
+
+        See FlexClient.poll_flex_statement.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID the statement was requested for
+            reference_code: Reference code from send_flex_request
+            elapsed: Seconds since the reference code was issued
+
+        Returns:
+            XML statement data
+
+        Raises:
+            FlexStatementError: On API errors, or when the statement is not ready in time
+            FlexTokenError: On token-related errors
+        """
+        with self._start_poll(query_id, reference_code, elapsed=elapsed) as poll:
+            for delay in poll:
+                await asyncio.sleep(delay)
+                try:
+                    await self._wait_for_rate_limit(token)
+                    xml_response = await self.http_client.get_statement(token=token, reference_code=reference_code)
+                    xml_data = self._statement_from_probe(xml_response)
+                except Exception as e:
+                    poll.failed(e)
+                    continue
+                if poll.answered(xml_data):
+                    return xml_data
+            raise poll.not_ready_error()
+
+    async def fetch_flex_reports(
+        self,
+        requests: Sequence[FlexReportRequest],
+        return_exceptions: bool = True,
+    ) -> List[Union[str, BaseException]]:
+        """
+        Fetch many flex reports concurrently, at most max_concurrency at a time.
+
+        Args:
+            requests: Token/query pairs to fetch
+            return_exceptions: Return per-request exceptions in the result list instead of
+                raising the first one (default: True, so one bad token doesn't sink the batch)
+
+        Returns:
+            XML statement data (or the raised exception) for each request, in input order
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _fetch(request: FlexReportRequest) -> str:
+            async with semaphore:
+                return await self.fetch_flex_report(request.token, request.query_id, request.date_range)
+
+        return await asyncio.gather(*(_fetch(r) for r in requests), return_exceptions=return_exceptions)
@@ -1,37 +1,346 @@
-from typing import List
+import xml.etree.ElementTree as ET
+from contextlib import suppress
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import pandas as pd
-import pandera.pandas as pa
-from ib_async.flexreport import FlexReport
 from loguru import logger
 
-from ngv_reports_ibkr.schemas.ibkr_flex_report import (
-    validate_ibkr_flex_report_trades_lazy,
-)
-from ngv_reports_ibkr.transforms import parse_date_series, parse_datetime_series
+from ngv_reports_ibkr.transforms import Transforms
 
+if TYPE_CHECKING:
+    import pyarrow
+
+
+# Marks an attribute an element of the topic doesn't have (pandas reads it as NaN)
+_MISSING = float("nan")
+
+
+class _TopicBuffer:
+    """Attribute values of all elements of one topic, column by column."""
+
+    __slots__ = ("columns", "size")
+
+    def __init__(self):
+        self.columns: Dict[str, list] = {}
+        self.size = 0
+
+    def append(self, attrib: Dict[str, str], strings: Dict[str, str]) -> None:
+        """
+        Add the attributes of one element.
+
+        Equal strings are stored once (via `strings`, shared by all topics of a report):
+        Flex statements repeat the same values a lot (account ids, currencies, dates).
+        """
+        columns = self.columns
+        for key, value in attrib.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [_MISSING] * self.size
+            column.append(strings.setdefault(value, value))
+        self.size += 1
+        if len(attrib) != len(columns):
+            for column in columns.values():
+                if len(column) < self.size:
+                    column.append(_MISSING)
+
+    def parsed_columns(self, parseNumbers: bool) -> Dict[str, list]:
+        """
+        Columns, with numeric values converted like FlexReport.extract(parseNumbers=True) does.
+
+        A value becomes an int if int() accepts it, else a float if float() does, else stays a
+        string. Each distinct string is only converted once.
+        """
+        if not parseNumbers:
+            return self.columns
+        # seeded with the missing marker so it passes through unchanged
+        parsed: Dict[object, Union[str, int, float]] = {_MISSING: _MISSING}
+
+        def parse(v: str) -> Union[str, int, float]:
+            result = v
+            with suppress(ValueError):
+                result = float(v)
+                result = int(v)
+            parsed[v] = result
+            return result
+
+        return {key: [parsed[v] if v in parsed else parse(v) for v in column] for key, column in self.columns.items()}
+
+    def rows(self, parseNumbers: bool) -> List[dict]:
+        """Attribute dicts of the elements, in document order."""
+        if not self.columns:
+            return [{} for _ in range(self.size)]
+        columns = self.parsed_columns(parseNumbers)
+        keys = list(columns)
+        return [{k: v for k, v in zip(keys, values) if v is not _MISSING} for values in zip(*columns.values())]
+
+    def df(self, parseNumbers: bool) -> pd.DataFrame:
+        """Elements as a DataFrame, one column per attribute."""
+        return pd.DataFrame(self.parsed_columns(parseNumbers), index=pd.RangeIndex(self.size))
+
+
+class _FlexReportIndex:
+    """
+    ib_async FlexReport with a columnar index of the statement.
+
+    The index holds the attribute values of every element, by tag and attribute. It is built
+    in a single pass: over the element tree the first time any topic is read, or straight from
+    the file by load_streaming, which never builds the tree. DataFrames are then built once per
+    topic and memoized, so the per-account accessors don't walk the tree and rebuild the same
+    frame for every account.
+    Per-account frames come from a partition of each topic frame by accountId, also built
+    once, so writing A accounts costs one pass over each topic instead of A.
+    Parsed section frames (section_by_account_id: datetimes converted, rows filtered) are cached
+    by (topic, account id), so asking for trades and closed trades of an account parses its
+    timestamps once.
+    The index is rebuilt, and every cache dropped, whenever `root` changes (download, load,
+    from_xml) or the report is loaded with load_streaming; clear_cache drops the caches by hand.
+
+    Importing ib_async loads its whole asyncio IB client, so the class (a subclass of
+    FlexReport) is only created, and ib_async imported, the first time CustomFlexReport is
+    looked up on this module (see __getattr__): importing the module itself stays light.
+    Likewise pyarrow and the pandera schemas are only imported by arrow_table.
+    """
+
+    def __init__(self, token=None, queryId=None, path=None):
+        self.data: Optional[bytes] = None
+        self.root: Optional[ET.Element] = None
+        self._index_root: Optional[ET.Element] = None
+        self._topic_index: Dict[str, _TopicBuffer] = {}
+        self._topic_frames: Dict[Tuple[str, bool], Optional[pd.DataFrame]] = {}
+        self._topic_partitions: Dict[Tuple[str, bool], Dict[str, pd.DataFrame]] = {}
+        self._topic_tables: Dict[str, "pyarrow.Table"] = {}
+        self._section_frames: Dict[Tuple[str, str], Optional[pd.DataFrame]] = {}
+        super().__init__(token=token, queryId=queryId, path=path)
+
+    def _set_index(self, index: Dict[str, _TopicBuffer]) -> None:
+        self._topic_index = index
+        self._index_root = self.root
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        """Drop the frames, partitions, tables and section frames built from the index."""
+        self._topic_frames = {}
+        self._topic_partitions = {}
+        self._topic_tables = {}
+        self._section_frames = {}
+
+    def _index(self) -> Dict[str, _TopicBuffer]:
+        """Attribute values of all elements by tag, built in a single pass over the tree."""
+        if self._index_root is not self.root:
+            index: Dict[str, _TopicBuffer] = {}
+            strings: Dict[str, str] = {}
+            for node in self.root.iter():
+                buffer = index.get(node.tag)
+                if buffer is None:
+                    buffer = index[node.tag] = _TopicBuffer()
+                buffer.append(node.attrib, strings)
+            self._set_index(index)
+        return self._topic_index
+
+    def topics(self) -> Set[str]:
+        """Get the set of topics that can be extracted from this report."""
+        return {tag for tag, buffer in self._index().items() if buffer.columns}
+
+    def extract(self, topic: str, parseNumbers=True) -> list:
+        """
+        Extract items of given topic and return as list of objects.
+
+        Same as FlexReport.extract, but served from the topic index.
+        """
+        buffer = self._index().get(topic)
+        if buffer is None:
+            return []
+        from ib_async.objects import DynamicObject
+
+        cls = type(topic, (DynamicObject,), {})
+        return [cls(**row) for row in buffer.rows(parseNumbers)]
+
+    def df(self, topic: str, parseNumbers=True) -> Optional[pd.DataFrame]:
+        """
+        Same as extract but return the result as a pandas DataFrame (None if there are no items).
+
+        The frame is built once per topic and memoized; callers get a copy, so modifying it
+        (even in place) never changes later results.
+        """
+        key = (topic, parseNumbers)
+        index = self._index()
+        if key not in self._topic_frames:
+            buffer = index.get(topic)
+            self._topic_frames[key] = buffer.df(parseNumbers) if buffer is not None and buffer.size else None
+        df = self._topic_frames[key]
+        return None if df is None else df.copy()
+
+    def arrow_table(self, topic: str) -> Optional["pyarrow.Table"]:
+        """
+        Topic as an Arrow table, typed from the topic's pandera schema (see arrow_topics).
+
+        Built straight from the attribute columns, without an intermediate DataFrame, and memoized.
+
+        Args:
+            topic (str): topic, eg Trade
+
+        Returns:
+            pyarrow.Table or None: table, None if there are no items
+        """
+        index = self._index()
+        if topic not in self._topic_tables:
+            buffer = index.get(topic)
+            if buffer is None or not buffer.size:
+                return None
+            from ngv_reports_ibkr.arrow_topics import build_arrow_table, topic_arrow_types
+
+            self._topic_tables[topic] = build_arrow_table(buffer.columns, topic_arrow_types(topic))
+        return self._topic_tables[topic]
+
+    def df_arrow(self, topic: str) -> Optional[pd.DataFrame]:
+        """
+        Same as arrow_table but return an Arrow-backed pandas DataFrame (None if there are no items).
+
+        Args:
+            topic (str): topic, eg Trade
+
+        Returns:
+            pd.DataFrame or None: frame with pd.ArrowDtype columns
+        """
+        table = self.arrow_table(topic)
+        return None if table is None else table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def partition(self, topic: str, parseNumbers=True) -> Dict[str, pd.DataFrame]:
+        """
+        Rows of a topic grouped by accountId, in order of first appearance.
+
+        Built once per topic with a single groupby. Flex statements list each account's rows
+        together, so most groups are contiguous and served as slices of the topic frame.
+
+        Args:
+            topic (str): topic, eg Trade
+            parseNumbers (bool): parse numeric values, like df
+
+        Returns:
+            Dict[str, pd.DataFrame]: frame per account id (empty if the topic has no accountId).
+            The frames are cached and shared by every call, so don't modify them; df_by_account_id
+            returns copies.
+        """
+        key = (topic, parseNumbers)
+        if key not in self._topic_partitions or self._index_root is not self.root:
+            df = self.df(topic, parseNumbers)
+            groups: Dict[str, pd.DataFrame] = {}
+            if df is not None and "accountId" in df.columns:
+                for account_id, positions in df.groupby("accountId", sort=False).indices.items():
+                    start, stop = positions[0], positions[-1] + 1
+                    groups[account_id] = df.iloc[start:stop] if stop - start == len(positions) else df.take(positions)
+            self._topic_partitions[key] = groups
+        return self._topic_partitions[key]
+
+    def df_by_account_id(self, topic: str, account_id: str, parseNumbers=True) -> Optional[pd.DataFrame]:
+        """
+        Rows of a topic for one account, as a copy of its partition.
+
+        Args:
+            topic (str): topic, eg Trade
+            account_id (str): account id
+            parseNumbers (bool): parse numeric values, like df
+
+        Returns:
+            pd.DataFrame or None: rows for the account, None if it has none
+        """
+        df = self.partition(topic, parseNumbers).get(account_id)
+        return None if df is None else df.copy()
+
+    @classmethod
+    def from_xml(cls, xml_data: Union[str, bytes]) -> "CustomFlexReport":
+        """
+        Build a report from Flex statement XML already fetched (eg, by FlexClient).
+
+        Args:
+            xml_data (str | bytes): FlexQueryResponse XML
+
+        Returns:
+            CustomFlexReport: report
+        """
+        report = cls()
+        report.data = xml_data.encode("utf-8") if isinstance(xml_data, str) else xml_data
+        report.root = ET.fromstring(report.data)
+        return report
+
+    def load_streaming(self, path: str, topics: Optional[Iterable[str]] = None) -> None:
+        """
+        Load report from XML file without building the element tree.
+
+        Elements are parsed incrementally, their attributes appended to the topic index and
+        the elements dropped as soon as they are closed, so memory is bounded by the columns
+        kept rather than by the tree. The report has no `root` or `data` afterwards: it can't
+        be saved, but every topic accessor works.
+
+        Args:
+            path (str): XML file path
+            topics (Iterable[str], optional): Only index these topics, eg ["AccountInformation", "Trade"].
+                Defaults to all topics.
+        """
+        wanted = set(topics) if topics is not None else None
+        index: Dict[str, _TopicBuffer] = {}
+        strings: Dict[str, str] = {}
+        parents: List[ET.Element] = []
+
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            if event == "start":
+                parents.append(elem)
+                continue
+            parents.pop()
+            if wanted is None or elem.tag in wanted:
+                buffer = index.get(elem.tag)
+                if buffer is None:
+                    buffer = index[elem.tag] = _TopicBuffer()
+                buffer.append(elem.attrib, strings)
+            # a closed element is its parent's last child so far
+            elem.clear()
+            if parents:
+                del parents[-1][-1]
+
+        self.data = None
+        self.root = None
+        self._set_index(index)
+
+    def save(self, path):
+        """Save report to XML file."""
+        if self.data is None:
+            raise ValueError("Report has no XML data to save (loaded with load_streaming?)")
+        super().save(path)
 
-class CustomFlexReport(FlexReport):
     def account_ids(self) -> List[str]:
-        return list(self.df("AccountInformation")["accountId"].unique())
+        return list(self.partition("AccountInformation"))
 
-    def open_positions_by_account_id(self, account_id: str) -> pd.DataFrame:
-        df = self.df("OpenPosition")
-        # early return if all account have no open positions
-        if (df is None) or (len(df.index) == 0):
-            return None
-        df = df.copy()
+    def section_by_account_id(self, topic: str, account_id: str) -> Optional[pd.DataFrame]:
+        """
+        Rows of a topic for one account, run through the topic's TopicPipeline (see transforms).
 
-        # early return if specific account has no open positions
-        df = df[df.accountId == account_id].copy()
-        if (df is None) or (len(df.index) == 0):
-            return None
+        The parsed frame is built from the account's partition frame with a single copy (the
+        pipeline's) and cached by (topic, account id). Each call returns one copy of the cached
+        frame, so modifying it (even in place) never changes later results.
 
-        df = df.query("levelOfDetail == 'LOT'").copy()
-        df.openDateTime = parse_datetime_series(df.openDateTime)
-        df.holdingPeriodDateTime = parse_datetime_series(df.holdingPeriodDateTime)
-        df.reportDate = parse_date_series(df.reportDate)
-        return df
+        Args:
+            topic (str): topic, eg Trade
+            account_id (str): account id
+
+        Returns:
+            pd.DataFrame or None: section frame, None if the account has no rows for the topic
+        """
+        key = (topic, account_id)
+        # rebuilds the index (and drops this cache) if root changed
+        self._index()
+        if key not in self._section_frames:
+            # the shared partition frame: the pipeline copies it, it's never modified here
+            df = self.partition(topic).get(account_id)
+            # no rows for the account
+            if (df is None) or (len(df.index) == 0):
+                self._section_frames[key] = None
+            else:
+                self._section_frames[key] = Transforms.apply_topic_pipeline(df, topic)
+        df = self._section_frames[key]
+        return None if df is None else df.copy()
+
+    def open_positions_by_account_id(self, account_id: str) -> pd.DataFrame:
+        return self.section_by_account_id("OpenPosition", account_id)
 
     def trades_by_account_id(self, account_id: str) -> pd.DataFrame:
         """
@@ -62,30 +371,53 @@ class CustomFlexReport(FlexReport):
 
         If validation fails, check logs for specific column/type mismatches.
         """
-        df = self.df("Trade")
-        # early return if all accounts have no trades
-        if (df is None) or (len(df.index) == 0):
-            return None
+        return self.section_by_account_id("Trade", account_id)
 
-        df = df[df.accountId == account_id].copy()
-        # early return if specific account has no trades
+    def closed_trades_by_account_id(self, account_id: str) -> pd.DataFrame:
+        df = self.trades_by_account_id(account_id)
         if (df is None) or (len(df.index) == 0):
             return None
+        return Transforms.closed_trades(df)
 
-        df.dateTime = parse_datetime_series(df.dateTime)
-        df.orderTime = parse_datetime_series(df.orderTime)
-        df.tradeDate = parse_date_series(df.tradeDate)
+    def orders_by_account_id(self, account_id: str) -> Optional[pd.DataFrame]:
+        """
+        Orders of an account.
 
+        Returns:
+            pd.DataFrame or None: orders, an empty frame if the statement has orders but none for
+            the account, None if it has no orders at all
+        """
+        df = self.df_by_account_id("Order", account_id)
+        if df is None:
+            orders = self.df("Order")
+            return None if orders is None else orders.iloc[:0].copy()
         return df
 
-    def closed_trades_by_account_id(self, account_id: str) -> pd.DataFrame:
-        df = self.trades_by_account_id(account_id)
-        if (df is None) or (len(df.index) == 0):
-            return None
-        return df.query("openCloseIndicator == 'C'").copy()
+    def change_in_nav_by_account_id(self, account_id: str) -> pd.DataFrame:
+        return self.df_by_account_id("ChangeInNAV", account_id)
 
-    def orders_by_account_id(self, account_id: str) -> pd.DataFrame:
-        return self.df("Order").query("accountId == @account_id").copy()
 
-    def change_in_nav_by_account_id(self, account_id: str) -> pd.DataFrame:
-        return self.df("ChangeInNAV").query("accountId == account_id").copy()
+if TYPE_CHECKING:
+    from ib_async.flexreport import FlexReport
+
+    class CustomFlexReport(_FlexReportIndex, FlexReport):
+        pass
+
+
+def _create_custom_flex_report() -> type:
+    """Create CustomFlexReport, a FlexReport subclass with the _FlexReportIndex behaviour."""
+    from ib_async.flexreport import FlexReport
+
+    return type(
+        "CustomFlexReport",
+        (_FlexReportIndex, FlexReport),
+        {"__doc__": _FlexReportIndex.__doc__, "__module__": __name__, "__qualname__": "CustomFlexReport"},
+    )
+
+
+def __getattr__(name: str):
+    """Create CustomFlexReport (importing ib_async) the first time it's looked up."""
+    if name == "CustomFlexReport":
+        cls = globals()["CustomFlexReport"] = _create_custom_flex_report()
+        return cls
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,23 @@
+import asyncio
 import time
+from datetime import date
+from typing import TYPE_CHECKING, List, Optional
 
 from loguru import logger
 
-from ngv_reports_ibkr.adapters import ReportOutputAdapterCSV
+from ngv_reports_ibkr.async_flex_client import AsyncFlexClient, FlexReportRequest
 from ngv_reports_ibkr.config_helpers import get_config, get_ib_json
-from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+from ngv_reports_ibkr.flex_client import FlexClient
+
+# pandas, pydantic and the report/adapter modules are imported by the functions that use
+# them, so scripts importing this module start fast
+if TYPE_CHECKING:
+    from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
 
 
 def fetch_report(
     flex_token: int, query_id: int, cache_report_on_disk: bool = False
-) -> CustomFlexReport:
+) -> "CustomFlexReport":
     """
     Fetch report. Optionally save to disk (helpful for debugging)
 
@@ -21,6 +29,8 @@ def fetch_report(
     Returns:
         CustomFlexReport: [description]
     """
+    from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+
     report = CustomFlexReport(token=flex_token, queryId=query_id)
 
     # save report
@@ -33,18 +43,31 @@ def fetch_report(
     return report
 
 
-def load_report(xml_file_path: str) -> CustomFlexReport:
+def load_report(xml_file_path: str, topics: Optional[List[str]] = None, streaming: bool = False) -> "CustomFlexReport":
     """
     Load CustomFlexReport from provided file path
 
+    By default the file is loaded as an element tree (CustomFlexReport.load), so the report
+    can be saved again. With streaming, or a topics whitelist, it is parsed incrementally
+    instead (see CustomFlexReport.load_streaming): large multi-year statements don't have to
+    fit in memory as an element tree, but the report has no tree and can't be saved.
+
     Args:
         xml_file_path (str): file path to the cached XML file
+        topics (List[str], optional): only load these topics, eg ["AccountInformation", "Trade", "OpenPosition"].
+            Implies streaming. Defaults to all topics.
+        streaming (bool, optional): parse incrementally, without the element tree. Defaults to False.
 
     Returns:
         CustomFlexReport: report
     """
+    from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+
     report = CustomFlexReport()
-    report.load(xml_file_path)
+    if streaming or topics is not None:
+        report.load_streaming(xml_file_path, topics=topics)
+    else:
+        report.load(xml_file_path)
     return report
 
 
@@ -60,6 +83,8 @@ def execute_csv_for_accounts(
         file_name (str): env file name. Defaults to ".env".
 
     """
+    from ngv_reports_ibkr.adapters import ReportOutputAdapterCSV
+
     configs = get_config(file_name)
     data = get_ib_json(configs)
 
@@ -75,3 +100,106 @@ def execute_csv_for_accounts(
         report = fetch_report(flex_token, query_id, cache_report_on_disk=cache)
         output_adapter = ReportOutputAdapterCSV(data_folder="data", report=report)
         output_adapter.process_accounts()
+
+
+def execute_csv_for_accounts_concurrently(
+    report_name: str, file_name: str = ".env", max_concurrency: int = 4
+):
+    """
+    Execute the trades download process for accounts, fetching reports concurrently.
+
+    Same as execute_csv_for_accounts, but all Flex reports are requested and downloaded
+    under one asyncio event loop, with at most `max_concurrency` in flight at a time.
+    A failure for one account is logged and does not stop the others.
+
+    Args:
+        report_name (str): report name as it exists in the env file. Eg, report_name=xyz, in env file=IB_REPORT_ID_XYZ
+        file_name (str): env file name. Defaults to ".env".
+        max_concurrency (int): max number of reports fetched at the same time. Defaults to 4.
+    """
+    from ngv_reports_ibkr.adapters import ReportOutputAdapterCSV
+    from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+
+    configs = get_config(file_name)
+    data = get_ib_json(configs)
+
+    if "accounts" not in data:
+        return None
+
+    accounts = []
+    fetches = []
+    for account in data["accounts"]:
+        query_id = int(account[report_name.lower()])
+        if query_id <= 0:
+            logger.warning(f"{account['name']} does not have a {report_name} query_id")
+            continue
+        accounts.append(account)
+        fetches.append(FlexReportRequest(token=str(account["flex_token"]), query_id=str(query_id)))
+
+    client = AsyncFlexClient(max_concurrency=max_concurrency)
+    results = asyncio.run(client.fetch_flex_reports(fetches))
+
+    for account, result in zip(accounts, results):
+        if isinstance(result, BaseException):
+            logger.error(f"{account['name']} failed to fetch {report_name} report: {result}")
+            continue
+        report = CustomFlexReport.from_xml(result)
+        output_adapter = ReportOutputAdapterCSV(data_folder="data", report=report)
+        output_adapter.process_accounts()
+
+
+def execute_csv_for_accounts_incremental(
+    report_name: str,
+    file_name: str = ".env",
+    watermark_file: str = "data/sync_watermarks.json",
+    client: Optional[FlexClient] = None,
+):
+    """
+    Execute the trades download process for accounts, only fetching what is new.
+
+    Per account and query, the last trade written is kept as a watermark (see sync_watermarks).
+    A query with watermarks is fetched from the oldest watermark's trade date to today, instead
+    of the saved query's own period, and only trades past the watermark are appended to
+    data/{aid}_trades.csv and data/{aid}_close_trades.csv. The first run for a query is a full
+    download, like execute_csv_for_accounts, and so is a run whose range fetch reports an
+    account without a watermark (eg, one added to the query since the last sync).
+
+    Args:
+        report_name (str): report name as it exists in the env file. Eg, report_name=xyz, in env file=IB_REPORT_ID_XYZ
+        file_name (str): env file name. Defaults to ".env".
+        watermark_file (str): JSON file for the watermarks. Defaults to "data/sync_watermarks.json".
+        client (FlexClient): Flex client. Defaults to a FlexClient with default settings.
+    """
+    from ngv_reports_ibkr.adapters import ReportOutputAdapterCSV
+    from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+    from ngv_reports_ibkr.sync_watermarks import WatermarkStore
+
+    configs = get_config(file_name)
+    data = get_ib_json(configs)
+
+    if "accounts" not in data:
+        return None
+
+    store = WatermarkStore(watermark_file)
+    client = client or FlexClient()
+
+    for account in data["accounts"]:
+        query_id = str(int(account[report_name.lower()]))
+        if int(query_id) <= 0:
+            logger.warning(f"{account['name']} does not have a {report_name} query_id")
+            continue
+        flex_token = str(account["flex_token"])
+
+        since = store.since(query_id)
+        if since is None:
+            logger.info(f"{account['name']}: no watermark for query_id={query_id}, fetching the full report")
+            report = CustomFlexReport.from_xml(client.fetch_flex_report(flex_token, query_id))
+        else:
+            logger.info(f"{account['name']}: fetching query_id={query_id} from {since}")
+            report = client.fetch_range(flex_token, query_id, since, date.today())
+            if store.since(query_id, report.account_ids()) is None:
+                logger.info(f"{account['name']}: query_id={query_id} reports an account without a watermark, fetching the full report")
+                report = CustomFlexReport.from_xml(client.fetch_flex_report(flex_token, query_id))
+
+        output_adapter = ReportOutputAdapterCSV(data_folder="data", report=report)
+        output_adapter.sync_accounts(store, query_id)
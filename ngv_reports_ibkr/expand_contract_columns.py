@@ -2,15 +2,67 @@
 Simple utility to expand ib_async contract objects into DataFrame columns.
 """
 
+import dataclasses
 import sys
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
+
 # IBKR uses max float64 as "UNSET" indicator
 UNSET_DOUBLE = sys.float_info.max
 UNSET_INTEGER = 2147483647  # INT_MAX
 
 
-def _clean_unset_value(value):
-    """Replace IBKR's UNSET values with None."""
+def _unset_cleaned(values) -> Optional[pd.api.extensions.ExtensionArray]:
+    """
+    Numeric values as Int64/Float64 with IBKR's UNSET values as NA, None if values aren't all numbers.
+
+    values can be a list or Series; None and NaN count as missing.
+    """
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "integer":
+        array = pd.array(values, dtype="Int64")
+        unset = array.to_numpy(dtype="int64", na_value=0) == UNSET_INTEGER
+    elif kind in ("floating", "mixed-integer-float"):
+        array = pd.array(values, dtype="Float64")
+        raw = array.to_numpy(dtype="float64", na_value=0.0)
+        # exact match: clean_unset_value's abs(value - UNSET_DOUBLE) < 1e100 is below the float
+        # spacing near UNSET_DOUBLE (about 2e292), so it only ever matched UNSET_DOUBLE itself too
+        unset = (raw == UNSET_DOUBLE) | (raw == UNSET_INTEGER)
+    else:
+        return None
+    array[unset] = pd.NA
+    return array
+
+
+def clean_unset_columns(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Replace IBKR's UNSET values with NA, column by column.
+
+    Columns holding only integers (and None/NaN) become nullable Int64, columns holding floats
+    become nullable Float64, with a numpy mask of UNSET_DOUBLE/UNSET_INTEGER turned into NA.
+    Other columns (strings, bools, mixed types) are left as they are.
+
+    Args:
+        df: DataFrame to clean
+        columns: Columns to clean. Defaults to all columns.
+
+    Returns:
+        DataFrame with cleaned columns (df itself is not modified)
+    """
+    cleaned = {}
+    for name in df.columns if columns is None else columns:
+        array = _unset_cleaned(df[name])
+        if array is not None:
+            cleaned[name] = array
+    return df.assign(**cleaned) if cleaned else df
+
+
+def clean_unset_value(value):
+    """Replace IBKR's UNSET values (UNSET_DOUBLE, UNSET_INTEGER) with None, other values pass through."""
     if value is None:
         return None
     if isinstance(value, (int, float)):
@@ -20,13 +72,52 @@ def _clean_unset_value(value):
     return value
 
 
+@lru_cache(maxsize=None)
+def _extraction_plan(cls: type, exclude_attrs: Tuple[str, ...]) -> Optional[Tuple[Tuple[str, ...], Callable, FrozenSet[str]]]:
+    """
+    Data attribute names of a dataclass, a getter returning their values as a tuple, and all names the class declares.
+
+    Same names, in the same (sorted) order, as the dir() walk of extract_object_attributes
+    finds on an instance: the fields, plus properties and non-callable class attributes.
+    None for other classes, whose instances can have attributes their class doesn't declare.
+    A dataclass instance can too (see _follows_plan).
+    """
+    if not dataclasses.is_dataclass(cls):
+        return None
+    field_names = {f.name for f in dataclasses.fields(cls)}
+    names = []
+    for name in sorted(field_names | set(dir(cls))):
+        if name.startswith("_") or name in exclude_attrs:
+            continue
+        if name not in field_names:
+            class_attr = getattr(cls, name)
+            if callable(class_attr) and not isinstance(class_attr, property):
+                continue
+        names.append(name)
+    names = tuple(names)
+    declared = frozenset(field_names | set(dir(cls)))
+    if len(names) == 1:
+        # attrgetter returns a bare value for a single name
+        return names, lambda obj, get=attrgetter(names[0]): (get(obj),), declared
+    return names, attrgetter(*names), declared
+
+
+def _follows_plan(obj, declared: FrozenSet[str]) -> bool:
+    """False if obj has public attributes set on the instance only, which its class plan would miss."""
+    return all(name.startswith("_") or name in declared for name in getattr(obj, "__dict__", ()))
+
+
 def extract_object_attributes(obj, clean_numeric=False, exclude_attrs=None):
     """
     Extract data attributes from an object into a dictionary.
 
+    For dataclasses (all ib_async objects), the attribute names are worked out once per class
+    (see _extraction_plan) and read with one attrgetter call; other objects, and dataclass
+    instances with attributes of their own, are walked with dir().
+
     Args:
         obj: Object to extract attributes from
-        clean_numeric: Apply _clean_unset_value to numeric fields
+        clean_numeric: Apply clean_unset_value to numeric fields
         exclude_attrs: List of attribute names to skip
 
     Returns:
@@ -36,6 +127,14 @@ def extract_object_attributes(obj, clean_numeric=False, exclude_attrs=None):
         return {}
 
     exclude_attrs = exclude_attrs or []
+    plan = _extraction_plan(type(obj), tuple(sorted(exclude_attrs)))
+    if plan is not None and _follows_plan(obj, plan[2]):
+        names, getter, _ = plan
+        values = getter(obj)
+        if clean_numeric:
+            values = [clean_unset_value(v) if isinstance(v, (int, float)) else v for v in values]
+        return dict(zip(names, values))
+
     data = {}
 
     for attr_name in dir(obj):
@@ -50,13 +149,96 @@ def extract_object_attributes(obj, clean_numeric=False, exclude_attrs=None):
 
         # Clean numeric values if requested
         if clean_numeric and isinstance(attr_value, (int, float)):
-            attr_value = _clean_unset_value(attr_value)
+            attr_value = clean_unset_value(attr_value)
 
         data[attr_name] = attr_value
 
     return data
 
 
+# Marks a value an object doesn't have (pandas reads it as NaN, like a missing dict key)
+_MISSING = float("nan")
+
+CONTRACT_FIELDS = ["conId", "symbol", "secType", "exchange", "currency", "localSymbol", "tradingClass"]
+# contract-type specific fields, only added for contracts that have them
+CONTRACT_OPTIONAL_FIELDS = ["lastTradeDateOrContractMonth", "multiplier", "strike", "right"]
+ORDER_STATUS_FIELDS = ["status", "filled", "remaining", "avgFillPrice", "lastFillPrice"]
+
+
+def _object_columns(objects: list, fields: List[str], optional_fields: Sequence[str] = ()) -> Dict[str, list]:
+    """
+    Attribute values of objects, column by column.
+
+    `fields` default to None when an object lacks them; `optional_fields` are NaN then, and left
+    out if no object has them. None objects are NaN in every column. If every object is None
+    there are no columns.
+    """
+    present = [obj for obj in objects if obj is not None]
+    if not present:
+        return {}
+    columns = {name: [_MISSING if obj is None else getattr(obj, name, None) for obj in objects] for name in fields}
+    for name in optional_fields:
+        if any(hasattr(obj, name) for obj in present):
+            columns[name] = [_MISSING if obj is None else getattr(obj, name, _MISSING) for obj in objects]
+    return columns
+
+
+def _record_columns(records: list) -> Dict[str, list]:
+    """Dicts (None for none) as columns, NaN where a record lacks a key, in first-seen key order."""
+    columns: Dict[str, list] = {}
+    for i, record in enumerate(records):
+        if record:
+            for key, value in record.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [_MISSING] * i
+                column.append(value)
+        for column in columns.values():
+            if len(column) <= i:
+                column.append(_MISSING)
+    return columns
+
+
+def _extract_columns(objects: list) -> Dict[str, list]:
+    """
+    extract_object_attributes of every object, as columns (NaN for None objects), uncleaned.
+
+    When all objects are instances of one dataclass, without attributes of their own, the values
+    are read with its plan's getter and transposed into columns, without a dict per object.
+    """
+    present = [obj for obj in objects if obj is not None]
+    classes = {type(obj) for obj in present}
+    plan = _extraction_plan(classes.pop(), ()) if len(classes) == 1 else None
+    if plan is None or not all(_follows_plan(obj, plan[2]) for obj in present):
+        records = [None if obj is None else extract_object_attributes(obj) for obj in objects]
+        return _record_columns(records)
+
+    names, getter, _ = plan
+    missing = (_MISSING,) * len(names)
+    rows = [missing if obj is None else getter(obj) for obj in objects]
+    return {name: list(column) for name, column in zip(names, zip(*rows))}
+
+
+def _join_columns(base: pd.DataFrame, columns: Dict[str, list]) -> pd.DataFrame:
+    """
+    base followed by the new columns, base having a RangeIndex.
+
+    Built as one frame from the existing and new columns rather than concatenating two frames.
+    If names clash, both are kept (like pd.concat would).
+    """
+    new = pd.DataFrame(columns, index=base.index)
+    if base.columns.has_duplicates or not base.columns.intersection(new.columns).empty:
+        return pd.concat([base, new], axis=1)
+    data = {name: base[name] for name in base.columns}
+    data.update(new.items())
+    return pd.DataFrame(data, index=base.index, columns=[*base.columns, *new.columns])
+
+
+def _replace_column(df: pd.DataFrame, col: str, columns: Dict[str, list]) -> pd.DataFrame:
+    """df without col, followed by the new columns, on a fresh RangeIndex."""
+    return _join_columns(df.drop(col, axis=1).reset_index(drop=True), columns)
+
+
 def expand_contract_column(df: pd.DataFrame, contract_col: str = "contract") -> pd.DataFrame:
     """
     Expand ib_async contract objects into separate DataFrame columns.
@@ -68,40 +250,8 @@ def expand_contract_column(df: pd.DataFrame, contract_col: str = "contract") ->
     Returns:
         DataFrame with contract attributes as separate columns
     """
-    contract_data = []
-
-    for _, row in df.iterrows():
-        contract = row[contract_col]
-        if contract is None:
-            contract_data.append({})
-            continue
-
-        data = {
-            "conId": getattr(contract, "conId", None),
-            "symbol": getattr(contract, "symbol", None),
-            "secType": getattr(contract, "secType", None),
-            "exchange": getattr(contract, "exchange", None),
-            "currency": getattr(contract, "currency", None),
-            "localSymbol": getattr(contract, "localSymbol", None),
-            "tradingClass": getattr(contract, "tradingClass", None),
-        }
-
-        # Add contract-type specific fields
-        if hasattr(contract, "lastTradeDateOrContractMonth"):
-            data["lastTradeDateOrContractMonth"] = contract.lastTradeDateOrContractMonth
-        if hasattr(contract, "multiplier"):
-            data["multiplier"] = contract.multiplier
-        if hasattr(contract, "strike"):
-            data["strike"] = contract.strike
-        if hasattr(contract, "right"):
-            data["right"] = contract.right
-
-        contract_data.append(data)
-
-    contract_df = pd.DataFrame(contract_data)
-    result_df = pd.concat([df.drop(contract_col, axis=1).reset_index(drop=True), contract_df.reset_index(drop=True)], axis=1)
-
-    return result_df
+    contracts = df[contract_col].tolist()
+    return _replace_column(df, contract_col, _object_columns(contracts, CONTRACT_FIELDS, CONTRACT_OPTIONAL_FIELDS))
 
 
 def expand_order_column(df: pd.DataFrame, order_col: str = "order") -> pd.DataFrame:
@@ -113,24 +263,16 @@ def expand_order_column(df: pd.DataFrame, order_col: str = "order") -> pd.DataFr
         order_col: Name of column containing order objects (default: 'order')
 
     Returns:
-        DataFrame with order attributes as separate columns
+        DataFrame with order attributes as separate columns, numeric ones as Int64/Float64 with
+        IBKR's UNSET values as NA (see clean_unset_columns)
     """
-    order_data = []
-
-    for _, row in df.iterrows():
-        order = row[order_col]
-        if order is None:
-            order_data.append({})
-            continue
-
-        data = extract_object_attributes(order, clean_numeric=True)
-
-        order_data.append(data)
-
-    order_df = pd.DataFrame(order_data)
-    result_df = pd.concat([df.drop(order_col, axis=1).reset_index(drop=True), order_df.reset_index(drop=True)], axis=1)
-
-    return result_df
+    columns = _extract_columns(df[order_col].tolist())
+    for name, values in columns.items():
+        # cleaned from the raw values, so int columns with None rows stay integers
+        array = _unset_cleaned(values)
+        if array is not None:
+            columns[name] = array
+    return _replace_column(df, order_col, columns)
 
 
 def expand_order_status_column(df: pd.DataFrame, status_col: str = "orderStatus") -> pd.DataFrame:
@@ -144,173 +286,100 @@ def expand_order_status_column(df: pd.DataFrame, status_col: str = "orderStatus"
     Returns:
         DataFrame with orderStatus attributes as separate columns
     """
-    status_data = []
-
-    for _, row in df.iterrows():
-        status = row[status_col]
-        if status is None:
-            status_data.append({})
-            continue
-
-        data = {
-            "status": getattr(status, "status", None),
-            "filled": getattr(status, "filled", None),
-            "remaining": getattr(status, "remaining", None),
-            "avgFillPrice": getattr(status, "avgFillPrice", None),
-            "lastFillPrice": getattr(status, "lastFillPrice", None),
-        }
-
-        status_data.append(data)
-
-    status_df = pd.DataFrame(status_data)
-    result_df = pd.concat([df.drop(status_col, axis=1).reset_index(drop=True), status_df.reset_index(drop=True)], axis=1)
-
-    return result_df
-
-
-def expand_fills_and_logs(df: pd.DataFrame, fills_col: str = "fills", log_col: str = "log") -> pd.DataFrame:
+    statuses = df[status_col].tolist()
+    return _replace_column(df, status_col, _object_columns(statuses, ORDER_STATUS_FIELDS))
+
+
+# fill_* column: (attribute of the Fill, attribute of that object or None for the Fill's own)
+FILL_FIELDS: Dict[str, Tuple[Optional[str], str]] = {
+    # Fill metadata (time is the main attribute we need)
+    "fill_time_direct": (None, "time"),
+    # Execution details
+    "fill_execution_id": ("execution", "execId"),
+    "fill_execution_time": ("execution", "time"),
+    "fill_shares": ("execution", "shares"),
+    "fill_price": ("execution", "price"),
+    "fill_exchange": ("execution", "exchange"),
+    "fill_side": ("execution", "side"),
+    "fill_cumQty": ("execution", "cumQty"),
+    "fill_avgPrice": ("execution", "avgPrice"),
+    # Commission details
+    "fill_commission": ("commissionReport", "commission"),
+    "fill_commissionCurrency": ("commissionReport", "currency"),
+    "fill_realizedPNL": ("commissionReport", "realizedPNL"),
+    # Contract details (conId for joining back to contract info)
+    "fill_contract_conId": ("contract", "conId"),
+}
+LOG_FIELDS: Dict[str, str] = {
+    "log_time": "time",
+    "log_status": "status",
+    "log_message": "message",
+    "log_errorCode": "errorCode",
+}
+
+
+def _fill_columns(fills: list) -> Dict[str, list]:
+    """FILL_FIELDS columns of fills (None for a missing fill or attribute)."""
+    parts = {name: [getattr(fill, name, None) if fill else None for fill in fills] for name in ("execution", "commissionReport", "contract")}
+    parts[None] = fills
+    return {
+        column: [getattr(obj, attr, None) if obj else None for obj in parts[part]] for column, (part, attr) in FILL_FIELDS.items()
+    }
+
+
+def _log_columns(logs: list) -> Dict[str, list]:
+    """LOG_FIELDS columns of log entries (None for a missing entry or attribute)."""
+    return {column: [getattr(entry, attr, None) for entry in logs] for column, attr in LOG_FIELDS.items()}
+
+
+def expand_fills_and_logs(df: pd.DataFrame, fills_col: str = "fills", log_col: str = "log", fills_only: bool = False) -> pd.DataFrame:
     """
     Expand both fills and log columns to create one row per fill/log entry.
 
     This function combines fills (executions) and log entries (trade history) into a single
     expanded DataFrame where each fill or log entry becomes its own row, with all order data duplicated.
+    The i-th fill and the i-th log entry of an order share a row; orders without either get one
+    row with empty fill/log columns.
+
+    The fill and log columns are built as flat lists with the parent row of each entry, and the
+    order columns are repeated with a single take on the parent frame (keeping their dtypes).
 
     Args:
         df: DataFrame containing fills and log columns
         fills_col: Name of column containing fills list (default: 'fills')
         log_col: Name of column containing log entries list (default: 'log')
+        fills_only: Only make rows for fills with an execution, and skip the logs (log columns
+            are left empty). Same rows as Transforms.filter_to_executions of the full expansion.
 
     Returns:
         DataFrame with one row per fill/log entry, with attributes as separate columns
     """
-    expanded_rows = []
-
-    for idx, row in df.iterrows():
-        # Get fills and logs
-        fills = row[fills_col] if fills_col in df.columns else []
-        logs = row[log_col] if log_col in df.columns else []
-
-        # Get all columns except fills and log
-        cols_to_drop = [c for c in [fills_col, log_col] if c in df.columns]
-        base_data = row.drop(cols_to_drop).to_dict()
-
-        # Determine the maximum number of entries (fills or logs)
-        max_entries = max(len(fills) if fills else 0, len(logs) if logs else 0)
-
-        if max_entries == 0:
-            # No fills or logs - create one row with empty data
-            expanded_row = base_data.copy()
-            expanded_row.update(
-                {
-                    # Fill metadata
-                    "fill_time_direct": None,
-                    # Fill execution data
-                    "fill_execution_id": None,
-                    "fill_execution_time": None,
-                    "fill_shares": None,
-                    "fill_price": None,
-                    "fill_exchange": None,
-                    "fill_side": None,
-                    "fill_cumQty": None,
-                    "fill_avgPrice": None,
-                    # Fill commission data
-                    "fill_commission": None,
-                    "fill_commissionCurrency": None,
-                    "fill_realizedPNL": None,
-                    # Fill contract data
-                    "fill_contract_conId": None,
-                    # Log data
-                    "log_time": None,
-                    "log_status": None,
-                    "log_message": None,
-                    "log_errorCode": None,
-                }
-            )
-            expanded_rows.append(expanded_row)
-        else:
-            # Create one row per entry (fills or logs, whichever has more)
-            for i in range(max_entries):
-                expanded_row = base_data.copy()
-
-                # Extract fill data if available
-                if fills and i < len(fills):
-                    fill = fills[i]
-                    execution = getattr(fill, "execution", None) if fill else None
-                    commission_report = getattr(fill, "commissionReport", None) if fill else None
-                    fill_contract = getattr(fill, "contract", None) if fill else None
-
-                    expanded_row.update(
-                        {
-                            # Fill metadata (time is the main attribute we need)
-                            # Note: 'index' and 'count' are built-in list methods, not fill attributes
-                            "fill_time_direct": getattr(fill, "time", None) if fill else None,
-                            # Execution details
-                            "fill_execution_id": getattr(execution, "execId", None) if execution else None,
-                            "fill_execution_time": getattr(execution, "time", None) if execution else None,
-                            "fill_shares": getattr(execution, "shares", None) if execution else None,
-                            "fill_price": getattr(execution, "price", None) if execution else None,
-                            "fill_exchange": getattr(execution, "exchange", None) if execution else None,
-                            "fill_side": getattr(execution, "side", None) if execution else None,
-                            "fill_cumQty": getattr(execution, "cumQty", None) if execution else None,
-                            "fill_avgPrice": getattr(execution, "avgPrice", None) if execution else None,
-                            # Commission details
-                            "fill_commission": getattr(commission_report, "commission", None) if commission_report else None,
-                            "fill_commissionCurrency": getattr(commission_report, "currency", None) if commission_report else None,
-                            "fill_realizedPNL": getattr(commission_report, "realizedPNL", None) if commission_report else None,
-                            # Contract details (conId for joining back to contract info)
-                            "fill_contract_conId": getattr(fill_contract, "conId", None) if fill_contract else None,
-                        }
-                    )
-                else:
-                    # No fill at this index
-                    expanded_row.update(
-                        {
-                            # Fill metadata
-                            "fill_time_direct": None,
-                            # Execution details
-                            "fill_execution_id": None,
-                            "fill_execution_time": None,
-                            "fill_shares": None,
-                            "fill_price": None,
-                            "fill_exchange": None,
-                            "fill_side": None,
-                            "fill_cumQty": None,
-                            "fill_avgPrice": None,
-                            # Commission details
-                            "fill_commission": None,
-                            "fill_commissionCurrency": None,
-                            "fill_realizedPNL": None,
-                            # Contract details
-                            "fill_contract_conId": None,
-                        }
-                    )
-
-                # Extract log data if available
-                if logs and i < len(logs):
-                    log_entry = logs[i]
-                    expanded_row.update(
-                        {
-                            "log_time": getattr(log_entry, "time", None),
-                            "log_status": getattr(log_entry, "status", None),
-                            "log_message": getattr(log_entry, "message", None),
-                            "log_errorCode": getattr(log_entry, "errorCode", None),
-                        }
-                    )
-                else:
-                    # No log at this index
-                    expanded_row.update(
-                        {
-                            "log_time": None,
-                            "log_status": None,
-                            "log_message": None,
-                            "log_errorCode": None,
-                        }
-                    )
-
-                expanded_rows.append(expanded_row)
-
-    result_df = pd.DataFrame(expanded_rows)
-    return result_df
+    n = len(df.index)
+    fills_per_row = df[fills_col].tolist() if fills_col in df.columns else [None] * n
+    logs_per_row = df[log_col].tolist() if log_col in df.columns and not fills_only else [None] * n
+
+    if fills_only:
+        fills = [fill for row_fills in fills_per_row for fill in (row_fills or ())]
+        parents = np.repeat(np.arange(n), [len(row_fills or ()) for row_fills in fills_per_row])
+        columns = _fill_columns(fills)
+        # fills without an execution are dropped, like filter_to_executions does
+        keep = pd.notna(pd.Series(columns["fill_execution_id"], dtype=object)).to_numpy()
+        parents = parents[keep]
+        columns = {name: [v for v, k in zip(values, keep) if k] for name, values in columns.items()}
+        columns.update({name: [None] * len(parents) for name in LOG_FIELDS})
+    else:
+        # rows per order: the longer of its fills and log, at least one
+        counts = [max(len(f or ()), len(g or ()), 1) for f, g in zip(fills_per_row, logs_per_row)]
+        fills, logs = [], []
+        for count, row_fills, row_logs in zip(counts, fills_per_row, logs_per_row):
+            row_fills, row_logs = list(row_fills or ()), list(row_logs or ())
+            fills += row_fills + [None] * (count - len(row_fills))
+            logs += row_logs + [None] * (count - len(row_logs))
+        parents = np.repeat(np.arange(n), counts)
+        columns = {**_fill_columns(fills), **_log_columns(logs)}
+
+    cols_to_drop = [c for c in [fills_col, log_col] if c in df.columns]
+    return _join_columns(df.drop(cols_to_drop, axis=1).take(parents).reset_index(drop=True), columns)
 
 
 def expand_all_trade_columns(df: pd.DataFrame) -> pd.DataFrame:
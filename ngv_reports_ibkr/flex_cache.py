@@ -0,0 +1,175 @@
+"""
+On-disk cache of Flex statements.
+
+Entries are keyed by a hash of (query_id, from/to date, token hash), stored gzip-compressed,
+and expire according to the date range they cover:
+
+- Closed ranges (to_date at least `closed_after_days` in the past) can't change anymore, so
+  entries written after their range closed never expire and re-running a historical backfill
+  doesn't hit IBKR again.
+- Entries written while their range was still open (it reached today, so the statement may be
+  partial), and requests without a custom date range (the saved query's own period, eg
+  "Last 365 Days"), expire after `open_ttl` seconds, even once the range has closed.
+
+The cache is bounded by `max_bytes`; the least recently used entries are evicted first.
+A file's mtime is when the entry was written (for TTLs), its atime is when it was last read
+(for LRU); atime is set explicitly so the cache works on noatime/relatime mounts too.
+"""
+
+import gzip
+import os
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from pathlib import Path
+from typing import Optional, Union
+
+from loguru import logger
+
+from ngv_reports_ibkr.flex_client import DateRange, statement_request_key
+
+
+class FlexStatementCache:
+    """
+    Compressed, size-bounded cache of Flex statement XML.
+
+    Example:
+        >>> cache = FlexStatementCache("data/flex_cache", max_bytes=1024**3)
+        >>> client = FlexClient(cache=cache)
+        >>> client.fetch_range(token, query_id, date(2020, 1, 1), date(2024, 12, 31))  # cached per window
+    """
+
+    SUFFIX = ".xml.gz"
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = "data/flex_cache",
+        max_bytes: int = 512 * 1024 * 1024,
+        open_ttl: float = 15 * 60,
+        closed_after_days: int = 1,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            directory: Folder for cache entries (created if missing)
+            max_bytes: Max total size of compressed entries before LRU eviction
+            open_ttl: Seconds an entry for a range that is still open stays valid
+            closed_after_days: Days after to_date before a range counts as closed and immutable
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.open_ttl = open_ttl
+        self.closed_after_days = closed_after_days
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, token: str, query_id: str, date_range: Optional[DateRange] = None) -> str:
+        """Cache key for a statement request."""
+        return statement_request_key(token, query_id, date_range)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def is_closed(self, date_range: Optional[DateRange]) -> bool:
+        """Whether a range is far enough in the past that its statement can no longer change."""
+        if date_range is None:
+            return False
+        return date_range.to_date < date.today() - timedelta(days=self.closed_after_days)
+
+    def closed_at(self, date_range: Optional[DateRange]) -> Optional[float]:
+        """Epoch time from which a range counts as closed (see is_closed), None if it never does."""
+        if date_range is None:
+            return None
+        closing_day = date_range.to_date + timedelta(days=self.closed_after_days + 1)
+        return datetime.combine(closing_day, dt_time.min).timestamp()
+
+    def get(self, token: str, query_id: str, date_range: Optional[DateRange] = None) -> Optional[str]:
+        """
+        Return the cached statement, or None on a miss or expired entry.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            date_range: Optional custom date range
+
+        Returns:
+            XML statement data or None
+        """
+        path = self._path(self.key(token, query_id, date_range))
+        try:
+            written_at = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+        closed_at = self.closed_at(date_range)
+        written_closed = closed_at is not None and written_at >= closed_at
+        if not written_closed and time.time() - written_at > self.open_ttl:
+            logger.debug(f"Flex cache entry expired: {path.name}")
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                xml_data = f.read()
+        except (OSError, EOFError) as e:
+            logger.warning(f"Dropping unreadable flex cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # record the access for LRU eviction, keeping mtime as the write time
+        os.utime(path, (time.time(), written_at))
+        logger.debug(f"Flex cache hit: query_id={query_id}, date_range={date_range}")
+        return xml_data
+
+    def put(self, token: str, query_id: str, xml_data: str, date_range: Optional[DateRange] = None) -> Path:
+        """
+        Store a statement, then evict least recently used entries above max_bytes.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            xml_data: XML statement data
+            date_range: Optional custom date range
+
+        Returns:
+            Path of the cache entry
+        """
+        path = self._path(self.key(token, query_id, date_range))
+        tmp_path = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(xml_data)
+        os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.debug(f"Evicted {removed} flex cache entries")
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cache entry."""
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            path.unlink(missing_ok=True)
@@ -11,17 +11,34 @@ The IBKR Flex Web Service has two main endpoints:
 Reference: https://www.interactivebrokers.com/campus/ibkr-api-page/flex-web-service/
 """
 
+import copy
+import hashlib
+import json
+import os
 import random
+import tempfile
+import threading
 import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from enum import Enum
-from typing import Callable, Optional, Protocol
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Protocol, Sequence, TypeVar, Union
 
 import requests
 from loguru import logger
 
+from ngv_reports_ibkr.rate_limit import RateLimiter, TokenBucketRateLimiter
+from ngv_reports_ibkr.statement_polling import PollStats, StatementPollScheduler
+
+if TYPE_CHECKING:
+    from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+    from ngv_reports_ibkr.flex_cache import FlexStatementCache
+    from ngv_reports_ibkr.flex_journal import FetchJournal
+
 # =============================================================================
 # Exceptions
 # =============================================================================
@@ -107,6 +124,40 @@ TOKEN_ERROR_CODES = {
     FlexErrorCode.INVALID_TOKEN,
 }
 
+# Longest span (in days between from_date and to_date) a single flex query may cover
+MAX_DATE_RANGE_DAYS = 365
+
+# Requests per second per token that fetch_range paces to when the client has no rate_limiter
+DEFAULT_REQUEST_RATE = 1.0
+
+# Sections that describe state as of a statement's toDate rather than activity within it.
+# When statements for consecutive windows are merged, only the latest window's copy is kept.
+SNAPSHOT_SECTIONS = {
+    "AccountInformation",
+    "OpenPositions",
+    "ComplexPositions",
+    "OpenDividendAccruals",
+}
+
+# Childless sections that summarize a statement's fromDate..toDate in their attributes.
+# When statements are merged, attributes in SUMMARY_FIRST_ATTRIBUTES come from the first window,
+# those in SUMMARY_LAST_ATTRIBUTES (and any non-numeric one) from the latest, twr (a percentage)
+# is compounded and every other numeric attribute is summed.
+SUMMARY_SECTIONS = {"ChangeInNAV"}
+SUMMARY_FIRST_ATTRIBUTES = {"fromDate", "startingValue"}
+SUMMARY_LAST_ATTRIBUTES = {"accountId", "acctAlias", "model", "currency", "toDate", "endingValue"}
+
+# Row attributes that identify an activity row; rows with one are kept once when merging
+ROW_ID_ATTRIBUTES = ("transactionID", "tradeID")
+
+# Chunk size for streaming GetStatement downloads
+STATEMENT_CHUNK_SIZE = 64 * 1024
+
+# Bytes read from the start of a streamed GetStatement response to identify its root element
+STATEMENT_SNIFF_BYTES = 4 * 1024
+
+T = TypeVar("T")
+
 
 # =============================================================================
 # Response Models
@@ -155,8 +206,8 @@ class DateRange:
             raise FlexDateRangeError(f"from_date ({self.from_date}) must be before to_date ({self.to_date})")
 
         delta = self.to_date - self.from_date
-        if delta.days > 365:
-            raise FlexDateRangeError(f"Date range cannot exceed 365 days (got {delta.days} days)")
+        if delta.days > MAX_DATE_RANGE_DAYS:
+            raise FlexDateRangeError(f"Date range cannot exceed {MAX_DATE_RANGE_DAYS} days (got {delta.days} days)")
 
         if self.to_date > date.today():
             raise FlexDateRangeError(f"to_date ({self.to_date}) cannot be in the future")
@@ -169,13 +220,148 @@ class DateRange:
         }
 
 
+def split_date_range(from_date: date, to_date: date, max_days: int = MAX_DATE_RANGE_DAYS) -> List[DateRange]:
+    """
+    Split a span of any length into consecutive, non-overlapping DateRange windows.
+
+    Args:
+        from_date: First day of the span
+        to_date: Last day of the span (inclusive)
+        max_days: Max days between a window's from_date and to_date
+
+    Returns:
+        Windows in chronological order; each day of the span is in exactly one window
+
+    Raises:
+        FlexDateRangeError: If from_date is after to_date or to_date is in the future
+    """
+    if from_date > to_date:
+        raise FlexDateRangeError(f"from_date ({from_date}) must be before to_date ({to_date})")
+    if not 0 <= max_days <= MAX_DATE_RANGE_DAYS:
+        raise FlexDateRangeError(f"max_days must be between 0 and {MAX_DATE_RANGE_DAYS} (got {max_days})")
+
+    windows = []
+    start = from_date
+    while start <= to_date:
+        end = min(start + timedelta(days=max_days), to_date)
+        windows.append(DateRange(from_date=start, to_date=end))
+        start = end + timedelta(days=1)
+    return windows
+
+
+def merge_flex_statements(xml_statements: Sequence[str]) -> str:
+    """
+    Merge FlexQueryResponse statements for consecutive date windows into one.
+
+    Statements are merged per account. Activity sections (Trades, CashTransactions, ...)
+    are concatenated in window order, dropping rows whose transactionID (or tradeID) was
+    already seen, so a row reported by two windows where they meet appears once. Rows
+    without an ID are all kept. Snapshot sections (see SNAPSHOT_SECTIONS) are taken from
+    the latest window only, and summary sections (see SUMMARY_SECTIONS) are combined
+    attribute by attribute.
+
+    Args:
+        xml_statements: FlexQueryResponse XML, in chronological order
+
+    Returns:
+        Merged FlexQueryResponse XML
+
+    Raises:
+        ValueError: If there are no statements, or a childless section that keeps its data
+            in attributes (other than the summary and snapshot sections) differs between windows
+    """
+    if not xml_statements:
+        raise ValueError("No statements to merge")
+
+    roots = [ET.fromstring(xml) for xml in xml_statements]
+    merged_root = ET.Element(roots[0].tag, roots[0].attrib)
+    merged_statements = ET.SubElement(merged_root, "FlexStatements")
+
+    statements_by_account = {}
+    seen_rows = {}
+    for root in roots:
+        for statement in root.iter("FlexStatement"):
+            account_id = statement.get("accountId")
+            merged = statements_by_account.get(account_id)
+            if merged is None:
+                merged = ET.SubElement(merged_statements, "FlexStatement", statement.attrib)
+                statements_by_account[account_id] = merged
+            else:
+                # Keep the first window's fromDate, take everything else from the latest window
+                merged.attrib.update({k: v for k, v in statement.attrib.items() if k != "fromDate"})
+
+            for section in statement:
+                existing = merged.find(section.tag)
+                if existing is not None and section.tag in SUMMARY_SECTIONS:
+                    existing.attrib = _merge_summary_attributes(existing.attrib, section.attrib)
+                    continue
+                if existing is None or section.tag in SNAPSHOT_SECTIONS:
+                    if existing is not None:
+                        merged.remove(existing)
+                    existing = ET.SubElement(merged, section.tag, section.attrib)
+                    seen_rows[(account_id, section.tag)] = set()
+                elif len(section) == 0 and section.attrib != existing.attrib:
+                    raise ValueError(f"Cannot merge {section.tag} of account {account_id} across windows: its data is in attributes")
+
+                seen = seen_rows[(account_id, section.tag)]
+                for row in section:
+                    row_id = next(((name, row.get(name)) for name in ROW_ID_ATTRIBUTES if row.get(name)), None)
+                    if row_id is not None:
+                        if (row.tag, row_id) in seen:
+                            continue
+                        seen.add((row.tag, row_id))
+                    existing.append(row)
+
+    merged_statements.set("count", str(len(statements_by_account)))
+    return ET.tostring(merged_root, encoding="unicode")
+
+
+def _merge_summary_attributes(first: dict, second: dict) -> dict:
+    """
+    Attributes of a summary section covering two consecutive windows (see SUMMARY_SECTIONS).
+
+    Args:
+        first: Attributes of the earlier window (or of the windows merged so far)
+        second: Attributes of the later window
+
+    Returns:
+        Merged attributes
+    """
+    merged = dict(first)
+    for name, value in second.items():
+        if name in SUMMARY_FIRST_ATTRIBUTES and name in first:
+            continue
+        earlier, later = _decimal(first.get(name)), _decimal(value)
+        if name in SUMMARY_LAST_ATTRIBUTES or earlier is None or later is None:
+            merged[name] = value
+        elif name == "twr":
+            merged[name] = str(((1 + earlier / 100) * (1 + later / 100) - 1) * 100)
+        else:
+            merged[name] = str(earlier + later)
+    return merged
+
+
+def _decimal(value: Optional[str]) -> Optional[Decimal]:
+    """Attribute value as a Decimal, None if missing or not a number."""
+    try:
+        return Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+
+
 # =============================================================================
 # HTTP Client Protocol
 # =============================================================================
 
 
 class FlexHTTPClient(Protocol):
-    """Protocol for Flex API HTTP operations - enables testing with mocks."""
+    """
+    Protocol for Flex API HTTP operations - enables testing with mocks.
+
+    Clients may also provide `stream_statement(token, reference_code, version="3") -> Iterator[bytes]`,
+    which yields the GetStatement response in chunks (see HTTPFlexClient). FlexClient.fetch_flex_report_to_file
+    uses it when present and falls back to get_statement otherwise.
+    """
 
     def send_request(
         self,
@@ -276,56 +462,151 @@ class HTTPFlexClient:
         response.raise_for_status()
         return response.text
 
+    def stream_statement(
+        self,
+        token: str,
+        reference_code: str,
+        version: str = "3",
+        chunk_size: int = STATEMENT_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """
+        Get flex statement from IBKR API as a stream of raw bytes.
+
+        The response body is never held in memory as a whole, so this is suitable for
+        statements too large to decode into a single string.
+
+        Args:
+            token: Flex Web Service access token
+            reference_code: Reference code from send_request
+            version: API version (default: "3")
+            chunk_size: Size of the yielded chunks in bytes
+
+        Yields:
+            Chunks of the XML response
+
+        Raises:
+            requests.HTTPError: On HTTP errors
+            requests.Timeout: On timeout
+        """
+        url = f"{self.BASE_URL}/GetStatement"
+        params = {"t": token, "q": reference_code, "v": version}
+
+        logger.debug(f"Streaming statement: reference_code={reference_code}")
+        with self.session.get(url, params=params, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size=chunk_size)
+
+
+def hash_token(token: str) -> str:
+    """
+    Stable, non-reversible identifier for a Flex token.
+
+    Used wherever a token needs to key local state (rate limit buckets, caches, journals)
+    without the token itself being written to disk or logs.
+    """
+    return hashlib.sha256(str(token).encode("utf-8")).hexdigest()[:16]
+
+
+def statement_request_key(token: str, query_id: str, date_range: Optional[DateRange] = None) -> str:
+    """
+    Stable identifier of a statement request: query_id, date range and token hash.
+
+    Used to key local state about a request (cache entries, journal entries).
+    """
+    identity = {
+        "query_id": str(query_id),
+        "from_date": date_range.from_date.isoformat() if date_range else None,
+        "to_date": date_range.to_date.isoformat() if date_range else None,
+        "token": hash_token(token),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _sniff_root_tag(head: bytes) -> Optional[str]:
+    """
+    Return the root element tag of a (possibly truncated) XML document.
+
+    Args:
+        head: First bytes of the document
+
+    Returns:
+        Root tag, or None if the root start tag is not complete yet
+
+    Raises:
+        FlexStatementError: If the bytes are not well-formed XML
+    """
+    parser = ET.XMLPullParser(events=("start",))
+    try:
+        parser.feed(head)
+        for _, elem in parser.read_events():
+            return elem.tag
+    except ET.ParseError as e:
+        raise FlexStatementError(f"Failed to parse XML response: {e}")
+    return None
+
 
 # =============================================================================
 # Flex Request Service
 # =============================================================================
 
 
-class FlexClient:
+class BaseFlexClient:
     """
-    High-level client for IBKR Flex Web Service operations.
-
-    This class orchestrates the full flex report workflow:
-    1. Send request to initiate report generation
-    2. Poll for statement completion
-    3. Retrieve the generated statement
-
-    It handles retries with exponential backoff, error classification,
-    and token lifecycle awareness.
+    Shared response parsing, error classification and retry policy.
 
-    Example:
-        >>> client = FlexClient()
-        >>> xml_data = client.fetch_flex_report(
-        ...     token="your_token",
-        ...     query_id="123456",
-        ...     date_range=DateRange(date(2024, 1, 1), date(2024, 12, 31))
-        ... )
+    Subclassed by the synchronous FlexClient and the asyncio AsyncFlexClient so that
+    both classify IBKR error codes and back off in exactly the same way.
     """
 
     def __init__(
         self,
-        http_client: Optional[FlexHTTPClient] = None,
         max_retries: int = 5,
         base_retry_delay: float = 1.0,
         max_retry_delay: float = 60.0,
         statement_poll_delay: float = 2.0,
+        poll_scheduler: Optional[StatementPollScheduler] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional["FlexStatementCache"] = None,
+        journal: Optional["FetchJournal"] = None,
     ):
         """
-        Initialize flex client.
+        Initialize retry policy.
 
         Args:
-            http_client: HTTP client (defaults to HTTPFlexClient)
             max_retries: Maximum retry attempts for API calls
             base_retry_delay: Base delay in seconds for exponential backoff
             max_retry_delay: Maximum delay between retries
-            statement_poll_delay: Initial delay before fetching statement
+            statement_poll_delay: Initial delay before fetching statement, used until
+                the poll scheduler has generation time history for a query
+            poll_scheduler: GetStatement probe scheduler (defaults to an in-memory
+                StatementPollScheduler)
+            rate_limiter: Paces SendRequest/GetStatement calls per token (default: no pacing)
+            cache: Statement cache consulted by fetch_flex_report (default: no caching)
+            journal: Records in-flight reference codes so fetch_flex_report can resume
+                them after a restart (default: no journal)
         """
-        self.http_client = http_client or HTTPFlexClient()
         self.max_retries = max_retries
         self.base_retry_delay = base_retry_delay
         self.max_retry_delay = max_retry_delay
         self.statement_poll_delay = statement_poll_delay
+        self.poll_scheduler = poll_scheduler or StatementPollScheduler(default_estimate=statement_poll_delay)
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.journal = journal
+
+    @property
+    def last_poll_stats(self) -> Optional[PollStats]:
+        """Polling statistics of the most recent fetch_flex_report call."""
+        return self.poll_scheduler.recent_stats[-1] if self.poll_scheduler.recent_stats else None
+
+    def _rate_limit_delay(self, token: str) -> float:
+        """Reserve a request slot for token with the rate limiter, return seconds to wait for it."""
+        if self.rate_limiter is None:
+            return 0.0
+        delay = self.rate_limiter.reserve(hash_token(token))
+        if delay > 0:
+            logger.debug(f"Rate limited: waiting {delay:.2f}s before next request")
+        return delay
 
     def _calculate_retry_delay(self, attempt: int, base_delay: Optional[float] = None) -> float:
         """
@@ -345,6 +626,35 @@ class FlexClient:
         jitter = 0.5 + random.random()
         return delay * jitter
 
+    def _retry_delay_for_error(self, error: Exception, attempt: int) -> float:
+        """
+        Log a failed attempt and return the delay before the next one.
+
+        Token errors are never retried and are re-raised immediately.
+
+        Args:
+            error: Exception raised by the attempt
+            attempt: Current attempt number (0-indexed)
+
+        Returns:
+            Delay in seconds
+        """
+        if isinstance(error, FlexTokenError):
+            raise error
+
+        if isinstance(error, FlexRetryableError):
+            delay = self._calculate_retry_delay(attempt, error.retry_after)
+            kind = " (retryable)"
+        elif isinstance(error, requests.RequestException):
+            delay = self._calculate_retry_delay(attempt)
+            kind = " (network)"
+        else:
+            delay = self._calculate_retry_delay(attempt)
+            kind = ""
+
+        logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed{kind}: {error}. Retrying in {delay:.1f}s")
+        return delay
+
     def _parse_send_request_response(self, xml_text: str) -> FlexRequestResponse:
         """Parse XML response from SendRequest endpoint."""
         try:
@@ -391,6 +701,26 @@ class FlexClient:
             xml_data=xml_text,
         )
 
+    def _statement_from_probe(self, xml_text: str) -> Optional[str]:
+        """
+        Evaluate a GetStatement probe.
+
+        Args:
+            xml_text: XML response from GetStatement
+
+        Returns:
+            Statement XML if ready, None while generation is still in progress
+
+        Raises:
+            FlexClientError: On any other API error
+        """
+        response = self._parse_statement_response(xml_text)
+        if response.is_success:
+            return response.xml_data
+        if response.error_code == FlexErrorCode.STATEMENT_IN_PROGRESS:
+            return None
+        self._raise_for_error(response.error_code, response.error_message)
+
     def _raise_for_error(self, error_code: Optional[str], error_message: Optional[str]):
         """
         Raise appropriate exception based on error code.
@@ -412,6 +742,162 @@ class FlexClient:
 
         raise FlexRequestError(msg, error_code=error_code)
 
+    def _start_poll(self, query_id: str, reference_code: str, elapsed: float = 0.0) -> "_StatementPoll":
+        """Start polling GetStatement for reference_code on the poll scheduler's schedule."""
+        return _StatementPoll(self, query_id, reference_code, elapsed=elapsed)
+
+
+class _StatementPoll:
+    """
+    Per-probe decisions of one GetStatement polling loop.
+
+    FlexClient and AsyncFlexClient share this and only differ in how they sleep and send a
+    probe. Iterating yields the wait before each probe; every probe outcome is reported back
+    with answered() or failed(). Leaving the `with` block records the polling statistics on
+    the scheduler, with the generation time taken as the midpoint between the last "in
+    progress" answer and the first ready one (see statement_polling).
+    """
+
+    def __init__(self, client: BaseFlexClient, query_id: str, reference_code: str, elapsed: float = 0.0):
+        """
+        Initialize poll.
+
+        Args:
+            client: Client providing the poll scheduler and retry policy
+            query_id: Query ID the statement was requested for
+            reference_code: Reference code from send_flex_request
+            elapsed: Seconds since the reference code was issued
+        """
+        self.client = client
+        self.stats = PollStats(query_id=str(query_id), reference_code=reference_code, estimate=client.poll_scheduler.estimate(query_id))
+        self.last_error: Optional[Exception] = None
+        self._delays = client.poll_scheduler.delays(query_id, elapsed=elapsed)
+        self._started = time.monotonic() - elapsed
+        self._in_progress_at: Optional[float] = None
+        self._failures = 0
+        self._backoff = 0.0
+
+    def __enter__(self) -> "_StatementPoll":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.client.poll_scheduler.record(self.stats)
+
+    def __iter__(self) -> Iterator[float]:
+        """Yield the wait before each probe, until the schedule or max_retries runs out."""
+        for delay in self._delays:
+            if self._failures >= self.client.max_retries:
+                return
+            delay = max(delay, self._backoff)
+            logger.debug(f"Waiting {delay:.1f}s before GetStatement probe {self.stats.poll_count + 1}")
+            self.stats.wait_time += delay
+            self.stats.poll_count += 1
+            yield delay
+
+    def answered(self, result: Optional[T]) -> bool:
+        """
+        Record a probe answer.
+
+        Args:
+            result: Probe result; None while generation is in progress
+
+        Returns:
+            True if the answer carried the statement
+        """
+        self._backoff = 0.0
+        now = time.monotonic() - self._started
+        if result is None:
+            self._in_progress_at = now
+            return False
+        self.stats.generation_time = now if self._in_progress_at is None else (self._in_progress_at + now) / 2
+        logger.info("Flex statement retrieved successfully")
+        return True
+
+    def failed(self, error: Exception) -> None:
+        """
+        Record a failed probe; the next one backs off as in get_flex_statement.
+
+        Raises:
+            FlexTokenError: On token errors, which are never retried
+        """
+        self.last_error = error
+        self._failures += 1
+        if self._failures < self.client.max_retries:
+            self._backoff = self.client._retry_delay_for_error(error, self._failures - 1)
+
+    def not_ready_error(self) -> FlexStatementError:
+        """Error for a statement still missing once polling stopped."""
+        return FlexStatementError(f"Statement not ready after {self.stats.poll_count} polls ({self.stats.wait_time:.1f}s): {self.last_error}")
+
+
+class FlexClient(BaseFlexClient):
+    """
+    High-level client for IBKR Flex Web Service operations.
+
+    This class orchestrates the full flex report workflow:
+    1. Send request to initiate report generation
+    2. Poll for statement completion
+    3. Retrieve the generated statement
+
+    It handles retries with exponential backoff, error classification,
+    and token lifecycle awareness.
+
+    Example:
+        >>> client = FlexClient()
+        >>> xml_data = client.fetch_flex_report(
+        ...     token="your_token",
+        ...     query_id="123456",
+        ...     date_range=DateRange(date(2024, 1, 1), date(2024, 12, 31))
+        ... )
+    """
+
+    def __init__(
+        self,
+        http_client: Optional[FlexHTTPClient] = None,
+        max_retries: int = 5,
+        base_retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+        statement_poll_delay: float = 2.0,
+        poll_scheduler: Optional[StatementPollScheduler] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional["FlexStatementCache"] = None,
+        journal: Optional["FetchJournal"] = None,
+        http_client_factory: Optional[Callable[[], FlexHTTPClient]] = None,
+    ):
+        """
+        Initialize flex client.
+
+        Args:
+            http_client: HTTP client (defaults to HTTPFlexClient)
+            max_retries: Maximum retry attempts for API calls
+            base_retry_delay: Base delay in seconds for exponential backoff
+            max_retry_delay: Maximum delay between retries
+            statement_poll_delay: Initial delay before fetching statement
+            poll_scheduler: GetStatement probe scheduler (defaults to an in-memory StatementPollScheduler)
+            rate_limiter: Paces SendRequest/GetStatement calls per token (default: no pacing)
+            cache: Statement cache consulted by fetch_flex_report (default: no caching)
+            journal: Records in-flight reference codes so fetch_flex_report can resume
+                them after a restart (default: no journal)
+            http_client_factory: Builds the HTTP client of each fetch_range worker thread,
+                since requests.Session is not guaranteed to be thread-safe (defaults to
+                HTTPFlexClient, or to sharing http_client when one is given, which must then
+                be thread-safe)
+        """
+        super().__init__(
+            max_retries=max_retries,
+            base_retry_delay=base_retry_delay,
+            max_retry_delay=max_retry_delay,
+            statement_poll_delay=statement_poll_delay,
+            poll_scheduler=poll_scheduler,
+            rate_limiter=rate_limiter,
+            cache=cache,
+            journal=journal,
+        )
+        self.http_client = http_client or HTTPFlexClient()
+        if http_client_factory is None:
+            http_client_factory = (lambda: http_client) if http_client is not None else HTTPFlexClient
+        self.http_client_factory = http_client_factory
+
     def send_flex_request(
         self,
         token: str,
@@ -438,6 +924,7 @@ class FlexClient:
 
         for attempt in range(self.max_retries):
             try:
+                self._wait_for_rate_limit(token)
                 xml_response = self.http_client.send_request(
                     token=token,
                     query_id=query_id,
@@ -452,28 +939,10 @@ class FlexClient:
                 # API returned an error
                 self._raise_for_error(response.error_code, response.error_message)
 
-            except FlexRetryableError as e:
-                last_error = e
-                delay = self._calculate_retry_delay(attempt, e.retry_after)
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed (retryable): {e}. Retrying in {delay:.1f}s")
-                if attempt < self.max_retries - 1:
-                    time.sleep(delay)
-
-            except (FlexTokenError, FlexTokenExpiredError):
-                # Token errors should not be retried
-                raise
-
-            except requests.RequestException as e:
-                last_error = e
-                delay = self._calculate_retry_delay(attempt)
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed (network): {e}. Retrying in {delay:.1f}s")
-                if attempt < self.max_retries - 1:
-                    time.sleep(delay)
-
             except Exception as e:
                 last_error = e
-                delay = self._calculate_retry_delay(attempt)
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed: {e}. Retrying in {delay:.1f}s")
+                # Token errors are re-raised here and never retried
+                delay = self._retry_delay_for_error(e, attempt)
                 if attempt < self.max_retries - 1:
                     time.sleep(delay)
 
@@ -498,6 +967,7 @@ class FlexClient:
 
         for attempt in range(self.max_retries):
             try:
+                self._wait_for_rate_limit(token)
                 xml_response = self.http_client.get_statement(token=token, reference_code=reference_code)
                 response = self._parse_statement_response(xml_response)
 
@@ -508,32 +978,20 @@ class FlexClient:
                 # API returned an error
                 self._raise_for_error(response.error_code, response.error_message)
 
-            except FlexRetryableError as e:
-                last_error = e
-                delay = self._calculate_retry_delay(attempt, e.retry_after)
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed (retryable): {e}. Retrying in {delay:.1f}s")
-                if attempt < self.max_retries - 1:
-                    time.sleep(delay)
-
-            except (FlexTokenError, FlexTokenExpiredError):
-                raise
-
-            except requests.RequestException as e:
-                last_error = e
-                delay = self._calculate_retry_delay(attempt)
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed (network): {e}. Retrying in {delay:.1f}s")
-                if attempt < self.max_retries - 1:
-                    time.sleep(delay)
-
             except Exception as e:
                 last_error = e
-                delay = self._calculate_retry_delay(attempt)
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed: {e}. Retrying in {delay:.1f}s")
+                delay = self._retry_delay_for_error(e, attempt)
                 if attempt < self.max_retries - 1:
                     time.sleep(delay)
 
         raise FlexStatementError(f"Failed after {self.max_retries} attempts: {last_error}")
 
+    def _wait_for_rate_limit(self, token: str) -> None:
+        """Wait until the rate limiter allows the next request for token."""
+        delay = self._rate_limit_delay(token)
+        if delay > 0:
+            time.sleep(delay)
+
     def fetch_flex_report(
         self,
         token: str,
@@ -543,7 +1001,8 @@ class FlexClient:
         """
         Complete flex report fetch: send request + get statement.
 
-        This is the high-level API that most consumers should use.
+        This is the high-level API that most consumers should use. With a cache
+        configured, a valid cached statement is returned without contacting IBKR.
 
         Args:
             token: Flex Web Service token
@@ -556,10 +1015,244 @@ class FlexClient:
         Raises:
             FlexClientError: On any API error
         """
-        reference_code = self.send_flex_request(token, query_id, date_range)
+        if self.cache is not None:
+            xml_data = self.cache.get(token, query_id, date_range)
+            if xml_data is not None:
+                return xml_data
+
+        xml_data = self._resume_from_journal(token, query_id, date_range)
+        if xml_data is None:
+            reference_code = self.send_flex_request(token, query_id, date_range)
+            if self.journal is not None:
+                self.journal.record(token, query_id, reference_code, date_range)
+            xml_data = self.poll_flex_statement(token, query_id, reference_code)
+
+        if self.journal is not None:
+            self.journal.remove(token, query_id, date_range)
+        if self.cache is not None:
+            self.cache.put(token, query_id, xml_data, date_range)
+        return xml_data
+
+    def _resume_from_journal(self, token: str, query_id: str, date_range: Optional[DateRange]) -> Optional[str]:
+        """
+        Poll a reference code left in the journal by an earlier run, if one is still valid.
+
+        Returns:
+            XML statement data, or None if there is nothing to resume (or resuming failed)
+        """
+        entry = self.journal.find(token, query_id, date_range) if self.journal is not None else None
+        if entry is None:
+            return None
+
+        logger.info(f"Resuming flex request: reference_code={entry.reference_code}, issued {entry.age:.0f}s ago")
+        try:
+            return self.poll_flex_statement(token, query_id, entry.reference_code, elapsed=entry.age)
+        except FlexTokenError:
+            raise
+        except FlexClientError as e:
+            logger.warning(f"Could not resume reference_code={entry.reference_code}: {e}. Sending a new request")
+            self.journal.remove(token, query_id, date_range)
+            return None
+
+    def poll_flex_statement(self, token: str, query_id: str, reference_code: str, elapsed: float = 0.0) -> str:
+        """
+        Poll GetStatement on the poll scheduler's schedule until the statement is ready.
+
+        "Generation in progress" (1019) answers just move on to the next scheduled probe.
+        Other transient errors back off as in get_flex_statement and count against max_retries.
+        Polling statistics are recorded on the scheduler (see last_poll_stats).
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID the statement was requested for
+            reference_code: Reference code from send_flex_request
+            elapsed: Seconds since the reference code was issued
+
+        Returns:
+            XML statement data
+
+        Raises:
+            FlexStatementError: On API errors, or when the statement is not ready in time
+            FlexTokenError: On token-related errors
+        """
+
+        def probe() -> Optional[str]:
+            self._wait_for_rate_limit(token)
+            xml_response = self.http_client.get_statement(token=token, reference_code=reference_code)
+            return self._statement_from_probe(xml_response)
+
+        return self._poll_statement(query_id, reference_code, probe, elapsed=elapsed)
+
+    def fetch_range(
+        self,
+        token: str,
+        query_id: str,
+        from_date: date,
+        to_date: Optional[date] = None,
+        max_workers: int = 4,
+    ) -> "CustomFlexReport":
+        """
+        Fetch a flex report for a span of any length.
+
+        The span is split into windows of at most MAX_DATE_RANGE_DAYS (see split_date_range),
+        the windows are fetched concurrently, and the statements are merged into one report
+        (see merge_flex_statements). Use report.df(topic) for one DataFrame per topic.
+
+        Each worker thread gets its own HTTP client from http_client_factory. All windows are
+        paced by the client's rate_limiter or, without one, by a TokenBucketRateLimiter at
+        DEFAULT_REQUEST_RATE, so concurrent windows don't trip IBKR's 1018 rate limit.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            from_date: First day of the span
+            to_date: Last day of the span (default: today)
+            max_workers: Max number of windows fetched at the same time
+
+        Returns:
+            CustomFlexReport: merged report
+
+        Raises:
+            FlexClientError: On any API error
+        """
+        from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+
+        windows = split_date_range(from_date, to_date or date.today())
+        logger.info(f"Fetching query_id={query_id} from {from_date} to {windows[-1].to_date} in {len(windows)} window(s)")
+
+        rate_limiter = self.rate_limiter or TokenBucketRateLimiter(rate=DEFAULT_REQUEST_RATE)
+        local = threading.local()
+
+        def fetch(window: DateRange) -> str:
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = copy.copy(self)
+                client.http_client = self.http_client_factory()
+                client.rate_limiter = rate_limiter
+            return client.fetch_flex_report(token, query_id, window)
 
-        # Wait for IBKR to generate the report
-        logger.debug(f"Waiting {self.statement_poll_delay}s for statement generation")
-        time.sleep(self.statement_poll_delay)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(windows)))) as executor:
+            xml_statements = list(executor.map(fetch, windows))
 
-        return self.get_flex_statement(token, reference_code)
+        return CustomFlexReport.from_xml(merge_flex_statements(xml_statements))
+
+    def fetch_flex_report_to_file(
+        self,
+        token: str,
+        query_id: str,
+        date_range: Optional[DateRange] = None,
+        path: Optional[Union[str, Path]] = None,
+    ) -> Path:
+        """
+        Complete flex report fetch, streaming the statement straight to disk.
+
+        Unlike fetch_flex_report, the statement is never held in memory: GetStatement is
+        read in chunks and written to `path` as they arrive, so peak memory stays constant
+        regardless of report size. Only the first few KB are inspected to tell a
+        FlexStatementResponse error (eg, generation in progress) from the statement itself.
+        HTTP clients without stream_statement are read with get_statement instead, and so
+        hold one response in memory at a time.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            date_range: Optional custom date range
+            path: Destination file (default: a new temporary .xml file)
+
+        Returns:
+            Path to the XML statement
+
+        Raises:
+            FlexClientError: On any API error
+        """
+        temporary = path is None
+        if temporary:
+            fd, path = tempfile.mkstemp(prefix="flex_report_", suffix=".xml")
+            os.close(fd)
+        path = Path(path)
+
+        try:
+            reference_code = self.send_flex_request(token, query_id, date_range)
+
+            def probe() -> Optional[Path]:
+                return self._stream_statement_to_file(token, reference_code, path)
+
+            return self._poll_statement(query_id, reference_code, probe)
+        except BaseException:
+            if temporary:
+                path.unlink(missing_ok=True)
+            raise
+
+    def _stream_statement_to_file(self, token: str, reference_code: str, path: Path) -> Optional[Path]:
+        """
+        Stream one GetStatement probe to `path`.
+
+        The body is written to a `.part` file next to `path` and renamed on completion,
+        so an interrupted download never looks like a complete statement.
+
+        Returns:
+            `path` if the statement was written, None while generation is still in progress
+
+        Raises:
+            FlexClientError: On any other API error
+        """
+        self._wait_for_rate_limit(token)
+        stream_statement = getattr(self.http_client, "stream_statement", None)
+        if stream_statement is not None:
+            chunks = iter(stream_statement(token=token, reference_code=reference_code))
+        else:
+            chunks = iter([self.http_client.get_statement(token=token, reference_code=reference_code).encode("utf-8")])
+
+        head = b""
+        root_tag = None
+        for chunk in chunks:
+            head += chunk
+            root_tag = _sniff_root_tag(head[:STATEMENT_SNIFF_BYTES])
+            if root_tag is not None or len(head) >= STATEMENT_SNIFF_BYTES:
+                break
+
+        if root_tag is None and len(head) < STATEMENT_SNIFF_BYTES:
+            raise FlexStatementError(f"Incomplete GetStatement response ({len(head)} bytes)")
+
+        if root_tag == "FlexStatementResponse":
+            # Error wrappers are tiny; read the rest and classify as usual
+            body = head + b"".join(chunks)
+            return self._statement_from_probe(body.decode("utf-8"))
+
+        part_path = path.with_name(path.name + ".part")
+        try:
+            with open(part_path, "wb") as f:
+                f.write(head)
+                for chunk in chunks:
+                    f.write(chunk)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        os.replace(part_path, path)
+        logger.debug(f"Flex statement streamed to {path}")
+        return path
+
+    def _poll_statement(self, query_id: str, reference_code: str, probe: Callable[[], Optional[T]], elapsed: float = 0.0) -> T:
+        """
+        Run `probe` on the poll scheduler's schedule until it returns a result.
+
+        Args:
+            query_id: Query ID the statement was requested for
+            reference_code: Reference code from send_flex_request
+            probe: Sends one GetStatement request; returns None while generation is in progress
+            elapsed: Seconds since the reference code was issued
+
+        Returns:
+            The first non-None probe result
+        """
+        with self._start_poll(query_id, reference_code, elapsed=elapsed) as poll:
+            for delay in poll:
+                time.sleep(delay)
+                try:
+                    result = probe()
+                except Exception as e:
+                    poll.failed(e)
+                    continue
+                if poll.answered(result):
+                    return result
+            raise poll.not_ready_error()
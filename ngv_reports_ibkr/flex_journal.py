@@ -0,0 +1,154 @@
+"""
+Journal of in-flight Flex statement requests.
+
+Between SendRequest and a successful GetStatement, the only handle on a statement being
+generated is its reference code. If the process dies in that window the code is lost, and
+the next run has to send a new request and wait for generation all over again.
+
+FetchJournal writes each reference code, with when it was issued, to a small JSON file as soon
+as SendRequest succeeds and removes it once the statement is retrieved. FlexClient consults it
+before sending a request and, for a code that is still valid, resumes polling GetStatement.
+
+Entries are keyed by statement_request_key, so tokens are never written to the journal.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from loguru import logger
+
+from ngv_reports_ibkr.flex_client import DateRange, statement_request_key
+
+
+@dataclass
+class JournalEntry:
+    """An in-flight statement request."""
+
+    query_id: str
+    reference_code: str
+    created_at: float  # unix time SendRequest succeeded
+    from_date: Optional[str] = None
+    to_date: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the reference code was issued."""
+        return time.time() - self.created_at
+
+
+class FetchJournal:
+    """
+    JSON file of reference codes for statements requested but not yet retrieved.
+
+    Example:
+        >>> client = FlexClient(journal=FetchJournal("data/flex_journal.json"))
+        >>> client.fetch_flex_report(token, query_id)  # resumes a code left by a crashed run
+    """
+
+    def __init__(self, path: Union[str, Path] = "data/flex_journal.json", max_age: float = 60 * 60):
+        """
+        Initialize journal.
+
+        Args:
+            path: JSON file for the journal (created on first write)
+            max_age: Seconds a reference code is considered valid for resuming
+        """
+        self.path = Path(path)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, JournalEntry]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return {key: JournalEntry(**value) for key, value in data.items()}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable flex journal {self.path}: {e}")
+            return {}
+
+    def _write(self, entries: Dict[str, JournalEntry]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({key: asdict(entry) for key, entry in entries.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def record(self, token: str, query_id: str, reference_code: str, date_range: Optional[DateRange] = None) -> JournalEntry:
+        """
+        Record a reference code returned by SendRequest.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            reference_code: Reference code from send_flex_request
+            date_range: Optional custom date range
+
+        Returns:
+            The journal entry
+        """
+        entry = JournalEntry(
+            query_id=str(query_id),
+            reference_code=reference_code,
+            created_at=time.time(),
+            from_date=date_range.from_date.isoformat() if date_range else None,
+            to_date=date_range.to_date.isoformat() if date_range else None,
+        )
+        with self._lock:
+            entries = self._read()
+            entries[statement_request_key(token, query_id, date_range)] = entry
+            self._write(entries)
+        return entry
+
+    def find(self, token: str, query_id: str, date_range: Optional[DateRange] = None) -> Optional[JournalEntry]:
+        """
+        Return the in-flight entry for a request if its reference code is still valid.
+
+        Args:
+            token: Flex Web Service token
+            query_id: Query ID for the flex report
+            date_range: Optional custom date range
+
+        Returns:
+            Journal entry or None
+        """
+        with self._lock:
+            entry = self._read().get(statement_request_key(token, query_id, date_range))
+        if entry is None or entry.age > self.max_age:
+            return None
+        return entry
+
+    def remove(self, token: str, query_id: str, date_range: Optional[DateRange] = None) -> None:
+        """Forget the in-flight entry for a request (retrieved, or no longer resumable)."""
+        key = statement_request_key(token, query_id, date_range)
+        with self._lock:
+            entries = self._read()
+            if entries.pop(key, None) is not None:
+                self._write(entries)
+
+    def pending(self) -> List[JournalEntry]:
+        """In-flight entries whose reference codes are still valid, oldest first."""
+        with self._lock:
+            entries = self._read().values()
+        return sorted((e for e in entries if e.age <= self.max_age), key=lambda e: e.created_at)
+
+    def prune(self) -> int:
+        """
+        Drop entries older than max_age.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            entries = self._read()
+            valid = {key: entry for key, entry in entries.items() if entry.age <= self.max_age}
+            removed = len(entries) - len(valid)
+            if removed:
+                self._write(valid)
+        return removed
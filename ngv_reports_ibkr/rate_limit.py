@@ -0,0 +1,219 @@
+"""
+Client-side rate limiting for the IBKR Flex Web Service.
+
+IBKR answers with error 1018 (RATE_LIMITED) when a token sends requests too quickly. The
+limiters here pace SendRequest/GetStatement calls ahead of time instead, using token buckets:
+
+- per key (FlexClient uses a hash of the Flex token), and
+- optionally one global bucket shared by every key.
+
+TokenBucketRateLimiter keeps its buckets in memory and is shared by passing the same instance
+to several clients (threads or asyncio tasks). SQLiteRateLimiter keeps them in a local SQLite
+file, so worker processes fetching with the same token pace each other too.
+
+Limiters hand out reservations: reserve() books the next slot and returns how long the caller
+has to wait for it, which lets both the sync and the asyncio client sleep their own way. A
+request is sent once every bucket it draws from has a token, so each bucket is debited as of
+that same send time (a bucket's updated_at can be in the future, for slots already booked).
+"""
+
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Optional, Protocol, Tuple, Union
+
+# Key of the bucket shared by all keys
+GLOBAL_KEY = "__global__"
+
+
+class RateLimiter(Protocol):
+    """Protocol for rate limiters used by FlexClient and AsyncFlexClient."""
+
+    def reserve(self, key: str) -> float:
+        """Reserve one request for key, return seconds to wait before sending it."""
+        ...
+
+
+def _ready_at(tokens: float, updated_at: float, now: float, rate: float) -> float:
+    """Earliest time from `now` on at which a bucket holds a whole token."""
+    start = max(now, updated_at)
+    tokens += max(0.0, now - updated_at) * rate
+    return start + max(0.0, 1.0 - tokens) / rate
+
+
+def _take(tokens: float, updated_at: float, at: float, rate: float, capacity: float) -> Tuple[float, float]:
+    """
+    Refill a bucket up to `at` and take one token from it.
+
+    Returns:
+        (new token balance, new updated_at)
+    """
+    tokens = min(capacity, tokens + max(0.0, at - updated_at) * rate)
+    return tokens - 1.0, max(at, updated_at)
+
+
+class BaseRateLimiter(ABC):
+    """Shared bucket configuration and blocking acquire for token bucket limiters."""
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        capacity: float = 1.0,
+        global_rate: Optional[float] = None,
+        global_capacity: Optional[float] = None,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            rate: Requests per second allowed per key
+            capacity: Burst size per key
+            global_rate: Requests per second allowed across all keys (default: no global limit)
+            global_capacity: Burst size across all keys (default: same as capacity)
+        """
+        if rate <= 0 or (global_rate is not None and global_rate <= 0):
+            raise ValueError("Rates must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.global_rate = global_rate
+        self.global_capacity = global_capacity if global_capacity is not None else capacity
+
+    def _limits(self, key: str):
+        """Yield (bucket key, rate, capacity) for every bucket a request for key draws from."""
+        yield key, self.rate, self.capacity
+        if self.global_rate is not None:
+            yield GLOBAL_KEY, self.global_rate, self.global_capacity
+
+    def _book(self, key: str, now: float, bucket: Callable[[str], Optional[Tuple[float, float]]]) -> Tuple[Dict[str, Tuple[float, float]], float]:
+        """
+        Book one request for key in all its buckets, at the first time every bucket has a token.
+
+        Args:
+            key: Key of the request
+            now: Current time
+            bucket: Returns the (tokens, updated_at) of a bucket key, None for a new bucket
+
+        Returns:
+            (new (tokens, updated_at) by bucket key, seconds to wait before sending)
+        """
+        limits = list(self._limits(key))
+        states = {bucket_key: bucket(bucket_key) or (capacity, now) for bucket_key, _, capacity in limits}
+        send_at = max(_ready_at(*states[bucket_key], now, rate) for bucket_key, rate, _ in limits)
+        booked = {bucket_key: _take(*states[bucket_key], send_at, rate, capacity) for bucket_key, rate, capacity in limits}
+        return booked, send_at - now
+
+    @abstractmethod
+    def reserve(self, key: str) -> float:
+        """Reserve one request for key, return seconds to wait before sending it."""
+
+    def acquire(self, key: str) -> float:
+        """
+        Block until a request for key may be sent.
+
+        Returns:
+            Seconds waited
+        """
+        wait = self.reserve(key)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class TokenBucketRateLimiter(BaseRateLimiter):
+    """
+    In-process token bucket rate limiter, safe to share between threads and asyncio tasks.
+
+    Example:
+        >>> limiter = TokenBucketRateLimiter(rate=1.0, global_rate=2.0)
+        >>> client_a = FlexClient(rate_limiter=limiter)
+        >>> client_b = FlexClient(rate_limiter=limiter)
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        capacity: float = 1.0,
+        global_rate: Optional[float] = None,
+        global_capacity: Optional[float] = None,
+    ):
+        super().__init__(rate=rate, capacity=capacity, global_rate=global_rate, global_capacity=global_capacity)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def reserve(self, key: str) -> float:
+        """Reserve one request for key, return seconds to wait before sending it."""
+        with self._lock:
+            booked, wait = self._book(key, time.monotonic(), self._buckets.get)
+            self._buckets.update(booked)
+            return wait
+
+
+class SQLiteRateLimiter(BaseRateLimiter):
+    """
+    Token bucket rate limiter shared across processes through a local SQLite file.
+
+    Every reservation runs in an IMMEDIATE transaction, so concurrent processes serialize
+    on the database lock and never hand out the same slot twice.
+
+    Example:
+        >>> limiter = SQLiteRateLimiter("data/flex_rate_limit.sqlite", rate=1.0)
+        >>> client = FlexClient(rate_limiter=limiter)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        rate: float = 1.0,
+        capacity: float = 1.0,
+        global_rate: Optional[float] = None,
+        global_capacity: Optional[float] = None,
+        timeout: float = 30.0,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            path: SQLite database file (created if missing)
+            rate: Requests per second allowed per key
+            capacity: Burst size per key
+            global_rate: Requests per second allowed across all keys (default: no global limit)
+            global_capacity: Burst size across all keys (default: same as capacity)
+            timeout: Seconds to wait for the database lock
+        """
+        super().__init__(rate=rate, capacity=capacity, global_rate=global_rate, global_capacity=global_capacity)
+        self.path = Path(path)
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def reserve(self, key: str) -> float:
+        """Reserve one request for key, return seconds to wait before sending it."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # wall clock, since monotonic clocks are not comparable across processes
+            now = time.time()
+
+            def bucket(bucket_key: str) -> Optional[Tuple[float, float]]:
+                return conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (bucket_key,)).fetchone()
+
+            booked, wait = self._book(key, now, bucket)
+            conn.executemany(
+                "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                [(bucket_key, tokens, updated_at) for bucket_key, (tokens, updated_at) in booked.items()],
+            )
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
@@ -0,0 +1,179 @@
+"""
+Adaptive GetStatement polling for the IBKR Flex Web Service.
+
+After SendRequest succeeds, IBKR needs some time to generate the statement; until then
+GetStatement answers with error 1019 ("generation in progress"). How long that takes depends
+mostly on the query (sections, accounts, date range), so the scheduler here learns the
+generation time per query_id from recent runs and schedules probes around that estimate:
+
+1. The first probe is sent just before the expected completion time.
+2. Later probes start at a fraction of the estimate and back off geometrically.
+
+A probe that finds the statement ready only bounds the generation time from above, and with
+the backoff that bound can overshoot by a lot. The time recorded is therefore the midpoint
+between the last "in progress" answer and the first ready one; only when the first probe is
+already ready is its own time used, which, being sent before the expected completion time,
+pulls the estimate down.
+
+Recent generation times are kept in a small JSON file so the estimate survives restarts.
+"""
+
+import json
+import os
+import statistics
+import threading
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Union
+
+from loguru import logger
+
+
+@dataclass
+class PollStats:
+    """Polling statistics for a single statement fetch."""
+
+    query_id: str
+    reference_code: Optional[str] = None
+    estimate: float = 0.0  # expected generation time used to schedule probes (seconds)
+    poll_count: int = 0  # number of GetStatement probes sent
+    wait_time: float = 0.0  # total time slept waiting between probes (seconds)
+    generation_time: Optional[float] = None  # time from SendRequest to the statement being ready, see above (seconds)
+
+
+class GenerationTimeHistory:
+    """
+    Last K statement generation times per query_id, optionally persisted to a JSON file.
+
+    Without a path the history is kept in memory only.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, max_samples: int = 10):
+        """
+        Initialize history.
+
+        Args:
+            path: JSON file to load from and save to (default: in-memory only)
+            max_samples: Number of recent samples kept per query_id
+        """
+        self.path = Path(path) if path else None
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = self._load()
+
+    def _load(self) -> Dict[str, List[float]]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable generation time history {self.path}: {e}")
+            return {}
+        return {str(k): [float(x) for x in v][-self.max_samples :] for k, v in data.items()}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._samples, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def samples(self, query_id: str) -> List[float]:
+        """Recent generation times for query_id, oldest first."""
+        with self._lock:
+            return list(self._samples.get(str(query_id), []))
+
+    def record(self, query_id: str, seconds: float) -> None:
+        """Add a generation time for query_id, keeping only the last max_samples."""
+        with self._lock:
+            samples = self._samples.setdefault(str(query_id), [])
+            samples.append(round(float(seconds), 3))
+            del samples[: -self.max_samples]
+            self._save()
+
+
+class StatementPollScheduler:
+    """
+    Schedules GetStatement probes around the expected generation time of a query.
+
+    Example:
+        >>> scheduler = StatementPollScheduler(history=GenerationTimeHistory("data/flex_generation_times.json"))
+        >>> client = FlexClient(poll_scheduler=scheduler)
+        >>> client.fetch_flex_report(token, query_id)
+        >>> client.last_poll_stats
+        PollStats(query_id='123456', ..., poll_count=1, wait_time=11.7, generation_time=12.1)
+    """
+
+    def __init__(
+        self,
+        history: Optional[GenerationTimeHistory] = None,
+        default_estimate: float = 2.0,
+        first_probe_fraction: float = 0.9,
+        probe_fraction: float = 0.25,
+        min_interval: float = 0.5,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        max_polls: int = 30,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            history: Generation time history (default: in-memory)
+            default_estimate: Expected generation time for a query without history (seconds)
+            first_probe_fraction: First probe is sent at this fraction of the estimate
+            probe_fraction: Interval after the first probe, as a fraction of the estimate
+            min_interval: Lower bound for the interval between later probes (seconds)
+            max_interval: Upper bound for the interval between later probes (seconds)
+            backoff: Growth factor of the interval between later probes
+            max_polls: Maximum number of probes per fetch
+        """
+        self.history = history or GenerationTimeHistory()
+        self.default_estimate = default_estimate
+        self.first_probe_fraction = first_probe_fraction
+        self.probe_fraction = probe_fraction
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_polls = max_polls
+        self.recent_stats: Deque[PollStats] = deque(maxlen=100)
+
+    def estimate(self, query_id: str) -> float:
+        """Expected generation time for query_id: median of recent runs, or default_estimate."""
+        samples = self.history.samples(query_id)
+        if not samples:
+            return self.default_estimate
+        return statistics.median(samples)
+
+    def delays(self, query_id: str, elapsed: float = 0.0) -> Iterator[float]:
+        """
+        Yield the wait before each GetStatement probe, at most max_polls values.
+
+        Args:
+            query_id: Query ID the statement was requested for
+            elapsed: Seconds since SendRequest already passed (eg, when resuming a request)
+
+        Yields:
+            Seconds to wait before the next probe
+        """
+        estimate = self.estimate(query_id)
+        yield max(0.0, estimate * self.first_probe_fraction - elapsed)
+
+        interval = min(max(estimate * self.probe_fraction, self.min_interval), self.max_interval)
+        for _ in range(self.max_polls - 1):
+            yield interval
+            interval = min(interval * self.backoff, self.max_interval)
+
+    def record(self, stats: PollStats) -> None:
+        """Record the outcome of a fetch; successful generation times update the estimate."""
+        self.recent_stats.append(stats)
+        if stats.generation_time is not None:
+            self.history.record(stats.query_id, stats.generation_time)
+        logger.info(
+            f"Flex statement polling: query_id={stats.query_id}, estimate={stats.estimate:.1f}s, "
+            f"poll_count={stats.poll_count}, wait_time={stats.wait_time:.1f}s, generation_time={stats.generation_time}"
+        )
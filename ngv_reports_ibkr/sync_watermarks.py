@@ -0,0 +1,172 @@
+"""
+Per-account high-water marks for incremental Flex syncs.
+
+A full sync re-downloads whatever period the saved Flex query defines. An incremental sync
+instead remembers, per account, the latest trade it has written (tradeDate, dateTime and the
+max transactionID) and only requests the date range from that watermark forward:
+
+1. The range starts on the watermark's tradeDate, since trades later that same day may not
+   have been in the previous statement yet.
+2. Of the rows returned, only those past the watermark are appended (transactionID when a row
+   has one, dateTime otherwise), so re-fetching the watermark's day never duplicates rows.
+
+Watermarks are kept in a small JSON file, keyed by query id and account id, so an account
+reported by two queries keeps one watermark per query.
+"""
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import pandas as pd
+from loguru import logger
+
+
+@dataclass
+class SyncWatermark:
+    """Latest trade written for an account."""
+
+    account_id: str
+    query_id: str
+    trade_date: Optional[str] = None  # ISO date
+    date_time: Optional[str] = None  # ISO datetime with UTC offset
+    transaction_id: Optional[int] = None
+
+    @classmethod
+    def from_trades(cls, account_id: str, query_id: str, df: pd.DataFrame, previous: Optional["SyncWatermark"] = None) -> "SyncWatermark":
+        """
+        Advance a watermark past the trades in df.
+
+        Args:
+            account_id: IBKR account id
+            query_id: Query ID the trades were fetched with
+            df: Trades as returned by CustomFlexReport.trades_by_account_id
+            previous: Watermark before df was written, if any
+
+        Returns:
+            SyncWatermark: new watermark
+        """
+        watermark = SyncWatermark(account_id=account_id, query_id=str(query_id))
+        if previous is not None:
+            watermark.trade_date, watermark.date_time, watermark.transaction_id = (
+                previous.trade_date,
+                previous.date_time,
+                previous.transaction_id,
+            )
+
+        if "tradeDate" in df.columns and df.tradeDate.notna().any():
+            latest = df.tradeDate.dropna().max().isoformat()
+            watermark.trade_date = max(filter(None, [watermark.trade_date, latest]))
+        if "dateTime" in df.columns and df.dateTime.notna().any():
+            latest = df.dateTime.dropna().max()
+            if watermark.date_time is None or latest > pd.Timestamp(watermark.date_time):
+                watermark.date_time = latest.isoformat()
+        if "transactionID" in df.columns:
+            ids = pd.to_numeric(df.transactionID, errors="coerce").dropna()
+            if len(ids.index):
+                watermark.transaction_id = max(int(ids.max()), watermark.transaction_id or 0)
+        return watermark
+
+    def new_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rows of df past this watermark.
+
+        Rows with a transactionID are compared on it; rows without one fall back to dateTime.
+
+        Args:
+            df: Trades as returned by CustomFlexReport.trades_by_account_id
+
+        Returns:
+            pd.DataFrame: new rows only
+        """
+        is_new = pd.Series(True, index=df.index)
+        has_id = pd.Series(False, index=df.index)
+        if self.transaction_id is not None and "transactionID" in df.columns:
+            ids = pd.to_numeric(df.transactionID, errors="coerce")
+            has_id = ids.notna()
+            is_new = is_new.where(~has_id, ids > self.transaction_id)
+        if self.date_time is not None and "dateTime" in df.columns:
+            is_new = is_new.where(has_id, (df.dateTime > pd.Timestamp(self.date_time)).fillna(False))
+        return df[is_new].copy()
+
+
+class WatermarkStore:
+    """
+    JSON file of SyncWatermarks.
+
+    Example:
+        >>> store = WatermarkStore("data/sync_watermarks.json")
+        >>> store.since("123456")  # first day to request for the query, None before the first sync
+        datetime.date(2026, 1, 30)
+        >>> store.since("123456", ["U1", "U9"])  # None: U9 was never synced with this query
+    """
+
+    def __init__(self, path: Union[str, Path] = "data/sync_watermarks.json"):
+        """
+        Initialize store.
+
+        Args:
+            path: JSON file for the watermarks (created on first write)
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[Tuple[str, str], SyncWatermark]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            # keyed by the watermarks' own fields, so files keyed by account id alone still load
+            watermarks = [SyncWatermark(**value) for value in data.values()]
+            return {(w.query_id, w.account_id): w for w in watermarks}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable sync watermarks {self.path}: {e}")
+            return {}
+
+    def _write(self, watermarks: Dict[Tuple[str, str], SyncWatermark]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({f"{query_id}:{account_id}": asdict(w) for (query_id, account_id), w in watermarks.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, query_id: str, account_id: str) -> Optional[SyncWatermark]:
+        """Watermark for an account of a query, or None if it has never been synced with that query."""
+        with self._lock:
+            return self._read().get((str(query_id), account_id))
+
+    def put(self, watermark: SyncWatermark) -> None:
+        """Save the watermark for an account of a query."""
+        with self._lock:
+            watermarks = self._read()
+            watermarks[(watermark.query_id, watermark.account_id)] = watermark
+            self._write(watermarks)
+
+    def since(self, query_id: str, account_ids: Optional[Iterable[str]] = None) -> Optional[date]:
+        """
+        First day to request for a query: the oldest tradeDate watermark of its accounts.
+
+        Args:
+            query_id: Query ID for the flex report
+            account_ids: Accounts the query reports. If any of them has no watermark, a range
+                fetch would miss its history, so None is returned (default: the accounts
+                already synced with the query)
+
+        Returns:
+            date, or None if a full sync is needed: no account of the query has a watermark
+            yet, or one of account_ids has none
+        """
+        with self._lock:
+            watermarks = {account_id: w for (query, account_id), w in self._read().items() if query == str(query_id)}
+        if account_ids is not None:
+            account_ids = list(account_ids)
+            if any(account_id not in watermarks for account_id in account_ids):
+                return None
+            watermarks = {account_id: watermarks[account_id] for account_id in account_ids}
+        trade_dates = [w.trade_date for w in watermarks.values() if w.trade_date]
+        return date.fromisoformat(min(trade_dates)) if trade_dates else None
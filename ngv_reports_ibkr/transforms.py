@@ -1,6 +1,10 @@
 import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Mapping, Optional
 
+import numpy as np
 import pandas as pd
+import pytz
 
 # IBKR timezone abbreviations mapped to IANA timezone names
 # The abbreviation tells us which timezone region, the date determines DST
@@ -17,61 +21,136 @@ IBKR_TZ_REGIONS = {
     "GMT": "UTC",
 }
 
+# UTC offsets (hours) of the IBKR timezone abbreviations
+# The abbreviation pins the offset of a timestamp, DST included (EDT is always UTC-4)
+IBKR_TZ_OFFSETS = {
+    "EST": -5,
+    "EDT": -4,
+    "CST": -6,
+    "CDT": -5,
+    "MST": -7,
+    "MDT": -6,
+    "PST": -8,
+    "PDT": -7,
+    "UTC": 0,
+    "GMT": 0,
+}
+
 # Default timezone for IBKR data
 IBKR_DEFAULT_TZ = "America/New_York"
 
 
-def parse_datetime_series(raw_series: pd.Series, target_tz: str = IBKR_DEFAULT_TZ) -> pd.Series:
+# IBKR's usual datetime layout, "2026-01-15;10:30:00" (before the timezone abbreviation).
+# Parsed with the ";" swapped for "T": pandas has a fast path for ISO 8601 layouts only.
+IBKR_DATETIME_LENGTH = 19
+IBKR_DATETIME_ISO_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_datetime_series(raw_series: pd.Series, target_tz: str = IBKR_DEFAULT_TZ, unique: bool = True) -> pd.Series:
     """
     Parse IBKR datetime strings to timezone-aware pandas datetime.
 
+    Each row is localized by its own timezone abbreviation (EST, EDT, CST, ...), which fixes its
+    UTC offset, so series mixing timezones or spanning a DST change are handled correctly. Rows
+    without a known abbreviation are localized in the region of the first known one found, or
+    America/New_York.
+
+    Flex timestamps repeat a lot (multi-leg fills, orderTime shared by many executions), so by
+    default the strings are factorized, only the distinct values are parsed, and the results
+    are mapped back to the rows with take.
+
     Args:
         raw_series: Series with IBKR datetime strings like "2026-01-15;10:30:00 EST"
         target_tz: Target timezone for output (default: America/New_York)
+        unique: Parse each distinct string once (default: True); False parses every row
 
     Returns:
         Timezone-aware datetime series in target_tz
     """
+    if not unique:
+        return _parse_datetime_values(raw_series, target_tz)
+
+    codes, uniques = pd.factorize(raw_series)
+    parsed = _parse_datetime_values(pd.Series(uniques, dtype=object), target_tz)
+    # code -1 (missing value) becomes NaT
+    values = parsed.array.take(codes, allow_fill=True)
+    return pd.Series(values, index=raw_series.index, name=raw_series.name)
+
+
+def _parse_datetime_values(raw_series: pd.Series, target_tz: str) -> pd.Series:
+    """Parse every value of raw_series, see parse_datetime_series."""
     import warnings
-    from zoneinfo import ZoneInfo
 
     raw_series = raw_series.replace("", pd.NaT)
 
-    # Extract timezone abbreviations to determine source timezone
+    # Extract timezone abbreviations, per row
     tz_pattern = r" ([A-Z]{3,4})$"
-    tz_matches = raw_series.str.extract(tz_pattern, expand=False).dropna().unique()
+    abbreviations = raw_series.str.extract(tz_pattern, expand=False)
+    tz_matches = abbreviations.dropna().unique()
+
+    # Region for rows without a known abbreviation (first known TZ found, or default)
+    fallback_tz = IBKR_DEFAULT_TZ
+    for tz in tz_matches:
+        if tz in IBKR_TZ_REGIONS:
+            fallback_tz = IBKR_TZ_REGIONS[tz]
+            break
 
     # Check for unknown timezone abbreviations
     unknown_tz = [tz for tz in tz_matches if tz not in IBKR_TZ_REGIONS]
     if unknown_tz:
-        warnings.warn(f"Unknown timezone abbreviation(s) in datetime data: {unknown_tz}. " f"Will use {IBKR_DEFAULT_TZ}. Known: {list(IBKR_TZ_REGIONS.keys())}")
+        warnings.warn(f"Unknown timezone abbreviation(s) in datetime data: {unknown_tz}. " f"Will use {fallback_tz}. Known: {list(IBKR_TZ_REGIONS.keys())}")
 
-    # Determine source timezone (use first known TZ found, or default)
-    source_tz = IBKR_DEFAULT_TZ
-    for tz in tz_matches:
-        if tz in IBKR_TZ_REGIONS:
-            source_tz = IBKR_TZ_REGIONS[tz]
-            break
+    # Parse as naive datetime: the usual layout in one fixed-format pass, ignoring the abbreviation
+    iso = raw_series.str.slice(0, IBKR_DATETIME_LENGTH).str.replace(";", "T", regex=False)
+    series = pd.to_datetime(iso, format=IBKR_DATETIME_ISO_FORMAT, errors="coerce")
 
-    # Strip timezone abbreviation suffix
-    raw_series_no_tz = raw_series.str.replace(r" [A-Z]{3,4}$", "", regex=True)
+    # Other layouts, eg without colons "2021-08-20;093000 EST": strip the abbreviation and colons
+    retry = series.isna() & raw_series.notna()
+    if retry.any():
+        raw_retry = raw_series[retry].str.replace(r" [A-Z]{3,4}$", "", regex=True).str.replace(":", "")
+        series[retry] = pd.to_datetime(raw_retry, format="%Y-%m-%d;%H%M%S", errors="coerce")
 
-    # Remove colons in time portion
-    # ie, "2021-08-20;09:30:00" -> "2021-08-20;093000"
-    raw_series_without_colons = raw_series_no_tz.str.replace(":", "")
+    # Rows with a known abbreviation: shift by its fixed offset to UTC, all in one vectorized step
+    offsets = abbreviations.map(IBKR_TZ_OFFSETS)
+    labeled = offsets.notna()
+    utc = (series - pd.to_timedelta(offsets.fillna(0), unit="h")).dt.tz_localize("UTC")
 
-    # Parse as naive datetime
-    fmt = "%Y-%m-%d;%H%M%S"
-    series = pd.to_datetime(raw_series_without_colons, format=fmt, errors="coerce")
+    # Other rows: localize in the fallback region (handles DST based on the date). Without an
+    # abbreviation, a time in the repeated fall-back hour is taken as the first (DST) one and a
+    # time in the skipped spring-forward hour is shifted to the end of the gap.
+    # pandas localizes to a pytz zone much faster than to a zoneinfo one.
+    if not labeled.all():
+        unlabeled = ~labeled
+        local = series[unlabeled].dt.tz_localize(
+            pytz.timezone(fallback_tz),
+            ambiguous=np.ones(int(unlabeled.sum()), dtype=bool),
+            nonexistent="shift_forward",
+        )
+        utc = utc.mask(unlabeled, local.dt.tz_convert("UTC"))
 
-    # Localize to source timezone (handles DST automatically based on date)
-    series = series.dt.tz_localize(source_tz)
+    return utc.dt.tz_convert(target_tz)
 
-    # Convert to target timezone if different
-    if source_tz != target_tz:
-        series = series.dt.tz_convert(target_tz)
 
-    return series
+# IBKR option descriptions: underlying, expiry, strike, right, eg "SPY 21JAN22 450 C", "ES 17MAR23 4012.5 P"
+OPTION_DESCRIPTION_PATTERN = re.compile(r"^(?P<underlying>\S+) (?P<expiry>\d{1,2}[A-Z]{3}\d{2}) (?P<strike>\d+(?:\.\d+)?) (?P<right>[CP])\b")
+OPTION_ASSET_CATEGORIES = ["OPT", "FOP"]
+
+
+def parse_option_descriptions(descriptions: pd.Series) -> pd.DataFrame:
+    """
+    Parse IBKR option descriptions in one regex pass.
+
+    Args:
+        descriptions: Series of descriptions like "SPY 21JAN22 450 C"
+
+    Returns:
+        DataFrame with underlying, expiry (datetime), strike (float) and right columns,
+        same index as descriptions; NaN/NaT where a description doesn't match
+    """
+    parts = descriptions.astype(object).str.extract(OPTION_DESCRIPTION_PATTERN)
+    parts["expiry"] = pd.to_datetime(parts["expiry"], format="%d%b%y", errors="coerce")
+    parts["strike"] = pd.to_numeric(parts["strike"], errors="coerce")
+    return parts
 
 
 def parse_date_series(raw_series: pd.Series) -> pd.Series:
@@ -81,6 +160,63 @@ def parse_date_series(raw_series: pd.Series) -> pd.Series:
     return series
 
 
+# Column conversions a TopicPipeline can name, besides plain pandas dtypes
+COLUMN_CONVERTERS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    "datetime": parse_datetime_series,
+    "date": parse_date_series,
+}
+
+
+def convert_column(series: pd.Series, kind: str) -> pd.Series:
+    """Convert a column to a COLUMN_CONVERTERS kind ("datetime", "date") or a pandas dtype."""
+    converter = COLUMN_CONVERTERS.get(kind)
+    return converter(series) if converter is not None else series.astype(kind)
+
+
+@dataclass(frozen=True)
+class TopicPipeline:
+    """
+    Declarative recipe turning a raw Flex topic frame into its section frame.
+
+    Filters are combined into one mask, and the frame is copied exactly once: the rows the mask
+    keeps are taken in one go (or the whole frame is copied, without filters). Every column
+    conversion then replaces a column of that copy in place, so the copy count doesn't grow with
+    the number of filters or columns. Columns (and filter columns) the frame doesn't have are
+    skipped.
+
+    Example:
+        >>> TopicPipeline(columns={"reportDate": "date"}, filters={"levelOfDetail": "LOT"}).apply(df)
+    """
+
+    columns: Mapping[str, str] = field(default_factory=dict)  # column -> "datetime", "date" or a dtype
+    filters: Mapping[str, object] = field(default_factory=dict)  # column -> value rows must have
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Filter and convert df, returning a new frame (df itself is not modified)."""
+        mask = None
+        for column, value in self.filters.items():
+            if column in df.columns:
+                matches = df[column] == value
+                mask = matches if mask is None else mask & matches
+        result = df.copy() if mask is None else df.take(np.flatnonzero(mask.to_numpy()))
+        for column, kind in self.columns.items():
+            if column in result.columns:
+                result[column] = convert_column(result[column], kind)
+        return result
+
+
+# Pipelines of the Flex topics CustomFlexReport returns as sections
+TOPIC_PIPELINES: Dict[str, TopicPipeline] = {
+    "Trade": TopicPipeline(
+        columns={"dateTime": "datetime", "orderTime": "datetime", "tradeDate": "date"},
+    ),
+    "OpenPosition": TopicPipeline(
+        columns={"openDateTime": "datetime", "holdingPeriodDateTime": "datetime", "reportDate": "date"},
+        filters={"levelOfDetail": "LOT"},
+    ),
+}
+
+
 class Mutations:
     @classmethod
     def columns_to_snake_case(cls, df) -> None:
@@ -104,23 +240,63 @@ class Transforms:
         """
         return df[df["fill_execution_id"].notna()].reset_index(drop=True)
 
+    @classmethod
+    def option_fields(cls, df) -> pd.DataFrame:
+        """
+        Underlying, expiry, strike and right of the OPT/FOP rows of a snake_case Flex frame.
+
+        Structured Flex columns (underlying_symbol, expiry, strike, put_call) are used where they
+        have a value; the description is parsed (see parse_option_descriptions) for the rest.
+        Non-option rows are NaN/NaT.
+        """
+        is_option = df.asset_category.isin(OPTION_ASSET_CATEGORIES)
+        fields = parse_option_descriptions(df.description[is_option]).reindex(df.index)
+
+        structured = {
+            "underlying": df["underlying_symbol"].replace("", None) if "underlying_symbol" in df.columns else None,
+            "expiry": pd.to_datetime(df["expiry"].astype(str), format="%Y-%m-%d", errors="coerce") if "expiry" in df.columns else None,
+            "strike": pd.to_numeric(df["strike"], errors="coerce") if "strike" in df.columns else None,
+            "right": df["put_call"].replace("", None) if "put_call" in df.columns else None,
+        }
+        for name, values in structured.items():
+            if values is not None:
+                fields[name] = values.where(is_option).fillna(fields[name])
+        return fields
+
     @classmethod
     def add_strike(cls, df) -> None:
-        ddf = df.query('asset_category.isin(["OPT", "FOP"])').description.str.split(" ", expand=True)
-        df["strike"] = pd.to_numeric(ddf[2])
+        df["strike"] = cls.option_fields(df)["strike"]
+
+    @classmethod
+    def add_option_fields(cls, df) -> None:
+        """Add numeric strike, datetime expiry, underlying and right columns (see option_fields)."""
+        fields = cls.option_fields(df)
+        for name in fields.columns:
+            df[name] = fields[name]
+
+    @classmethod
+    def closed_trades(cls, df) -> pd.DataFrame:
+        """Rows of a Flex trades frame that close a position (openCloseIndicator C), as a new frame."""
+        return df[df.openCloseIndicator == "C"].copy()
+
+    @classmethod
+    def apply_topic_pipeline(cls, df, topic: str) -> pd.DataFrame:
+        """Run the TOPIC_PIPELINES entry of a Flex topic (eg Trade) over df; unknown topics pass through."""
+        pipeline: Optional[TopicPipeline] = TOPIC_PIPELINES.get(topic)
+        return df if pipeline is None else pipeline.apply(df)
 
     @classmethod
     def convert_date_time(cls, df) -> None:
-        df.dateTime = parse_datetime_series(df.dateTime)
+        df.dateTime = convert_column(df.dateTime, "datetime")
 
     @classmethod
     def convert_open_date_time(cls, df) -> None:
-        df.openDateTime = parse_datetime_series(df.openDateTime)
+        df.openDateTime = convert_column(df.openDateTime, "datetime")
 
     @classmethod
     def convert_holding_period_date_time(cls, df) -> None:
-        df.holdingPeriodDateTime = parse_datetime_series(df.holdingPeriodDateTime)
+        df.holdingPeriodDateTime = convert_column(df.holdingPeriodDateTime, "datetime")
 
     @classmethod
     def convert_report_date(cls, df) -> None:
-        df.reportDate = parse_date_series(df.reportDate)
+        df.reportDate = convert_column(df.reportDate, "date")
@@ -0,0 +1,366 @@
+"""
+Streaming capture of TWS fills into the unified trades schema.
+
+The batch TWS path rebuilds everything from the session's Trade objects on every run
+(expand_all_trade_columns, expand_fills_and_logs, filter_to_executions, prepare_tws_trades).
+TwsTradeStream instead listens to ib_async's execDetailsEvent and commissionReportEvent and
+writes each fill, once, as a row of a columnar buffer laid out like prepare_tws_trades' output:
+
+- One preallocated numpy array per unified column, doubled when full. With max_rows set, the
+  buffer stops growing at that size and overwrites the oldest fills (a ring).
+- A commission report arriving after its execution updates the row in place, by execution id.
+- Every write stamps the row with a version, so snapshot(since=version) returns only the rows
+  added or changed since an earlier snapshot; a full snapshot is a copy of the arrays, with no
+  per-fill Python work.
+
+Usage:
+    stream = TwsTradeStream()
+    stream.attach(ib)
+    ...
+    unified = stream.snapshot()
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ngv_reports_ibkr.expand_contract_columns import clean_unset_value
+
+# Unified column: kind of its buffer array, in the column order of prepare_tws_trades.
+# str: object; float: float64 (NaN); int: int64; Int64: int64 and a null mask; time: UTC datetime
+UNIFIED_TWS_COLUMNS: Dict[str, str] = {
+    "ib_execution_id": "str",
+    "account_id": "str",
+    "contract_id": "int",
+    "tws_perm_id": "Int64",
+    "flex_order_id": "Int64",
+    "symbol": "str",
+    "asset_type": "str",
+    "currency": "str",
+    "exchange": "str",
+    "multiplier": "float",
+    "strike": "float",
+    "expiry": "str",
+    "right": "str",
+    "side": "str",
+    "quantity": "float",
+    "price": "float",
+    "execution_time": "time",
+    "commission": "float",
+    "commission_currency": "str",
+    "realized_pnl": "float",
+    "order_type": "str",
+    "tif": "str",
+    "limit_price": "float",
+    "aux_price": "float",
+    "total_quantity": "float",
+    "order_status": "str",
+    "filled": "float",
+    "remaining": "float",
+    "avg_fill_price": "float",
+    "trade_id": "Int64",
+    "transaction_id": "Int64",
+    "trade_date": "str",
+    "trade_money": "float",
+    "proceeds": "float",
+    "net_cash": "float",
+    "cost": "float",
+    "close_price": "float",
+    "mtm_pnl": "float",
+    "cusip": "str",
+    "isin": "str",
+    "_data_source": "str",
+}
+
+_EMPTY = {
+    "str": (object, None),
+    "float": (np.float64, np.nan),
+    "int": (np.int64, 0),
+    "Int64": (np.int64, 0),
+    "time": ("datetime64[ns]", np.datetime64("NaT")),
+}
+
+
+def _empty_array(kind: str, size: int) -> np.ndarray:
+    """Buffer array of a column kind, all empty."""
+    dtype, empty = _EMPTY[kind]
+    return np.full(size, empty, dtype=dtype)
+
+
+def _grown(array: np.ndarray, empty: np.ndarray) -> np.ndarray:
+    """Copy array into the start of a larger empty one."""
+    empty[: len(array)] = array
+    return empty
+
+
+class FillRingBuffer:
+    """
+    Rows of the unified schema in preallocated numpy arrays, in arrival order.
+
+    Rows are addressed by sequence number (0 for the first row ever appended). The arrays start
+    at `capacity` rows and double when full; with `max_rows`, they stop at that size and the
+    oldest rows are overwritten.
+    """
+
+    def __init__(self, capacity: int = 1024, max_rows: Optional[int] = None):
+        """
+        Initialize buffer.
+
+        Args:
+            capacity: Initial number of rows
+            max_rows: Most rows kept, the oldest are overwritten after that (default: unbounded)
+        """
+        if max_rows is not None:
+            capacity = min(capacity, max_rows)
+        self.max_rows = max_rows
+        self.capacity = max(capacity, 1)
+        self.size = 0  # rows ever appended
+        self.version = 0  # writes (appends and updates) so far
+        self._arrays = {name: _empty_array(kind, self.capacity) for name, kind in UNIFIED_TWS_COLUMNS.items()}
+        self._masks = {name: np.ones(self.capacity, dtype=bool) for name, kind in UNIFIED_TWS_COLUMNS.items() if kind == "Int64"}
+        self._versions = np.zeros(self.capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Number of rows kept."""
+        return min(self.size, self.capacity)
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest row kept."""
+        return self.size - len(self)
+
+    def _grow(self) -> None:
+        capacity = self.capacity * 2 if self.max_rows is None else min(self.capacity * 2, self.max_rows)
+        for name, kind in UNIFIED_TWS_COLUMNS.items():
+            self._arrays[name] = _grown(self._arrays[name], _empty_array(kind, capacity))
+        for name, mask in self._masks.items():
+            self._masks[name] = _grown(mask, np.ones(capacity, dtype=bool))
+        self._versions = _grown(self._versions, np.zeros(capacity, dtype=np.int64))
+        self.capacity = capacity
+
+    def append(self, values: Dict[str, object]) -> Tuple[int, Optional[Dict[str, object]]]:
+        """
+        Add a row; columns not in values are empty.
+
+        Returns:
+            (sequence number of the row, values of the row it overwrote, None if none)
+        """
+        if self.size == self.capacity and (self.max_rows is None or self.capacity < self.max_rows):
+            self._grow()
+        seq = self.size
+        evicted = self.row(seq - self.capacity) if seq >= self.capacity else None
+        slot = seq % self.capacity
+        for name, kind in UNIFIED_TWS_COLUMNS.items():
+            self._arrays[name][slot] = _EMPTY[kind][1]
+            if kind == "Int64":
+                self._masks[name][slot] = True
+        self.size += 1
+        self.update(seq, values)
+        return seq, evicted
+
+    def update(self, seq: int, values: Dict[str, object]) -> None:
+        """Set columns of a kept row."""
+        if not self.first_seq <= seq < self.size:
+            raise IndexError(f"Row {seq} is not in the buffer (rows {self.first_seq}..{self.size - 1})")
+        slot = seq % self.capacity
+        for name, value in values.items():
+            kind = UNIFIED_TWS_COLUMNS[name]
+            if kind == "Int64":
+                self._masks[name][slot] = value is None
+                value = 0 if value is None else value
+            elif kind == "time":
+                value = np.datetime64("NaT") if value is None else _utc_datetime64(value)
+            elif kind == "float" and value is None:
+                value = np.nan
+            self._arrays[name][slot] = value
+        self.version += 1
+        self._versions[slot] = self.version
+
+    def row(self, seq: int) -> Dict[str, object]:
+        """Values of a kept row, as stored."""
+        slot = seq % self.capacity
+        return {name: array[slot] for name, array in self._arrays.items()}
+
+    def snapshot(self, since: int = 0) -> pd.DataFrame:
+        """
+        Kept rows as a unified trades DataFrame, in arrival order.
+
+        Args:
+            since: Only rows written (added or changed) after this version (see `version`)
+
+        Returns:
+            pd.DataFrame: copy of the rows, with prepare_tws_trades' columns and values. The dtypes
+            are fixed by column kind (UNIFIED_TWS_COLUMNS) rather than inferred from the input:
+            object for strings, float64 with NaN for numbers (also the Flex-only ones, which
+            prepare_tws_trades leaves as object None), nullable Int64 and datetime64[ns, UTC]
+        """
+        slots = np.arange(self.first_seq, self.size) % self.capacity
+        if since:
+            slots = slots[self._versions[slots] > since]
+        columns = {}
+        for name, kind in UNIFIED_TWS_COLUMNS.items():
+            values = self._arrays[name][slots]
+            if kind == "Int64":
+                columns[name] = pd.arrays.IntegerArray(values, self._masks[name][slots])
+            elif kind == "time":
+                columns[name] = pd.DatetimeIndex(values).tz_localize("UTC")
+            elif kind == "str":
+                columns[name] = pd.Series(values, dtype=object)
+            else:
+                columns[name] = values
+        return pd.DataFrame(columns, index=pd.RangeIndex(len(slots)))
+
+
+def _utc_datetime64(value) -> np.datetime64:
+    """Datetime as naive UTC datetime64[ns] (naive datetimes are taken to be UTC already)."""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp.to_datetime64().astype("datetime64[ns]")
+
+
+def _float(value) -> float:
+    """Value as float, NaN for None, "", IBKR's UNSET values and anything not numeric."""
+    value = clean_unset_value(value) if isinstance(value, (int, float)) else value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def unified_fill_values(trade, fill, source_tag: str = "TWS") -> Dict[str, object]:
+    """
+    Unified columns of one fill of an ib_async Trade, like prepare_tws_trades maps them.
+
+    The commission columns are left empty until the fill's commission report is in.
+
+    Args:
+        trade: ib_async Trade the fill belongs to
+        fill: ib_async Fill
+        source_tag: Tag to identify data source (default: "TWS")
+
+    Returns:
+        Dict[str, object]: value per unified column
+    """
+    execution, contract, order, status = fill.execution, fill.contract, trade.order, trade.orderStatus
+    values = {
+        "ib_execution_id": execution.execId,
+        "account_id": order.account or execution.acctNumber,
+        "contract_id": contract.conId,
+        "tws_perm_id": order.permId,
+        "symbol": contract.symbol,
+        "asset_type": contract.secType,
+        "currency": contract.currency,
+        "exchange": execution.exchange,
+        "multiplier": _float(contract.multiplier),
+        "strike": _float(contract.strike),
+        "expiry": contract.lastTradeDateOrContractMonth,
+        "right": None if contract.right == "?" else contract.right,
+        "side": order.action,
+        "quantity": _float(execution.shares),
+        "price": _float(execution.price),
+        "execution_time": execution.time,
+        "order_type": order.orderType,
+        "tif": order.tif,
+        "limit_price": _float(order.lmtPrice),
+        "aux_price": _float(order.auxPrice),
+        "total_quantity": _float(order.totalQuantity),
+        "order_status": status.status,
+        "filled": _float(status.filled),
+        "remaining": _float(status.remaining),
+        "avg_fill_price": _float(status.avgFillPrice),
+        "_data_source": source_tag,
+    }
+    report = fill.commissionReport
+    if report is not None and report.execId == execution.execId:
+        values.update(unified_commission_values(report))
+    return values
+
+
+def unified_commission_values(report) -> Dict[str, object]:
+    """Unified commission columns of an ib_async CommissionReport (commission negative, like prepare_tws_trades)."""
+    return {
+        "commission": -abs(_float(report.commission)),
+        "commission_currency": report.currency,
+        "realized_pnl": _float(report.realizedPNL),
+    }
+
+
+class TwsTradeStream:
+    """
+    Live unified trades frame of an ib_async session, updated fill by fill.
+
+    Fills are keyed by execution id: a fill seen again (eg, after a reconnect) updates its row.
+    Handlers may be called from the event loop thread while another thread takes snapshots.
+    """
+
+    def __init__(self, capacity: int = 1024, max_rows: Optional[int] = None, source_tag: str = "TWS"):
+        """
+        Initialize stream.
+
+        Args:
+            capacity: Initial number of fills the buffer holds (it grows as needed)
+            max_rows: Most fills kept, the oldest are dropped after that (default: unbounded)
+            source_tag: Tag to identify data source (default: "TWS")
+        """
+        self.buffer = FillRingBuffer(capacity=capacity, max_rows=max_rows)
+        self.source_tag = source_tag
+        self._seq_by_exec_id: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, ib) -> None:
+        """Subscribe to the execDetailsEvent and commissionReportEvent of an ib_async IB."""
+        ib.execDetailsEvent += self.on_exec_details
+        ib.commissionReportEvent += self.on_commission_report
+
+    def detach(self, ib) -> None:
+        """Unsubscribe from an ib_async IB."""
+        ib.execDetailsEvent -= self.on_exec_details
+        ib.commissionReportEvent -= self.on_commission_report
+
+    def _write(self, exec_id: str, values: Dict[str, object]) -> None:
+        seq = self._seq_by_exec_id.get(exec_id)
+        if seq is not None and seq >= self.buffer.first_seq:
+            self.buffer.update(seq, values)
+            return
+        seq, evicted = self.buffer.append(values)
+        if evicted is not None:
+            self._seq_by_exec_id.pop(evicted["ib_execution_id"], None)
+        self._seq_by_exec_id[exec_id] = seq
+
+    def on_exec_details(self, trade, fill) -> None:
+        """execDetailsEvent handler: add (or refresh) the fill's row."""
+        with self._lock:
+            self._write(fill.execution.execId, unified_fill_values(trade, fill, self.source_tag))
+
+    def on_commission_report(self, trade, fill, report) -> None:
+        """commissionReportEvent handler: fill in the commission columns of the fill's row."""
+        with self._lock:
+            if report.execId in self._seq_by_exec_id and self._seq_by_exec_id[report.execId] >= self.buffer.first_seq:
+                self._write(report.execId, unified_commission_values(report))
+            else:
+                # commission for a fill not seen yet (eg, subscribed mid-session)
+                values = unified_fill_values(trade, fill, self.source_tag)
+                values.update(unified_commission_values(report))
+                self._write(report.execId, values)
+
+    @property
+    def version(self) -> int:
+        """Version of the latest write, to pass to snapshot(since=...) later."""
+        with self._lock:
+            return self.buffer.version
+
+    def snapshot(self, since: int = 0) -> pd.DataFrame:
+        """
+        Fills as a unified trades DataFrame (see prepare_tws_trades), in arrival order.
+
+        Args:
+            since: Only fills added or changed after this version (see `version`)
+
+        Returns:
+            pd.DataFrame: unified trades
+        """
+        with self._lock:
+            return self.buffer.snapshot(since)
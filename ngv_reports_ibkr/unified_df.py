@@ -23,6 +23,8 @@ def prepare_tws_trades(tws_df: pd.DataFrame, source_tag: str = "TWS") -> pd.Data
     - expand_all_trade_columns(tws_df)
     - expand_fills_and_logs(tws_df, fills_col="fills", log_col="log")
     - Transforms.filter_to_executions(tws_df)
+    (or expand_fills_and_logs(tws_df, fills_only=True), which gives the same rows without
+    expanding the logs)
 
     Args:
         tws_df: TWS trades DataFrame with expanded contract/order/fills columns
@@ -94,9 +96,10 @@ def prepare_tws_trades(tws_df: pd.DataFrame, source_tag: str = "TWS") -> pd.Data
             # TWS-specific fields
             "order_type": tws_df["orderType"],
             "tif": tws_df["tif"],
-            "limit_price": tws_df["lmtPrice"],
-            "aux_price": tws_df["auxPrice"],
-            "total_quantity": tws_df["totalQuantity"],
+            # expand_order_column gives nullable Float64; keep float64 with NaN like the other price columns
+            "limit_price": tws_df["lmtPrice"].astype("float64"),
+            "aux_price": tws_df["auxPrice"].astype("float64"),
+            "total_quantity": tws_df["totalQuantity"].astype("float64"),
             "order_status": tws_df["status"],
             "filled": tws_df["filled"],
             "remaining": tws_df["remaining"],
@@ -46,6 +46,34 @@ def create_get_statement_error(error_code: str = "1019", error_message: str = "S
 </FlexStatementResponse>"""
 
 
+# Flex statement of two accounts: U1111111 with an opening and a closing trade and an open
+# position, U2222222 with one trade (no tradePrice) and no open positions
+TWO_ACCOUNT_STATEMENT = """<FlexQueryResponse queryName="TestReport" type="AF">
+  <FlexStatements count="2">
+    <FlexStatement accountId="U1111111" fromDate="2026-01-01" toDate="2026-01-31">
+      <AccountInformation accountId="U1111111" currency="USD"/>
+      <Trades>
+        <Trade accountId="U1111111" transactionID="1" quantity="10" tradePrice="1.5" symbol="AAPL" openCloseIndicator="O"
+          dateTime="2026-01-05;10:00:00 EST" orderTime="2026-01-05;09:59:00 EST" tradeDate="2026-01-05"/>
+        <Trade accountId="U1111111" transactionID="2" quantity="-10" tradePrice="2" symbol="AAPL" openCloseIndicator="C"
+          dateTime="2026-01-06;10:00:00 EST" orderTime="2026-01-06;09:59:00 EST" tradeDate="2026-01-06"/>
+      </Trades>
+      <OpenPositions>
+        <OpenPosition accountId="U1111111" symbol="MSFT" levelOfDetail="LOT" position="5" openDateTime="2026-01-05;10:00:00 EST"
+          holdingPeriodDateTime="2026-01-05;10:00:00 EST" reportDate="2026-01-31"/>
+      </OpenPositions>
+    </FlexStatement>
+    <FlexStatement accountId="U2222222" fromDate="2026-01-01" toDate="2026-01-31">
+      <AccountInformation accountId="U2222222" currency="EUR"/>
+      <Trades>
+        <Trade accountId="U2222222" transactionID="3" quantity="1" tradePrice="" symbol="SAP" openCloseIndicator="O"
+          dateTime="2026-01-07;10:00:00 EST" orderTime="2026-01-07;09:59:00 EST" tradeDate="2026-01-07"/>
+      </Trades>
+      <OpenPositions/>
+    </FlexStatement>
+  </FlexStatements>
+</FlexQueryResponse>"""
+
 # Common error responses for testing
 SEND_REQUEST_SUCCESS = create_send_request_success()
 SEND_REQUEST_INVALID_TOKEN = create_send_request_error("1015", "Invalid token")
@@ -0,0 +1,167 @@
+"""Tests for adapters module."""
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from ngv_reports_ibkr.adapters import ReportOutputAdapterCSV, ReportOutputAdapterPandas, ReportOutputAdapterParquet
+from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+from tests.fixtures import TWO_ACCOUNT_STATEMENT as STATEMENT
+
+
+class TestByAccount:
+    """Tests for the by_account iterators of the output adapters."""
+
+    def test_pandas_by_account_matches_put_all(self):
+        """Test that by_account yields the same sections as put_all, for every account."""
+        adapter = ReportOutputAdapterPandas(report=CustomFlexReport.from_xml(STATEMENT))
+
+        accounts = list(adapter.by_account())
+
+        assert [account_id for account_id, _ in accounts] == ["U1111111", "U2222222"]
+        for account_id, sections in accounts:
+            expected = adapter.put_all(account_id)
+            assert sections.keys() == expected.keys()
+            for name, df in sections.items():
+                if expected[name] is None:
+                    assert df is None
+                else:
+                    pd.testing.assert_frame_equal(df, expected[name])
+
+    def test_csv_process_accounts(self, tmp_path):
+        """Test that the CSV adapter writes the sections each account has."""
+        adapter = ReportOutputAdapterCSV(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT))
+
+        adapter.process_accounts()
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "U1111111_close_trades.csv",
+            "U1111111_open_positions.csv",
+            "U1111111_trades.csv",
+            "U2222222_close_trades.csv",
+            "U2222222_trades.csv",
+        ]
+        assert pd.read_csv(tmp_path / "U1111111_close_trades.csv", index_col=0).transactionID.tolist() == [2]
+
+
+class TestParquetAdapter:
+    """Tests for ReportOutputAdapterParquet."""
+
+    def test_hive_partitions(self, tmp_path):
+        """Test that sections are written under section/account/date partitions."""
+        adapter = ReportOutputAdapterParquet(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT))
+
+        adapter.process_accounts()
+
+        files = sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*.parquet"))
+        assert files == [
+            "section=close_trades/account=U1111111/trade_date=2026-01-06/part-0.parquet",
+            "section=open_positions/account=U1111111/report_date=2026-01-31/part-0.parquet",
+            "section=trades/account=U1111111/trade_date=2026-01-05/part-0.parquet",
+            "section=trades/account=U1111111/trade_date=2026-01-06/part-0.parquet",
+            "section=trades/account=U2222222/trade_date=2026-01-07/part-0.parquet",
+        ]
+
+    def test_round_trip_keeps_types(self, tmp_path):
+        """Test that trades read back with tz-aware timestamps and schema types, "" read as null."""
+        report = CustomFlexReport.from_xml(STATEMENT)
+        adapter = ReportOutputAdapterParquet(data_folder=str(tmp_path), report=report)
+        adapter.process_accounts()
+
+        df = adapter.read_section("trades").sort_values("transactionID", ignore_index=True)
+
+        expected = pd.concat([report.trades_by_account_id("U1111111"), report.trades_by_account_id("U2222222")])
+        pd.testing.assert_series_equal(df.dateTime, expected.dateTime.reset_index(drop=True))
+        assert str(df.dateTime.dt.tz) == "America/New_York"
+        assert df.tradePrice.tolist()[:2] == [1.5, 2.0]
+        assert pd.isna(df.tradePrice.iloc[2])
+
+    def test_pruning(self, tmp_path):
+        """Test reading one account and a date range."""
+        adapter = ReportOutputAdapterParquet(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT))
+        adapter.process_accounts()
+
+        assert adapter.read_section("trades", "U1111111").transactionID.tolist() == [1, 2]
+        assert sorted(adapter.read_section("trades", filters=[("trade_date", ">=", "2026-01-06")]).transactionID) == [2, 3]
+        assert adapter.read_section("orders") is None
+
+    def test_rewrite_replaces_partitions(self, tmp_path):
+        """Test that writing the same report again doesn't duplicate rows."""
+        adapter = ReportOutputAdapterParquet(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT))
+
+        adapter.process_accounts()
+        adapter.put_all("U1111111")
+
+        assert sorted(adapter.read_section("trades").transactionID) == [1, 2, 3]
+
+    def test_compression_and_row_groups(self, tmp_path):
+        """Test that compression and row group size are applied."""
+        report = CustomFlexReport.from_xml(STATEMENT.replace('tradeDate="2026-01-06"', 'tradeDate="2026-01-05"'))
+        adapter = ReportOutputAdapterParquet(data_folder=str(tmp_path), report=report, compression="snappy", row_group_size=1)
+        adapter.put_all("U1111111")
+
+        metadata = pq.ParquetFile(tmp_path / "section=trades/account=U1111111/trade_date=2026-01-05/part-0.parquet").metadata
+        assert metadata.num_rows == 2
+        assert metadata.num_row_groups == 2
+        assert metadata.row_group(0).column(0).compression == "SNAPPY"
+
+
+class TestIncrementalWrites:
+    """Tests for the incremental mode of the file output adapters."""
+
+    NEXT_DAY = STATEMENT.replace(
+        "</Trades>\n      <OpenPositions>",
+        '<Trade accountId="U1111111" transactionID="4" quantity="5" tradePrice="3" symbol="MSFT" openCloseIndicator="O"\n'
+        '          dateTime="2026-01-07;10:00:00 EST" orderTime="2026-01-07;09:59:00 EST" tradeDate="2026-01-07"/>\n'
+        "      </Trades>\n      <OpenPositions>",
+        1,
+    )
+
+    def test_csv_appends_new_rows_only(self, tmp_path):
+        """Test that only trades not in the file are appended."""
+        ReportOutputAdapterCSV(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT), incremental=True).process_accounts()
+        adapter = ReportOutputAdapterCSV(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(self.NEXT_DAY), incremental=True)
+
+        adapter.process_accounts()
+
+        assert pd.read_csv(tmp_path / "U1111111_trades.csv", index_col=0).transactionID.tolist() == [1, 2, 4]
+        assert pd.read_csv(tmp_path / "U1111111_close_trades.csv", index_col=0).transactionID.tolist() == [2]
+        assert pd.read_csv(tmp_path / "U2222222_trades.csv", index_col=0).transactionID.tolist() == [3]
+
+    def test_csv_reads_only_key_column(self, tmp_path, mocker):
+        """Test that the existing file is only read for its key column."""
+        ReportOutputAdapterCSV(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT)).process_accounts()
+        adapter = ReportOutputAdapterCSV(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(self.NEXT_DAY), incremental=True)
+        read_csv = mocker.spy(pd, "read_csv")
+
+        adapter.put_trades("U1111111")
+
+        assert read_csv.call_args_list[0].kwargs["usecols"] == ["transactionID"]
+
+    def test_parquet_writes_new_rows_only(self, tmp_path):
+        """Test that incremental Parquet runs add files with only the new rows."""
+        ReportOutputAdapterParquet(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT), incremental=True).process_accounts()
+        adapter = ReportOutputAdapterParquet(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(self.NEXT_DAY), incremental=True)
+
+        adapter.process_accounts()
+        adapter.process_accounts()
+
+        assert sorted(adapter.read_section("trades", "U1111111").transactionID) == [1, 2, 4]
+        assert len(list((tmp_path / "section=trades/account=U1111111").rglob("*.parquet"))) == 3
+        assert len(adapter.read_section("open_positions").index) == 1
+
+    def test_parquet_compact(self, tmp_path):
+        """Test that compaction merges the files of a partition and keeps every row."""
+        adapter = ReportOutputAdapterParquet(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(STATEMENT), incremental=True)
+        adapter.process_accounts()
+        day = "section=trades/account=U1111111/trade_date=2026-01-07"
+        for transaction_id in (4, 5):
+            xml = self.NEXT_DAY.replace('transactionID="4"', f'transactionID="{transaction_id}"')
+            ReportOutputAdapterParquet(data_folder=str(tmp_path), report=CustomFlexReport.from_xml(xml), incremental=True).put_all("U1111111")
+        assert len(list((tmp_path / day).glob("*.parquet"))) == 2
+
+        assert adapter.compact(section="trades") == 1
+
+        assert len(list((tmp_path / day).glob("*.parquet"))) == 1
+        df = adapter.read_section("trades", "U1111111")
+        assert sorted(df.transactionID) == [1, 2, 4, 5]
+        assert str(df.dateTime.dt.tz) == "America/New_York"
@@ -0,0 +1,79 @@
+"""Tests for arrow_topics module."""
+
+import pandas as pd
+import pyarrow as pa
+
+from ngv_reports_ibkr.arrow_topics import build_arrow_table, topic_arrow_types
+from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+from tests.fixtures import TWO_ACCOUNT_STATEMENT as STATEMENT
+
+NAN = float("nan")
+
+
+class TestTopicArrowTypes:
+    """Tests for topic_arrow_types."""
+
+    def test_types_from_schema(self):
+        """Test that numeric schema columns map to Arrow types."""
+        types = topic_arrow_types("Trade")
+
+        assert types["quantity"] == pa.float64()
+        assert types["fifoPnlRealized"] == pa.float64()
+        assert types["transactionID"] == pa.int64()
+        assert "symbol" not in types
+        assert "dateTime" not in types
+
+    def test_unknown_topic(self):
+        """Test that topics without a schema are all strings."""
+        assert topic_arrow_types("OpenPosition") == {}
+
+
+class TestBuildArrowTable:
+    """Tests for build_arrow_table."""
+
+    def test_nulls(self):
+        """Test that empty strings and missing attributes become nulls."""
+        table = build_arrow_table({"quantity": ["1.5", "", NAN], "symbol": ["AAPL", "", NAN]}, {"quantity": pa.float64()})
+
+        assert table.column("quantity").to_pylist() == [1.5, None, None]
+        assert table.column("symbol").to_pylist() == ["AAPL", None, None]
+
+    def test_fallback_types(self):
+        """Test that columns not matching their schema type fall back instead of failing."""
+        table = build_arrow_table(
+            {"tradeID": ["1", "1.5"], "conid": ["x", "1"]},
+            {"tradeID": pa.int64(), "conid": pa.int64()},
+        )
+
+        assert table.schema.field("tradeID").type == pa.float64()
+        assert table.schema.field("conid").type == pa.string()
+
+
+class TestReportArrow:
+    """Tests for CustomFlexReport.arrow_table and df_arrow."""
+
+    def test_trade_table(self):
+        """Test that a report's trades are typed from the schema."""
+        report = CustomFlexReport.from_xml(STATEMENT)
+
+        table = report.arrow_table("Trade")
+
+        assert table.num_rows == 3
+        assert table.schema.field("tradePrice").type == pa.float64()
+        assert table.column("tradePrice").to_pylist() == [1.5, 2.0, None]
+        assert table.column("transactionID").to_pylist() == [1, 2, 3]
+        assert report.arrow_table("Trade") is table
+        assert report.arrow_table("Order") is None
+
+    def test_df_arrow(self, tmp_path):
+        """Test that df_arrow returns Arrow-backed columns, for streamed reports too."""
+        path = tmp_path / "report.xml"
+        path.write_text(STATEMENT)
+        report = CustomFlexReport()
+        report.load_streaming(str(path), topics=["Trade"])
+
+        df = report.df_arrow("Trade")
+
+        assert isinstance(df.quantity.dtype, pd.ArrowDtype)
+        assert df.quantity.sum() == 1
+        assert df.symbol.tolist() == ["AAPL", "AAPL", "SAP"]
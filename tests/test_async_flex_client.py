@@ -0,0 +1,224 @@
+"""Tests for async_flex_client module."""
+
+import asyncio
+import threading
+from datetime import date
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from ngv_reports_ibkr.async_flex_client import (
+    AsyncFlexClient,
+    AsyncHTTPFlexClient,
+    FlexReportRequest,
+)
+from ngv_reports_ibkr.flex_client import (
+    DateRange,
+    FlexRequestError,
+    FlexTokenError,
+    FlexTokenExpiredError,
+)
+from tests.fixtures import (
+    create_get_statement_error,
+    create_get_statement_success,
+    create_send_request_error,
+    create_send_request_success,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    """Skip real waits for statement generation and retry backoff."""
+    with patch("ngv_reports_ibkr.async_flex_client.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+        yield mock_sleep
+
+
+@pytest.fixture
+def mock_http_client():
+    """Create mock async HTTP client."""
+    client = Mock()
+    client.send_request = AsyncMock()
+    client.get_statement = AsyncMock()
+    return client
+
+
+@pytest.fixture
+def flex_client(mock_http_client):
+    """Create AsyncFlexClient with mocked HTTP."""
+    return AsyncFlexClient(http_client=mock_http_client, max_retries=3, base_retry_delay=0.01, statement_poll_delay=0.01)
+
+
+class TestAsyncHTTPFlexClient:
+    """Tests for AsyncHTTPFlexClient."""
+
+    def test_delegates_to_sync_client(self):
+        """Test that calls are forwarded to the wrapped HTTPFlexClient."""
+        sync_client = Mock()
+        sync_client.send_request.return_value = create_send_request_success("REF1")
+        sync_client.get_statement.return_value = create_get_statement_success()
+
+        client = AsyncHTTPFlexClient(http_client=sync_client)
+        date_range = DateRange(from_date=date(2026, 1, 1), to_date=date(2026, 1, 15))
+
+        sent = asyncio.run(client.send_request(token="t", query_id="q", date_range=date_range))
+        statement = asyncio.run(client.get_statement(token="t", reference_code="REF1"))
+
+        assert "REF1" in sent
+        assert "<FlexQueryResponse" in statement
+        assert sync_client.send_request.call_args[1]["date_range"] == date_range
+        assert sync_client.get_statement.call_args[1]["reference_code"] == "REF1"
+
+    def test_one_client_per_thread(self):
+        """Test that concurrent calls from different executor threads don't share a client (or its session)."""
+        clients = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        def send_request(**kwargs):
+            barrier.wait()  # both calls in flight at once, so on two threads
+            return create_send_request_success("REF1")
+
+        def factory():
+            client = Mock()
+            client.send_request.side_effect = send_request
+            clients.append(client)
+            return client
+
+        client = AsyncHTTPFlexClient(http_client_factory=factory)
+
+        async def _send_both():
+            return await asyncio.gather(client.send_request(token="t", query_id="a"), client.send_request(token="t", query_id="b"))
+
+        asyncio.run(_send_both())
+
+        assert len(clients) == 2
+        assert [c.send_request.call_count for c in clients] == [1, 1]
+
+
+class TestAsyncFlexClient:
+    """Tests for AsyncFlexClient high-level operations."""
+
+    def test_invalid_max_concurrency(self, mock_http_client):
+        """Test that a concurrency cap below 1 is rejected."""
+        with pytest.raises(ValueError, match="max_concurrency"):
+            AsyncFlexClient(http_client=mock_http_client, max_concurrency=0)
+
+    def test_fetch_flex_report_full_workflow(self, flex_client, mock_http_client):
+        """Test complete fetch workflow."""
+        mock_http_client.send_request.return_value = create_send_request_success("REF_WORKFLOW")
+        mock_http_client.get_statement.return_value = create_get_statement_success()
+
+        xml_data = asyncio.run(flex_client.fetch_flex_report(token="token123", query_id="654321"))
+
+        assert "<FlexQueryResponse" in xml_data
+        assert mock_http_client.get_statement.call_args[1]["reference_code"] == "REF_WORKFLOW"
+
+    def test_send_flex_request_invalid_token(self, flex_client, mock_http_client):
+        """Test invalid token error (no retry)."""
+        mock_http_client.send_request.return_value = create_send_request_error("1015", "Invalid token")
+
+        with pytest.raises(FlexTokenError, match="1015"):
+            asyncio.run(flex_client.send_flex_request(token="bad_token", query_id="654321"))
+
+        assert mock_http_client.send_request.call_count == 1
+
+    def test_send_flex_request_expired_token(self, flex_client, mock_http_client):
+        """Test expired token error (no retry)."""
+        mock_http_client.send_request.return_value = create_send_request_error("1012", "Token expired")
+
+        with pytest.raises(FlexTokenExpiredError, match="1012"):
+            asyncio.run(flex_client.send_flex_request(token="expired_token", query_id="654321"))
+
+        assert mock_http_client.send_request.call_count == 1
+
+    def test_send_flex_request_max_retries_exceeded(self, flex_client, mock_http_client, no_sleep):
+        """Test failure after max retries, sleeping between attempts without blocking."""
+        mock_http_client.send_request.return_value = create_send_request_error("1018", "Too many requests")
+
+        with pytest.raises(FlexRequestError, match="Failed after 3 attempts"):
+            asyncio.run(flex_client.send_flex_request(token="token123", query_id="654321"))
+
+        assert mock_http_client.send_request.call_count == 3
+        assert no_sleep.await_count == 2
+
+    def test_get_flex_statement_retry_in_progress(self, flex_client, mock_http_client):
+        """Test retry when statement generation is in progress."""
+        mock_http_client.get_statement.side_effect = [
+            create_get_statement_error("1019", "Statement generation in progress"),
+            create_get_statement_success(),
+        ]
+
+        xml_data = asyncio.run(flex_client.get_flex_statement(token="token123", reference_code="REF123"))
+
+        assert "<FlexQueryResponse" in xml_data
+        assert mock_http_client.get_statement.call_count == 2
+
+    def test_poll_shares_sync_decisions(self, mock_http_client, no_sleep):
+        """Test that polling follows the same schedule, backoff and statistics as FlexClient."""
+        mock_http_client.get_statement.side_effect = [
+            create_get_statement_error("1019", "Statement generation in progress"),
+            create_get_statement_error("1009", "Server busy"),
+            create_get_statement_success(),
+        ]
+        client = AsyncFlexClient(http_client=mock_http_client, max_retries=2, base_retry_delay=0.01, statement_poll_delay=8.0)
+
+        with patch.object(client, "_calculate_retry_delay", return_value=5.0):
+            xml_data = asyncio.run(client.poll_flex_statement("token123", "654321", "REF1"))
+
+        assert "<FlexQueryResponse" in xml_data
+        assert [c.args[0] for c in no_sleep.await_args_list] == [7.2, 2.0, 5.0]
+        assert client.last_poll_stats.poll_count == 3
+        assert client.last_poll_stats.generation_time is not None
+
+    def test_fetch_flex_reports_preserves_order_and_isolates_errors(self, flex_client, mock_http_client):
+        """Test that one failing token does not fail the batch."""
+
+        async def send_request(token, query_id, date_range=None):
+            if token == "bad_token":
+                return create_send_request_error("1015", "Invalid token")
+            return create_send_request_success(f"REF_{query_id}")
+
+        async def get_statement(token, reference_code):
+            return create_get_statement_success(account_id=reference_code)
+
+        mock_http_client.send_request.side_effect = send_request
+        mock_http_client.get_statement.side_effect = get_statement
+
+        requests = [
+            FlexReportRequest("token_a", "1"),
+            FlexReportRequest("bad_token", "2"),
+            FlexReportRequest("token_c", "3"),
+        ]
+        results = asyncio.run(flex_client.fetch_flex_reports(requests))
+
+        assert len(results) == 3
+        assert "REF_1" in results[0]
+        assert isinstance(results[1], FlexTokenError)
+        assert "REF_3" in results[2]
+
+    def test_fetch_flex_reports_respects_concurrency_cap(self, mock_http_client):
+        """Test that no more than max_concurrency reports are in flight."""
+        in_flight = 0
+        peak = 0
+
+        async def send_request(token, query_id, date_range=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # yield to the loop so other fetches get a chance to start
+            await asyncio.get_running_loop().run_in_executor(None, lambda: None)
+            return create_send_request_success(f"REF_{query_id}")
+
+        async def get_statement(token, reference_code):
+            nonlocal in_flight
+            in_flight -= 1
+            return create_get_statement_success()
+
+        mock_http_client.send_request.side_effect = send_request
+        mock_http_client.get_statement.side_effect = get_statement
+
+        client = AsyncFlexClient(http_client=mock_http_client, max_concurrency=2)
+        requests = [FlexReportRequest(f"token_{i}", str(i)) for i in range(6)]
+        results = asyncio.run(client.fetch_flex_reports(requests))
+
+        assert len(results) == 6
+        assert peak == 2
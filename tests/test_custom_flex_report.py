@@ -0,0 +1,268 @@
+"""Tests for custom_flex_report module."""
+
+import xml.etree.ElementTree as ET
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from ib_async import util
+from ib_async.flexreport import FlexReport
+
+from ngv_reports_ibkr.custom_flex_report import CustomFlexReport, _TopicBuffer
+from tests.fixtures import TWO_ACCOUNT_STATEMENT as STATEMENT
+
+
+@pytest.fixture
+def report():
+    """Create a two-account report."""
+    return CustomFlexReport.from_xml(STATEMENT)
+
+
+class TestTopicIndex:
+    """Tests for the topic index of CustomFlexReport."""
+
+    @pytest.mark.parametrize("topic", ["Trade", "OpenPosition", "AccountInformation", "FlexStatement"])
+    @pytest.mark.parametrize("parse_numbers", [True, False])
+    def test_df_matches_flex_report(self, report, topic, parse_numbers):
+        """Test that frames are the same as FlexReport builds from the tree."""
+        expected = util.df(FlexReport.extract(report, topic, parse_numbers))
+
+        pd.testing.assert_frame_equal(report.df(topic, parse_numbers), expected)
+
+    def test_is_flex_report(self, report):
+        """Test that the lazily created class still subclasses FlexReport and is the module's attribute."""
+        from ngv_reports_ibkr import custom_flex_report
+
+        assert isinstance(report, FlexReport)
+        assert custom_flex_report.CustomFlexReport is CustomFlexReport
+        assert CustomFlexReport.__qualname__ == "CustomFlexReport"
+
+    def test_topics_and_missing_topic(self, report):
+        """Test that topics match FlexReport and unknown topics give None."""
+        assert report.topics() == FlexReport.topics(report)
+        assert report.df("Order") is None
+        assert report.extract("Order") == []
+
+    def test_tree_walked_once(self, report):
+        """Test that accessors for every account reuse the index and memoized frames."""
+        with patch.object(_TopicBuffer, "df", autospec=True, side_effect=_TopicBuffer.df) as topic_df:
+            for account_id in report.account_ids():
+                report.trades_by_account_id(account_id)
+                report.open_positions_by_account_id(account_id)
+
+        # AccountInformation, Trade, OpenPosition
+        assert topic_df.call_count == 3
+        assert report._index_root is report.root
+
+    def test_memoized_frame_not_mutated_by_callers(self, report):
+        """Test that changing a returned frame doesn't change what later callers get."""
+        df = report.df("Trade")
+        df["symbol"] = "XXX"
+        df.loc[0, "quantity"] = 0
+
+        fresh = report.df("Trade")
+        assert fresh.symbol.tolist() == ["AAPL", "AAPL", "SAP"]
+        assert fresh.quantity.tolist() == [10, -10, 1]
+
+    def test_account_frame_not_mutated_by_callers(self, report):
+        """Test that an in-place write to one account's rows doesn't reach the cached topic or partition."""
+        df = report.df_by_account_id("Trade", "U1111111")
+        df.iloc[0, df.columns.get_loc("quantity")] = 0
+
+        assert report.df_by_account_id("Trade", "U1111111").quantity.tolist() == [10, -10]
+        assert report.df("Trade").quantity.tolist() == [10, -10, 1]
+
+    def test_index_rebuilt_on_load(self, report, tmp_path):
+        """Test that loading another statement invalidates the index."""
+        assert len(report.df("Trade")) == 3
+
+        path = tmp_path / "report.xml"
+        path.write_text(STATEMENT.replace('<Trade accountId="U2222222"', '<Order accountId="U2222222"'))
+        report.load(str(path))
+
+        assert len(report.df("Trade")) == 2
+        assert len(report.df("Order")) == 1
+        assert report.orders_by_account_id("U2222222").transactionID.tolist() == [3]
+        assert report.orders_by_account_id("U1111111").empty
+
+
+class TestPartition:
+    """Tests for the accountId partition of CustomFlexReport."""
+
+    def test_partition_matches_boolean_filter(self, report):
+        """Test that per-account frames equal filtering the topic frame by accountId."""
+        trades = report.df("Trade")
+        partition = report.partition("Trade")
+
+        assert list(partition) == ["U1111111", "U2222222"]
+        for account_id, df in partition.items():
+            pd.testing.assert_frame_equal(df, trades[trades.accountId == account_id])
+
+    def test_interleaved_accounts(self):
+        """Test that accounts whose rows are not contiguous are still grouped correctly."""
+        report = CustomFlexReport.from_xml(
+            "<FlexQueryResponse><Trades>"
+            '<Trade accountId="A" transactionID="1"/><Trade accountId="B" transactionID="2"/>'
+            '<Trade accountId="A" transactionID="3"/>'
+            "</Trades></FlexQueryResponse>"
+        )
+
+        partition = report.partition("Trade")
+
+        assert partition["A"].transactionID.tolist() == [1, 3]
+        assert partition["A"].index.tolist() == [0, 2]
+        assert partition["B"].transactionID.tolist() == [2]
+
+    def test_accessors(self, report):
+        """Test per-account accessors on top of the partition."""
+        assert report.account_ids() == ["U1111111", "U2222222"]
+        assert report.trades_by_account_id("U2222222").transactionID.tolist() == [3]
+        assert report.closed_trades_by_account_id("U1111111").transactionID.tolist() == [2]
+        assert report.open_positions_by_account_id("U2222222") is None
+        assert report.orders_by_account_id("U1111111") is None
+        assert report.df_by_account_id("Trade", "U9999999") is None
+
+    def test_partition_built_once(self, report):
+        """Test that the partition is reused across accounts."""
+        with patch.object(pd.DataFrame, "groupby", autospec=True, side_effect=pd.DataFrame.groupby) as groupby:
+            for account_id in report.account_ids():
+                report.trades_by_account_id(account_id)
+
+        # AccountInformation, Trade
+        assert groupby.call_count == 2
+
+
+class TestLoadStreaming:
+    """Tests for CustomFlexReport.load_streaming."""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        """Write the statement to a file."""
+        path = tmp_path / "report.xml"
+        path.write_text(STATEMENT)
+        return str(path)
+
+    @pytest.mark.parametrize("topic", ["Trade", "OpenPosition", "AccountInformation", "FlexStatement"])
+    def test_same_frames_as_tree(self, report, path, topic):
+        """Test that streaming gives the same frames as indexing the element tree."""
+        streamed = CustomFlexReport()
+        streamed.load_streaming(path)
+
+        pd.testing.assert_frame_equal(streamed.df(topic), report.df(topic))
+        assert [o.__dict__ for o in streamed.extract(topic)] == [o.__dict__ for o in report.extract(topic)]
+        assert streamed.topics() == report.topics()
+
+    def test_topic_whitelist(self, path):
+        """Test that only whitelisted topics are indexed, and the accessors still work."""
+        report = CustomFlexReport()
+        report.load_streaming(path, topics=["AccountInformation", "Trade"])
+
+        assert report.topics() == {"AccountInformation", "Trade"}
+        assert report.account_ids() == ["U1111111", "U2222222"]
+        assert report.trades_by_account_id("U1111111").transactionID.tolist() == [1, 2]
+        assert report.open_positions_by_account_id("U1111111") is None
+
+    def test_elements_released(self, path):
+        """Test that parsed elements are not kept alive by their parents."""
+        parents = []
+        real_iterparse = ET.iterparse
+
+        def iterparse(source, events):
+            for event, elem in real_iterparse(source, events=events):
+                if event == "start" and not parents:
+                    parents.append(elem)
+                yield event, elem
+
+        with patch("ngv_reports_ibkr.custom_flex_report.ET.iterparse", side_effect=iterparse):
+            CustomFlexReport().load_streaming(path)
+
+        assert len(parents[0]) == 0
+
+    def test_cannot_save(self, path, tmp_path):
+        """Test that a streamed report refuses to save (it has no XML)."""
+        report = CustomFlexReport()
+        report.load_streaming(path)
+
+        with pytest.raises(ValueError):
+            report.save(str(tmp_path / "out.xml"))
+
+    def test_rows_with_missing_attributes(self, tmp_path):
+        """Test that attributes missing on some elements match FlexReport."""
+        path = tmp_path / "report.xml"
+        path.write_text('<R><Trade a="1"/><Trade b="x"/><Trade a="2" b="y"/></R>')
+        streamed = CustomFlexReport()
+        streamed.load_streaming(str(path))
+
+        expected = util.df(FlexReport.extract(CustomFlexReport(path=str(path)), "Trade"))
+        pd.testing.assert_frame_equal(streamed.df("Trade"), expected)
+        assert [t.__dict__ for t in streamed.extract("Trade")] == [{"a": 1}, {"b": "x"}, {"a": 2, "b": "y"}]
+
+
+class TestSectionCache:
+    """Tests for the cache of parsed section frames of CustomFlexReport."""
+
+    def test_timestamps_parsed_once_per_account(self, report, mocker):
+        """Test that trades and closed trades of an account share one parse."""
+        from ngv_reports_ibkr import transforms
+
+        spy = mocker.spy(transforms, "_parse_datetime_values")
+
+        for account_id in report.account_ids():
+            report.trades_by_account_id(account_id)
+            report.closed_trades_by_account_id(account_id)
+            report.trades_by_account_id(account_id)
+
+        # dateTime and orderTime, for each of the two accounts
+        assert spy.call_count == 4
+
+    def test_cached_frame_not_mutated_by_callers(self, report):
+        """Test that changing a returned section frame doesn't change the cached one."""
+        df = report.trades_by_account_id("U1111111")
+        df["symbol"] = "XXX"
+
+        assert report.trades_by_account_id("U1111111").symbol.tolist() == ["AAPL", "AAPL"]
+        assert report.closed_trades_by_account_id("U1111111").symbol.tolist() == ["AAPL"]
+
+    def test_cached_frame_not_mutated_in_place(self, report):
+        """Test that in-place writes (.loc/.iloc) to a returned section frame don't reach the cache."""
+        df = report.trades_by_account_id("U1111111")
+        df.loc[df.index[0], "quantity"] = 0
+        df.iloc[1, df.columns.get_loc("symbol")] = "XXX"
+
+        cached = report.trades_by_account_id("U1111111")
+        assert cached.quantity.tolist() == [10, -10]
+        assert cached.symbol.tolist() == ["AAPL", "AAPL"]
+
+    def test_section_copies(self, report):
+        """Test that a section is built with one copy of its partition frame, and each call returns one copy."""
+        report.partition("Trade")
+
+        with (
+            patch.object(pd.DataFrame, "take", autospec=True, side_effect=pd.DataFrame.take) as take,
+            patch.object(pd.DataFrame, "copy", autospec=True, side_effect=pd.DataFrame.copy) as copy,
+        ):
+            report.trades_by_account_id("U1111111")
+            # the pipeline's copy and the returned copy
+            assert take.call_count + copy.call_count == 2
+            report.trades_by_account_id("U1111111")
+            assert take.call_count + copy.call_count == 3
+
+    def test_invalidated_on_load(self, report, tmp_path):
+        """Test that loading another statement drops cached sections."""
+        assert report.trades_by_account_id("U2222222").transactionID.tolist() == [3]
+
+        path = tmp_path / "report.xml"
+        path.write_text(STATEMENT.replace('transactionID="3"', 'transactionID="4"'))
+        report.load(str(path))
+
+        assert report.trades_by_account_id("U2222222").transactionID.tolist() == [4]
+
+    def test_clear_cache(self, report):
+        """Test that clear_cache drops the cached sections."""
+        trades = report.trades_by_account_id("U1111111")
+        assert report._section_frames
+
+        report.clear_cache()
+
+        assert not report._section_frames
+        pd.testing.assert_frame_equal(report.trades_by_account_id("U1111111"), trades)
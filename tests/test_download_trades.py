@@ -1,6 +1,36 @@
+import pytest
+
 from ngv_reports_ibkr.config_helpers import get_ib_json
+from ngv_reports_ibkr.download_trades import load_report
+from tests.fixtures import TWO_ACCOUNT_STATEMENT
 
 
 def test_get_ib_json():
     configs = {"IB_JSON": '{"a": 1}'}
     assert get_ib_json(configs) == {"a": 1}
+
+
+@pytest.fixture
+def statement_path(tmp_path):
+    """Two-account statement on disk."""
+    path = tmp_path / "report.xml"
+    path.write_text(TWO_ACCOUNT_STATEMENT)
+    return str(path)
+
+
+def test_load_report_keeps_tree(statement_path, tmp_path):
+    """Test that load_report builds the element tree by default, so the report can be saved."""
+    report = load_report(statement_path)
+
+    assert report.root is not None
+    report.save(str(tmp_path / "copy.xml"))
+    assert (tmp_path / "copy.xml").read_text() == TWO_ACCOUNT_STATEMENT
+
+
+@pytest.mark.parametrize("kwargs", [{"streaming": True}, {"topics": ["AccountInformation", "Trade"]}])
+def test_load_report_streaming(statement_path, kwargs):
+    """Test that streaming, or a topic whitelist, loads without the element tree."""
+    report = load_report(statement_path, **kwargs)
+
+    assert report.root is None
+    assert report.account_ids() == ["U1111111", "U2222222"]
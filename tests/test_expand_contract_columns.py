@@ -0,0 +1,200 @@
+"""Tests for the column expanders of expand_contract_columns."""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from ib_async import CommissionReport, Contract, Execution, Fill, LimitOrder, MarketOrder, OrderStatus, TradeLogEntry
+
+from ngv_reports_ibkr.expand_contract_columns import (
+    UNSET_DOUBLE,
+    UNSET_INTEGER,
+    clean_unset_columns,
+    expand_all_trade_columns,
+    expand_contract_column,
+    expand_fills_and_logs,
+    expand_order_column,
+    expand_order_status_column,
+    extract_object_attributes,
+)
+from ngv_reports_ibkr.transforms import Transforms
+
+
+def _expand_with_dicts(df: pd.DataFrame, col: str, extract) -> pd.DataFrame:
+    """Reference expansion: one dict per row, then concat (how the expanders used to work)."""
+    data = [{} if obj is None else extract(obj) for obj in df[col]]
+    return pd.concat([df.drop(col, axis=1).reset_index(drop=True), pd.DataFrame(data)], axis=1)
+
+
+def _fill(exec_id: str, shares: float, commission: float = 1.0) -> Fill:
+    """Fill of one execution."""
+    time = datetime(2026, 1, 15, 15, 30, tzinfo=timezone.utc)
+    execution = Execution(execId=exec_id, time=time, shares=shares, price=100.0, side="BOT")
+    return Fill(Contract(conId=1), execution, CommissionReport(execId=exec_id, commission=commission), time)
+
+
+def _log(status: str) -> TradeLogEntry:
+    """Trade log entry."""
+    return TradeLogEntry(datetime(2026, 1, 15, 15, 29, tzinfo=timezone.utc), status, "", 0)
+
+
+def _values(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame as objects with None for every kind of missing value, to compare values across dtypes."""
+    return df.astype(object).where(df.notna(), None)
+
+
+class TestExpandColumns:
+    """Tests for expand_contract_column, expand_order_column and expand_order_status_column."""
+
+    def test_contract_column(self):
+        """Test contract fields, None rows and a fresh index."""
+        df = pd.DataFrame(
+            {"contract": [Contract(secType="STK", conId=1, symbol="AAPL"), None], "account": ["U1", "U2"]},
+            index=[10, 20],
+        )
+
+        result = expand_contract_column(df)
+
+        assert result.index.tolist() == [0, 1]
+        assert result.columns.tolist()[:3] == ["account", "conId", "symbol"]
+        assert result.symbol.iloc[0] == "AAPL"
+        assert result.conId.iloc[0] == 1
+        assert result.iloc[1].drop("account").isna().all()
+
+    def test_optional_contract_fields(self):
+        """Test that contract-type fields only become columns if some contract has them."""
+        df = pd.DataFrame({"contract": [SimpleNamespace(symbol="A"), SimpleNamespace(symbol="B", strike=5.0)]})
+
+        result = expand_contract_column(df)
+
+        assert "multiplier" not in result.columns
+        assert pd.isna(result.strike.iloc[0])
+        assert result.strike.iloc[1] == 5.0
+        assert result.conId.tolist() == [None, None]
+
+    def test_all_none(self):
+        """Test that a column of None adds no columns."""
+        result = expand_order_status_column(pd.DataFrame({"orderStatus": [None, None], "a": [1, 2]}))
+
+        assert result.columns.tolist() == ["a"]
+
+    def test_name_clash_keeps_both(self):
+        """Test that an expanded column named like an existing one doesn't replace it."""
+        df = pd.DataFrame({"symbol": ["X"], "contract": [Contract(symbol="AAPL")]})
+
+        result = expand_contract_column(df)
+
+        assert result.columns.tolist().count("symbol") == 2
+
+    def test_same_as_dict_per_row(self):
+        """Test that all trade columns expand to the same values as building a dict per row."""
+        order = LimitOrder("BUY", 100, 150.25)
+        order.orderId = 1
+        df = pd.DataFrame(
+            {
+                "contract": [Contract(secType="OPT", conId=2, symbol="SPY", strike=450.0, right="C"), None, Contract(symbol="QQQ")],
+                "order": [order, MarketOrder("SELL", 5), None],
+                "orderStatus": [OrderStatus(orderId=1, status="Filled", filled=100.0), None, OrderStatus(status="Submitted")],
+            }
+        )
+        contract_fields = ["conId", "symbol", "secType", "exchange", "currency", "localSymbol", "tradingClass"]
+        contract_fields += ["lastTradeDateOrContractMonth", "multiplier", "strike", "right"]
+        status_fields = ["status", "filled", "remaining", "avgFillPrice", "lastFillPrice"]
+
+        expected = _expand_with_dicts(df, "contract", lambda c: {name: getattr(c, name) for name in contract_fields})
+        expected = _expand_with_dicts(expected, "order", lambda o: extract_object_attributes(o, clean_numeric=True))
+        expected = _expand_with_dicts(expected, "orderStatus", lambda s: {name: getattr(s, name) for name in status_fields})
+
+        # order columns are nullable Int64/Float64 rather than float64/object with None
+        pd.testing.assert_frame_equal(_values(expand_all_trade_columns(df)), _values(expected))
+
+
+class TestCleanUnsetColumns:
+    """Tests for clean_unset_columns and the UNSET cleaning of expand_order_column."""
+
+    def test_nullable_dtypes(self):
+        """Test that UNSET values become NA in Int64/Float64 columns, other columns untouched."""
+        df = pd.DataFrame(
+            {
+                "qty": [1, UNSET_INTEGER, 3],
+                "price": [1.5, UNSET_DOUBLE, None],
+                "mixed": [1, 2.5, UNSET_DOUBLE],
+                "ids": pd.Series([7, None, UNSET_INTEGER], dtype=object),
+                "flag": [True, False, True],
+                "name": ["a", "b", "c"],
+            }
+        )
+
+        result = clean_unset_columns(df)
+
+        assert result.qty.dtype == "Int64" and result.qty.isna().tolist() == [False, True, False]
+        assert result.price.dtype == "Float64" and result.price.isna().tolist() == [False, True, True]
+        assert result.mixed.dtype == "Float64" and result.mixed.tolist()[:2] == [1.0, 2.5]
+        assert result.ids.dtype == "Int64" and result.ids.isna().tolist() == [False, True, True]
+        assert result.flag.dtype == bool
+        assert result.name.tolist() == ["a", "b", "c"]
+        assert df.qty.tolist() == [1, UNSET_INTEGER, 3]
+
+    def test_order_columns(self):
+        """Test that expanded order columns get nullable dtypes, int columns staying int with None rows."""
+        order = LimitOrder("BUY", 100, 150.25)
+        order.orderId = 7
+
+        result = expand_order_column(pd.DataFrame({"order": [order, None, MarketOrder("SELL", 5)]}))
+
+        assert result.orderId.dtype == "Int64"
+        assert result.lmtPrice.dtype == "Float64"
+        assert result.lmtPrice.isna().tolist() == [False, True, True]
+        assert result.orderId.tolist()[0] == 7
+        assert result.action.tolist()[::2] == ["BUY", "SELL"]
+
+
+class TestExpandFillsAndLogs:
+    """Tests for expand_fills_and_logs."""
+
+    @pytest.fixture
+    def df(self):
+        """Three orders: two fills and three log entries, no fills or logs, one fill and one log entry."""
+        return pd.DataFrame(
+            {
+                "orderId": pd.array([1, 2, 3], dtype="Int64"),
+                "fills": [[_fill("e1", 10.0), _fill("e2", 5.0)], [], [_fill("e3", 1.0)]],
+                "log": [[_log("Submitted"), _log("Filled"), _log("Filled")], [], [_log("Filled")]],
+            },
+            index=[10, 20, 30],
+        )
+
+    def test_rows(self, df):
+        """Test one row per fill/log entry, paired by position, with order columns repeated."""
+        result = expand_fills_and_logs(df)
+
+        assert result.index.tolist() == [0, 1, 2, 3, 4]
+        assert result.orderId.tolist() == [1, 1, 1, 2, 3]
+        assert result.orderId.dtype == "Int64"
+        assert _values(result).fill_execution_id.tolist() == ["e1", "e2", None, None, "e3"]
+        assert _values(result).log_status.tolist() == ["Submitted", "Filled", "Filled", None, "Filled"]
+        assert result.fill_commission.tolist()[:2] == [1.0, 1.0]
+        assert result.fill_contract_conId.tolist()[0] == 1
+        assert "fills" not in result.columns and "log" not in result.columns
+
+    def test_fills_only(self, df):
+        """Test that fills_only gives the rows filter_to_executions keeps, with the log columns left empty."""
+        result = expand_fills_and_logs(df, fills_only=True)
+
+        expected = Transforms.filter_to_executions(expand_fills_and_logs(df))
+        log_columns = ["log_time", "log_status", "log_message", "log_errorCode"]
+        # same values apart from the logs; columns without gaps can get a narrower dtype (eg conId int64, not float64)
+        pd.testing.assert_frame_equal(_values(result.drop(columns=log_columns)), _values(expected.drop(columns=log_columns)))
+        assert result.fill_execution_id.tolist() == ["e1", "e2", "e3"]
+        assert result[log_columns].isna().all().all()
+        assert expected.log_status.tolist() == ["Submitted", "Filled", "Filled"]
+
+    def test_fills_only_drops_fills_without_execution(self, df):
+        """Test that fills without an execution are dropped in fills_only mode, and log columns are empty."""
+        df.at[20, "fills"] = [Fill(Contract(), None, None, None)]
+
+        result = expand_fills_and_logs(df, fills_only=True)
+
+        assert result.orderId.tolist() == [1, 1, 3]
+        assert result[["log_time", "log_status", "log_message", "log_errorCode"]].isna().all().all()
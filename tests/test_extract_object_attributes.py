@@ -5,10 +5,15 @@ This test file uses real ib_async Order objects to verify the generic
 attribute extraction works correctly with actual IBKR API objects.
 """
 
+from types import SimpleNamespace
+
 import pandas as pd
-from ib_async import LimitOrder, MarketOrder
+import pytest
+from ib_async import Contract, Execution, LimitOrder, MarketOrder, OrderStatus
 
+from ngv_reports_ibkr import expand_contract_columns
 from ngv_reports_ibkr.expand_contract_columns import (
+    _extraction_plan,
     expand_order_column,
     extract_object_attributes,
 )
@@ -167,3 +172,64 @@ def test_exclude_specific_attributes():
     # Other attributes should still be there
     assert "orderId" in data
     assert "action" in data
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [LimitOrder("BUY", 200, 150.25), MarketOrder("SELL", 1), Contract(secType="STK", symbol="AAPL"), OrderStatus(status="Filled"), Execution()],
+)
+@pytest.mark.parametrize("clean_numeric", [True, False])
+def test_plan_matches_dir_walk(obj, clean_numeric, mocker):
+    """
+    Test that the per-class plan extracts the same attributes, in the same order, as walking dir().
+
+    Real-world scenario: every ib_async object the TWS expanders see is a dataclass
+    """
+    expected = extract_object_attributes(obj, clean_numeric=clean_numeric, exclude_attrs=["permId"])
+    mocker.patch.object(expand_contract_columns, "_extraction_plan", return_value=None)
+
+    assert list(extract_object_attributes(obj, clean_numeric=clean_numeric, exclude_attrs=["permId"]).items()) == list(expected.items())
+
+
+def test_instance_only_attributes_use_dir():
+    """
+    Test that attributes set on a dataclass instance but not declared on its class are kept.
+
+    Real-world scenario: scripts tagging ib_async objects with their own attributes
+    """
+    tagged = LimitOrder("BUY", 100, 150.0)
+    tagged.strategy = "momentum"
+    orders = [LimitOrder("BUY", 200, 150.0), tagged]
+
+    assert extract_object_attributes(tagged)["strategy"] == "momentum"
+    assert "strategy" not in extract_object_attributes(orders[0])
+
+    df = expand_order_column(pd.DataFrame({"order": orders}))
+    assert df["strategy"].isna().tolist() == [True, False]
+    assert df["strategy"].iloc[1] == "momentum"
+
+
+def test_plan_computed_once_per_class():
+    """
+    Test that the attribute list of a class is worked out once, not per object.
+
+    Real-world scenario: a session with thousands of Order objects
+    """
+    _extraction_plan.cache_clear()
+    orders = [LimitOrder("BUY", 100 + i, 150.0) for i in range(50)]
+
+    expand_order_column(pd.DataFrame({"order": orders}))
+    for order in orders:
+        extract_object_attributes(order)
+
+    assert _extraction_plan.cache_info().misses == 1
+
+
+def test_non_dataclass_objects_use_dir():
+    """
+    Test that objects whose attributes vary per instance are still fully extracted.
+
+    Real-world scenario: ad-hoc objects built in notebooks
+    """
+    assert extract_object_attributes(SimpleNamespace(a=1)) == {"a": 1}
+    assert extract_object_attributes(SimpleNamespace(b=2)) == {"b": 2}
@@ -0,0 +1,127 @@
+"""Tests for flex_cache module."""
+
+import os
+import time
+from datetime import date, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from ngv_reports_ibkr.flex_cache import FlexStatementCache
+from ngv_reports_ibkr.flex_client import DateRange, FlexClient
+from tests.fixtures import create_get_statement_success, create_send_request_success
+
+CLOSED_RANGE = DateRange(from_date=date(2024, 1, 1), to_date=date(2024, 12, 31))
+
+
+def _age(path, seconds: float) -> None:
+    """Pretend a cache entry was written (and last read) `seconds` ago."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create cache in a temporary folder."""
+    return FlexStatementCache(tmp_path / "flex_cache", open_ttl=60)
+
+
+class TestFlexStatementCache:
+    """Tests for FlexStatementCache."""
+
+    def test_round_trip_is_compressed(self, cache):
+        """Test that a stored statement is returned and stored gzip-compressed."""
+        xml_data = create_get_statement_success()
+        path = cache.put("token123", "654321", xml_data, CLOSED_RANGE)
+
+        assert cache.get("token123", "654321", CLOSED_RANGE) == xml_data
+        assert path.read_bytes()[:2] == b"\x1f\x8b"
+
+    def test_key_depends_on_query_range_and_token(self, cache):
+        """Test that different requests never share an entry."""
+        other_range = DateRange(from_date=date(2023, 1, 1), to_date=date(2023, 12, 31))
+        keys = {
+            cache.key("token123", "654321", CLOSED_RANGE),
+            cache.key("token123", "654321", other_range),
+            cache.key("token123", "111111", CLOSED_RANGE),
+            cache.key("other_token", "654321", CLOSED_RANGE),
+            cache.key("token123", "654321"),
+        }
+        assert len(keys) == 5
+        assert "token123" not in cache.key("token123", "654321")
+
+    def test_closed_range_never_expires(self, cache):
+        """Test that statements for past windows are treated as immutable."""
+        path = cache.put("token123", "654321", create_get_statement_success(), CLOSED_RANGE)
+        _age(path, 365 * 24 * 3600)
+
+        assert cache.get("token123", "654321", CLOSED_RANGE) is not None
+
+    def test_open_range_expires(self, cache):
+        """Test that a range reaching today is short-lived."""
+        today_range = DateRange(from_date=date.today() - timedelta(days=7), to_date=date.today())
+        path = cache.put("token123", "654321", create_get_statement_success(), today_range)
+        assert cache.get("token123", "654321", today_range) is not None
+
+        _age(path, 120)
+        assert cache.get("token123", "654321", today_range) is None
+        assert not path.exists()
+
+    def test_entry_written_before_close_expires(self, cache):
+        """Test that a statement cached while its range was open (maybe partial) still expires once the range closes."""
+        last_week = DateRange(from_date=date.today() - timedelta(days=14), to_date=date.today() - timedelta(days=7))
+        path = cache.put("token123", "654321", create_get_statement_success(), last_week)
+        _age(path, 8 * 24 * 3600)  # written on to_date + 1 day, before the range closed
+
+        assert cache.is_closed(last_week)
+        assert cache.get("token123", "654321", last_week) is None
+
+    def test_no_date_range_expires(self, cache):
+        """Test that the saved query's own period is treated as open."""
+        path = cache.put("token123", "654321", create_get_statement_success())
+        _age(path, 120)
+
+        assert cache.get("token123", "654321") is None
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that least recently read entries are evicted first."""
+        cache = FlexStatementCache(tmp_path / "flex_cache")
+        ranges = [DateRange(date(2020 + i, 1, 1), date(2020 + i, 12, 31)) for i in range(3)]
+        paths = [cache.put("token123", "654321", create_get_statement_success(), r) for r in ranges]
+        for age, path in zip([300, 200, 100], paths):
+            _age(path, age)
+
+        # reading the oldest entry makes it the most recently used
+        cache.get("token123", "654321", ranges[0])
+        cache.max_bytes = sum(p.stat().st_size for p in paths) - 1
+
+        assert cache.evict() == 1
+        assert paths[0].exists()
+        assert not paths[1].exists()
+        assert paths[2].exists()
+
+    def test_unreadable_entry_is_dropped(self, cache):
+        """Test that a corrupt entry counts as a miss."""
+        path = cache.put("token123", "654321", create_get_statement_success(), CLOSED_RANGE)
+        path.write_bytes(b"not gzip")
+
+        assert cache.get("token123", "654321", CLOSED_RANGE) is None
+        assert not path.exists()
+
+
+class TestFlexClientCache:
+    """Tests for FlexClient.fetch_flex_report with a cache."""
+
+    def test_second_fetch_is_served_from_cache(self, cache):
+        """Test that a cached statement skips IBKR entirely."""
+        http_client = Mock()
+        http_client.send_request.return_value = create_send_request_success()
+        http_client.get_statement.return_value = create_get_statement_success()
+        client = FlexClient(http_client=http_client, statement_poll_delay=0.0, cache=cache)
+
+        first = client.fetch_flex_report("token123", "654321", CLOSED_RANGE)
+        second = client.fetch_flex_report("token123", "654321", CLOSED_RANGE)
+
+        assert first == second
+        assert http_client.send_request.call_count == 1
+        assert http_client.get_statement.call_count == 1
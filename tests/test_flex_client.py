@@ -1,7 +1,9 @@
 """Tests for flex_client module."""
 
+import threading
+import xml.etree.ElementTree as ET
 from datetime import date, timedelta
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 import requests
@@ -19,7 +21,10 @@ from ngv_reports_ibkr.flex_client import (
     FlexTokenError,
     FlexTokenExpiredError,
     HTTPFlexClient,
+    merge_flex_statements,
+    split_date_range,
 )
+from ngv_reports_ibkr.rate_limit import TokenBucketRateLimiter
 from tests.fixtures import (
     create_get_statement_error,
     create_get_statement_success,
@@ -67,6 +72,125 @@ class TestDateRange:
         assert (dr.to_date - dr.from_date).days == 365
 
 
+class TestSplitDateRange:
+    """Tests for split_date_range."""
+
+    def test_short_span_is_single_window(self):
+        """Test that a span within the limit is not split."""
+        windows = split_date_range(date(2025, 1, 1), date(2025, 3, 31))
+        assert windows == [DateRange(date(2025, 1, 1), date(2025, 3, 31))]
+
+    def test_windows_cover_span_without_overlap(self):
+        """Test that five years split into contiguous compliant windows."""
+        windows = split_date_range(date(2020, 1, 1), date(2024, 12, 31))
+
+        assert len(windows) == 5
+        assert windows[0].from_date == date(2020, 1, 1)
+        assert windows[-1].to_date == date(2024, 12, 31)
+        for prev, cur in zip(windows, windows[1:]):
+            assert cur.from_date == prev.to_date + timedelta(days=1)
+        assert all((w.to_date - w.from_date).days <= 365 for w in windows)
+
+    def test_custom_window_size(self):
+        """Test splitting into smaller windows."""
+        windows = split_date_range(date(2025, 1, 1), date(2025, 1, 10), max_days=4)
+        assert [(w.from_date.day, w.to_date.day) for w in windows] == [(1, 5), (6, 10)]
+
+    def test_invalid_span(self):
+        """Test that an inverted span raises error."""
+        with pytest.raises(FlexDateRangeError, match="must be before"):
+            split_date_range(date(2025, 2, 1), date(2025, 1, 1))
+
+
+def _window_statement(from_date: str, to_date: str, trades: str, position_date: str) -> str:
+    """Generate a one-account statement for a date window."""
+    return f"""<FlexQueryResponse queryName="TestReport" type="AF">
+  <FlexStatements count="1">
+    <FlexStatement accountId="U1234567" fromDate="{from_date}" toDate="{to_date}">
+      <AccountInformation accountId="U1234567" currency="USD"/>
+      <Trades>{trades}</Trades>
+      <OpenPositions>
+        <OpenPosition accountId="U1234567" symbol="AAPL" reportDate="{position_date}"/>
+      </OpenPositions>
+    </FlexStatement>
+  </FlexStatements>
+</FlexQueryResponse>"""
+
+
+class TestMergeFlexStatements:
+    """Tests for merge_flex_statements."""
+
+    def test_merge_windows(self):
+        """Test that activity is concatenated and snapshots come from the last window."""
+        first = _window_statement(
+            "2024-01-01",
+            "2024-12-31",
+            '<Trade accountId="U1234567" transactionID="1"/><Trade accountId="U1234567" transactionID="2"/>',
+            "2024-12-31",
+        )
+        second = _window_statement(
+            "2025-01-01",
+            "2025-06-30",
+            # transactionID=2 reported again where the windows meet
+            '<Trade accountId="U1234567" transactionID="2"/><Trade accountId="U1234567" transactionID="3"/>',
+            "2025-06-30",
+        )
+
+        root = ET.fromstring(merge_flex_statements([first, second]))
+
+        statements = root.findall("FlexStatements/FlexStatement")
+        assert len(statements) == 1
+        assert statements[0].get("fromDate") == "2024-01-01"
+        assert statements[0].get("toDate") == "2025-06-30"
+        assert [t.get("transactionID") for t in root.iter("Trade")] == ["1", "2", "3"]
+        assert [p.get("reportDate") for p in root.iter("OpenPosition")] == ["2025-06-30"]
+        assert len(root.findall(".//AccountInformation")) == 1
+
+    def test_merge_change_in_nav(self):
+        """Test that ChangeInNAV spans every window: first starting value, last ending value, summed activity."""
+        first = _window_statement("2024-01-01", "2024-12-31", "", "2024-12-31").replace(
+            "<Trades>",
+            '<ChangeInNAV accountId="U1234567" currency="USD" fromDate="20240101" toDate="20241231" startingValue="1000" '
+            'mtm="150.5" dividends="10" endingValue="1160.5" twr="10"/><Trades>',
+        )
+        second = _window_statement("2025-01-01", "2025-06-30", "", "2025-06-30").replace(
+            "<Trades>",
+            '<ChangeInNAV accountId="U1234567" currency="USD" fromDate="20250101" toDate="20250630" startingValue="1160.5" '
+            'mtm="-20.25" dividends="5" endingValue="1145.25" twr="10"/><Trades>',
+        )
+
+        nav = ET.fromstring(merge_flex_statements([first, second])).find(".//ChangeInNAV").attrib
+
+        assert (nav["fromDate"], nav["toDate"]) == ("20240101", "20250630")
+        assert (nav["startingValue"], nav["endingValue"]) == ("1000", "1145.25")
+        assert (float(nav["mtm"]), float(nav["dividends"])) == (130.25, 15.0)
+        assert float(nav["twr"]) == pytest.approx(21.0)
+        assert (nav["accountId"], nav["currency"]) == ("U1234567", "USD")
+
+    def test_merge_keeps_identical_rows_without_id(self):
+        """Test that identical rows without a transactionID/tradeID are not collapsed."""
+        row = '<CashTransaction accountId="U1234567" amount="-1.5" type="Other Fees"/>'
+        first = _window_statement("2024-01-01", "2024-12-31", "", "2024-12-31").replace("<Trades>", f"<CashTransactions>{row}{row}</CashTransactions><Trades>")
+        second = _window_statement("2025-01-01", "2025-06-30", "", "2025-06-30").replace("<Trades>", f"<CashTransactions>{row}</CashTransactions><Trades>")
+
+        root = ET.fromstring(merge_flex_statements([first, second]))
+
+        assert len(root.findall(".//CashTransaction")) == 3
+
+    def test_merge_refuses_unknown_attribute_sections(self):
+        """Test that a childless section with window-specific attributes is not silently truncated to one window."""
+        first = _window_statement("2024-01-01", "2024-12-31", "", "2024-12-31").replace("<Trades>", '<Summary total="1"/><Trades>')
+        second = _window_statement("2025-01-01", "2025-06-30", "", "2025-06-30").replace("<Trades>", '<Summary total="2"/><Trades>')
+
+        with pytest.raises(ValueError, match="Summary"):
+            merge_flex_statements([first, second])
+
+    def test_merge_requires_statements(self):
+        """Test that merging nothing raises error."""
+        with pytest.raises(ValueError):
+            merge_flex_statements([])
+
+
 class TestFlexRequestResponse:
     """Tests for FlexRequestResponse dataclass."""
 
@@ -310,6 +434,201 @@ class TestFlexClient:
         assert call_kwargs["date_range"] == date_range
 
 
+class TestFetchRange:
+    """Tests for FlexClient.fetch_range."""
+
+    def test_fetch_range_merges_windows(self):
+        """Test that a long span is fetched window by window and merged."""
+        http_client = Mock()
+        http_client.send_request.side_effect = lambda token, query_id, date_range: create_send_request_success(
+            date_range.from_date.isoformat()
+        )
+        http_client.get_statement.side_effect = lambda token, reference_code: _window_statement(
+            reference_code,
+            reference_code,
+            f'<Trade accountId="U1234567" transactionID="{reference_code}"/>',
+            reference_code,
+        )
+        client = FlexClient(http_client=http_client, statement_poll_delay=0.0, rate_limiter=TokenBucketRateLimiter(rate=1000.0))
+
+        report = client.fetch_range("token123", "654321", date(2022, 1, 1), date(2024, 12, 31))
+
+        assert http_client.send_request.call_count == 3
+        trades = report.df("Trade")
+        windows = split_date_range(date(2022, 1, 1), date(2024, 12, 31))
+        assert list(trades["transactionID"]) == [w.from_date.isoformat() for w in windows]
+        assert len(report.df("OpenPosition")) == 1
+        assert report.account_ids() == ["U1234567"]
+
+    @staticmethod
+    def _http_client() -> Mock:
+        """HTTP client answering every window with an empty statement."""
+        http_client = Mock()
+        http_client.send_request.return_value = create_send_request_success()
+        http_client.get_statement.return_value = _window_statement("2022-01-01", "2022-12-31", "", "2022-12-31")
+        return http_client
+
+    def test_one_http_client_per_thread(self):
+        """Test that worker threads don't share an HTTP client (a requests.Session isn't thread-safe)."""
+        barrier = threading.Barrier(3)
+        http_clients = []
+
+        def send_request(**kwargs):
+            # all three windows in flight at once, so each is on its own thread
+            barrier.wait()
+            return create_send_request_success()
+
+        def factory():
+            http_client = self._http_client()
+            http_client.send_request.side_effect = send_request
+            http_clients.append(http_client)
+            return http_client
+
+        client = FlexClient(http_client_factory=factory, statement_poll_delay=0.0, rate_limiter=TokenBucketRateLimiter(rate=1000.0))
+
+        client.fetch_range("token123", "654321", date(2022, 1, 1), date(2024, 12, 31))
+
+        assert len(http_clients) == 3
+        assert [c.send_request.call_count for c in http_clients] == [1, 1, 1]
+
+    def test_paced_without_rate_limiter(self):
+        """Test that windows are paced by a default rate limiter when the client has none."""
+        http_client = self._http_client()
+        client = FlexClient(http_client=http_client, statement_poll_delay=0.0)
+
+        with patch("ngv_reports_ibkr.flex_client.TokenBucketRateLimiter") as limiter_class:
+            limiter_class.return_value.reserve.return_value = 0.0
+            client.fetch_range("token123", "654321", date(2022, 1, 1), date(2024, 12, 31))
+
+        assert limiter_class.call_args.kwargs == {"rate": 1.0}
+        # SendRequest and GetStatement of each of the three windows
+        assert limiter_class.return_value.reserve.call_count == 6
+        assert client.rate_limiter is None
+
+
+def _chunked(text: str, size: int = 64):
+    """Split an XML string into byte chunks, as streamed by requests."""
+    data = text.encode("utf-8")
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestStreamingStatement:
+    """Tests for streaming GetStatement downloads."""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self):
+        """Skip real waits between probes."""
+        with patch("ngv_reports_ibkr.flex_client.time.sleep"):
+            yield
+
+    @pytest.fixture
+    def mock_http_client(self):
+        """Create mock HTTP client."""
+        client = Mock()
+        client.send_request.return_value = create_send_request_success("REF_STREAM")
+        return client
+
+    @patch("requests.Session.get")
+    def test_http_stream_statement(self, mock_get):
+        """Test that HTTPFlexClient streams the body in chunks."""
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_content.return_value = iter([b"<Flex", b"QueryResponse/>"])
+        mock_get.return_value = mock_response
+
+        client = HTTPFlexClient()
+        chunks = list(client.stream_statement(token="test_token", reference_code="REF123", chunk_size=1024))
+
+        assert b"".join(chunks) == b"<FlexQueryResponse/>"
+        assert mock_get.call_args[1]["stream"] is True
+        mock_response.iter_content.assert_called_once_with(chunk_size=1024)
+
+    def test_fetch_to_file_writes_statement(self, mock_http_client, tmp_path):
+        """Test that the statement lands on disk byte for byte."""
+        statement = create_get_statement_success()
+        mock_http_client.stream_statement.return_value = iter(_chunked(statement))
+        client = FlexClient(http_client=mock_http_client)
+
+        path = client.fetch_flex_report_to_file(token="token123", query_id="654321", path=tmp_path / "report.xml")
+
+        assert path == tmp_path / "report.xml"
+        assert path.read_text() == statement
+        assert not (tmp_path / "report.xml.part").exists()
+        mock_http_client.get_statement.assert_not_called()
+
+    def test_fetch_to_file_defaults_to_temp_file(self, mock_http_client):
+        """Test that a temporary file is used when no path is given."""
+        mock_http_client.stream_statement.return_value = iter(_chunked(create_get_statement_success()))
+        client = FlexClient(http_client=mock_http_client)
+
+        path = client.fetch_flex_report_to_file(token="token123", query_id="654321")
+        try:
+            assert path.suffix == ".xml"
+            assert "<FlexQueryResponse" in path.read_text()
+        finally:
+            path.unlink()
+
+    def test_failed_fetch_removes_temp_file(self, mock_http_client, tmp_path):
+        """Test that the temporary file is deleted when the fetch raises."""
+        mock_http_client.stream_statement.return_value = iter(_chunked(create_get_statement_error("1015", "Invalid token")))
+        client = FlexClient(http_client=mock_http_client)
+
+        with patch("ngv_reports_ibkr.flex_client.tempfile.tempdir", str(tmp_path)):
+            with pytest.raises(FlexTokenError):
+                client.fetch_flex_report_to_file(token="token123", query_id="654321")
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_fetch_to_file_without_stream_statement(self, tmp_path):
+        """Test that HTTP clients without stream_statement are read with get_statement."""
+        http_client = Mock(spec=["send_request", "get_statement"])
+        http_client.send_request.return_value = create_send_request_success("REF_STREAM")
+        http_client.get_statement.return_value = create_get_statement_success()
+        client = FlexClient(http_client=http_client)
+
+        path = client.fetch_flex_report_to_file(token="token123", query_id="654321", path=tmp_path / "report.xml")
+
+        assert path.read_text() == create_get_statement_success()
+
+    def test_fetch_to_file_polls_while_in_progress(self, mock_http_client, tmp_path):
+        """Test that a streamed 1019 wrapper is detected and polled again."""
+        mock_http_client.stream_statement.side_effect = [
+            iter(_chunked(create_get_statement_error("1019", "Statement generation in progress"))),
+            iter(_chunked(create_get_statement_success())),
+        ]
+        client = FlexClient(http_client=mock_http_client)
+
+        path = client.fetch_flex_report_to_file(token="token123", query_id="654321", path=tmp_path / "report.xml")
+
+        assert "<FlexQueryResponse" in path.read_text()
+        assert client.last_poll_stats.poll_count == 2
+
+    def test_fetch_to_file_raises_statement_error(self, mock_http_client, tmp_path):
+        """Test that non-retryable errors in the wrapper are raised."""
+        mock_http_client.stream_statement.return_value = iter(_chunked(create_get_statement_error("1015", "Invalid token")))
+        client = FlexClient(http_client=mock_http_client)
+
+        with pytest.raises(FlexTokenError, match="1015"):
+            client.fetch_flex_report_to_file(token="token123", query_id="654321", path=tmp_path / "report.xml")
+
+        assert not (tmp_path / "report.xml").exists()
+
+    def test_interrupted_stream_leaves_no_file(self, mock_http_client, tmp_path):
+        """Test that a broken download is discarded and retried."""
+
+        def broken_stream():
+            yield from _chunked(create_get_statement_success())[:2]
+            raise requests.ConnectionError("connection reset")
+
+        mock_http_client.stream_statement.side_effect = [broken_stream(), iter(_chunked(create_get_statement_success()))]
+        client = FlexClient(http_client=mock_http_client, base_retry_delay=0.01)
+
+        path = client.fetch_flex_report_to_file(token="token123", query_id="654321", path=tmp_path / "report.xml")
+
+        assert path.read_text() == create_get_statement_success()
+        assert not (tmp_path / "report.xml.part").exists()
+
+
 class TestExceptionHierarchy:
     """Tests for exception class hierarchy."""
 
@@ -0,0 +1,133 @@
+"""Tests for flex_journal module."""
+
+import json
+import time
+from datetime import date
+from unittest.mock import Mock
+
+import pytest
+
+from ngv_reports_ibkr.flex_client import DateRange, FlexClient
+from ngv_reports_ibkr.flex_journal import FetchJournal
+from tests.fixtures import create_get_statement_error, create_get_statement_success, create_send_request_success
+
+DATE_RANGE = DateRange(from_date=date(2024, 1, 1), to_date=date(2024, 12, 31))
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Create journal in a temporary folder."""
+    return FetchJournal(tmp_path / "flex_journal.json", max_age=600)
+
+
+def _backdate(journal: FetchJournal, seconds: float) -> None:
+    """Pretend every journal entry was recorded `seconds` ago."""
+    data = json.loads(journal.path.read_text())
+    for entry in data.values():
+        entry["created_at"] -= seconds
+    journal.path.write_text(json.dumps(data))
+
+
+class TestFetchJournal:
+    """Tests for FetchJournal."""
+
+    def test_record_find_remove(self, journal):
+        """Test that a recorded reference code is found until it is removed."""
+        journal.record("token123", "654321", "REF1", DATE_RANGE)
+
+        entry = journal.find("token123", "654321", DATE_RANGE)
+        assert entry.reference_code == "REF1"
+        assert entry.from_date == "2024-01-01"
+        assert journal.find("token123", "654321") is None
+        assert journal.find("other_token", "654321", DATE_RANGE) is None
+
+        journal.remove("token123", "654321", DATE_RANGE)
+        assert journal.find("token123", "654321", DATE_RANGE) is None
+
+    def test_survives_new_instance(self, journal):
+        """Test that entries are persisted to disk."""
+        journal.record("token123", "654321", "REF1")
+
+        assert FetchJournal(journal.path).find("token123", "654321").reference_code == "REF1"
+
+    def test_token_not_stored(self, journal):
+        """Test that the journal file never contains the token."""
+        journal.record("secret_token", "654321", "REF1")
+
+        assert "secret_token" not in journal.path.read_text()
+
+    def test_expired_entries(self, journal):
+        """Test that codes older than max_age are not resumed and get pruned."""
+        journal.record("token123", "654321", "REF1")
+        journal.record("token123", "111111", "REF2")
+        _backdate(journal, 900)
+        journal.record("token123", "222222", "REF3")
+
+        assert journal.find("token123", "654321") is None
+        assert [e.reference_code for e in journal.pending()] == ["REF3"]
+        assert journal.prune() == 2
+        assert journal.find("token123", "222222") is not None
+
+    def test_unreadable_file(self, journal):
+        """Test that a corrupt journal is treated as empty."""
+        journal.path.write_text("not json")
+
+        assert journal.find("token123", "654321") is None
+        journal.record("token123", "654321", "REF1")
+        assert journal.find("token123", "654321") is not None
+
+
+class TestFlexClientJournal:
+    """Tests for FlexClient.fetch_flex_report with a journal."""
+
+    def _client(self, journal, http_client):
+        return FlexClient(http_client=http_client, statement_poll_delay=0.0, max_retries=2, base_retry_delay=0.0, journal=journal)
+
+    def test_resumes_journaled_reference_code(self, journal):
+        """Test that a code left by an earlier run is polled without a new SendRequest."""
+        journal.record("token123", "654321", "REF1", DATE_RANGE)
+        http_client = Mock()
+        http_client.get_statement.return_value = create_get_statement_success()
+
+        xml_data = self._client(journal, http_client).fetch_flex_report("token123", "654321", DATE_RANGE)
+
+        assert "FlexQueryResponse" in xml_data
+        http_client.send_request.assert_not_called()
+        assert http_client.get_statement.call_args.kwargs["reference_code"] == "REF1"
+        assert journal.find("token123", "654321", DATE_RANGE) is None
+
+    def test_falls_back_when_code_is_invalid(self, journal):
+        """Test that a code IBKR no longer knows is dropped and a new request is sent."""
+        journal.record("token123", "654321", "STALE", DATE_RANGE)
+        http_client = Mock()
+        http_client.send_request.return_value = create_send_request_success()
+
+        def get_statement(token, reference_code, version="3"):
+            if reference_code == "STALE":
+                return create_get_statement_error(error_code="1014", error_message="Invalid reference code")
+            return create_get_statement_success()
+
+        http_client.get_statement.side_effect = get_statement
+
+        xml_data = self._client(journal, http_client).fetch_flex_report("token123", "654321", DATE_RANGE)
+
+        assert "FlexQueryResponse" in xml_data
+        http_client.send_request.assert_called_once()
+        assert journal.pending() == []
+
+    def test_journal_entry_written_before_polling(self, journal):
+        """Test that the reference code is on disk while the statement is being polled."""
+        http_client = Mock()
+        http_client.send_request.return_value = create_send_request_success()
+        seen = []
+
+        def get_statement(token, reference_code, version="3"):
+            seen.append(journal.find("token123", "654321"))
+            return create_get_statement_success()
+
+        http_client.get_statement.side_effect = get_statement
+
+        self._client(journal, http_client).fetch_flex_report("token123", "654321")
+
+        assert seen[0] is not None and seen[0].created_at <= time.time()
+        assert journal.find("token123", "654321") is None
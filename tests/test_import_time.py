@@ -0,0 +1,63 @@
+"""Tests that heavy dependencies are only imported when used."""
+
+import subprocess
+import sys
+
+import pytest
+
+
+def _imported(statement: str) -> set:
+    """Top-level packages imported by `statement`, per `python -X importtime` in a fresh interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True)
+    return {line.rsplit("|", 1)[-1].strip().split(".")[0] for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+
+def _import_seconds(module: str) -> float:
+    """Cumulative import time of `module` in seconds, per `python -X importtime` in a fresh interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1e6
+    raise AssertionError(f"{module} not in -X importtime output")
+
+
+class TestImportTime:
+    """Import budget: which packages each module may load at import time."""
+
+    @pytest.mark.parametrize(
+        "module, not_loaded",
+        [
+            ("ngv_reports_ibkr.flex_client", {"pandas", "pandera", "ib_async", "pyarrow"}),
+            ("ngv_reports_ibkr.async_flex_client", {"pandas", "pandera", "ib_async", "pyarrow"}),
+            ("ngv_reports_ibkr.download_trades", {"pandas", "pandera", "ib_async", "pydantic"}),
+            ("ngv_reports_ibkr.custom_flex_report", {"pandera", "ib_async"}),
+            # the adapters' pydantic fields need the CustomFlexReport class, a FlexReport subclass
+            ("ngv_reports_ibkr.adapters", {"pandera"}),
+        ],
+    )
+    def test_heavy_packages_not_imported(self, module, not_loaded):
+        """Test that importing a module doesn't load packages it only needs later."""
+        assert not (_imported(f"import {module}") & not_loaded)
+
+    # about 0.2s here; pandas alone takes over 0.5s, so a budget of 1s catches it (or ib_async)
+    # creeping back in without failing on slow CI machines
+    @pytest.mark.parametrize(
+        "module", ["ngv_reports_ibkr.flex_client", "ngv_reports_ibkr.async_flex_client", "ngv_reports_ibkr.download_trades"]
+    )
+    def test_import_time_budget(self, module):
+        """Test that the pandas-free modules import within the time budget."""
+        assert _import_seconds(module) < 1.0
+
+    def test_loaded_when_used(self):
+        """Test that ib_async and pandera are imported once a report needs them."""
+        imported = _imported(
+            "from ngv_reports_ibkr.custom_flex_report import CustomFlexReport\n"
+            "report = CustomFlexReport.from_xml('<R><Trade a=\"1\"/></R>')\n"
+            "report.extract('Trade')\n"
+            "report.arrow_table('Trade')"
+        )
+
+        assert {"ib_async", "pandera"} <= imported
@@ -0,0 +1,146 @@
+"""Tests for rate_limit module."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ngv_reports_ibkr.flex_client import FlexClient, hash_token
+from ngv_reports_ibkr.rate_limit import BaseRateLimiter, SQLiteRateLimiter, TokenBucketRateLimiter
+from tests.fixtures import create_get_statement_success, create_send_request_success
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic/time.time."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBaseRateLimiter:
+    """Tests for BaseRateLimiter."""
+
+    def test_reserve_is_abstract(self):
+        """Test that a limiter without reserve() can't be instantiated."""
+        with pytest.raises(TypeError, match="reserve"):
+            BaseRateLimiter()
+
+
+class TestTokenBucketRateLimiter:
+    """Tests for TokenBucketRateLimiter."""
+
+    @pytest.fixture
+    def clock(self):
+        clock = FakeClock()
+        with patch("ngv_reports_ibkr.rate_limit.time.monotonic", clock):
+            yield clock
+
+    def test_reservations_are_spaced_by_rate(self, clock):
+        """Test that back-to-back requests are scheduled one interval apart."""
+        limiter = TokenBucketRateLimiter(rate=2.0, capacity=1)
+
+        assert [limiter.reserve("a") for _ in range(3)] == [0.0, 0.5, 1.0]
+
+    def test_burst_up_to_capacity(self, clock):
+        """Test that a full bucket allows a burst."""
+        limiter = TokenBucketRateLimiter(rate=1.0, capacity=3)
+
+        assert [limiter.reserve("a") for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+    def test_bucket_refills_over_time(self, clock):
+        """Test that waiting frees up slots again."""
+        limiter = TokenBucketRateLimiter(rate=1.0, capacity=1)
+        limiter.reserve("a")
+        clock.now += 5.0
+
+        assert limiter.reserve("a") == 0.0
+
+    def test_keys_are_independent(self, clock):
+        """Test that each key has its own bucket."""
+        limiter = TokenBucketRateLimiter(rate=1.0, capacity=1)
+        limiter.reserve("a")
+
+        assert limiter.reserve("b") == 0.0
+
+    def test_global_limit_applies_across_keys(self, clock):
+        """Test that the global bucket paces different keys together."""
+        limiter = TokenBucketRateLimiter(rate=10.0, capacity=1, global_rate=1.0)
+
+        assert [limiter.reserve(key) for key in ["a", "b", "c"]] == [0.0, 1.0, 2.0]
+
+    def test_key_booked_at_global_send_time(self, clock):
+        """Test that when the global bucket delays a request, its key's next slot is a full interval after it."""
+        limiter = TokenBucketRateLimiter(rate=1.0, capacity=1, global_rate=2.0)
+        # other keys book the global bucket up to t=4.5
+        for i in range(10):
+            limiter.reserve(f"other{i}")
+
+        # the key's own slots would be t=0 and t=1, the global ones t=5 and t=5.5
+        assert [limiter.reserve("a") for _ in range(2)] == [5.0, 6.0]
+
+    def test_invalid_rate(self):
+        """Test that a non-positive rate is rejected."""
+        with pytest.raises(ValueError):
+            TokenBucketRateLimiter(rate=0)
+
+
+class TestSQLiteRateLimiter:
+    """Tests for SQLiteRateLimiter."""
+
+    def test_instances_share_buckets_through_file(self, tmp_path):
+        """Test that two limiters on the same file (eg, two processes) pace each other."""
+        clock = FakeClock()
+        path = tmp_path / "rate_limit.sqlite"
+        with patch("ngv_reports_ibkr.rate_limit.time.time", clock):
+            worker_a = SQLiteRateLimiter(path, rate=1.0, capacity=1)
+            worker_b = SQLiteRateLimiter(path, rate=1.0, capacity=1)
+
+            assert worker_a.reserve("token") == 0.0
+            assert worker_b.reserve("token") == 1.0
+            assert worker_a.reserve("token") == 2.0
+            assert worker_b.reserve("other") == 0.0
+
+    def test_global_limit(self, tmp_path):
+        """Test the global bucket in the shared file."""
+        clock = FakeClock()
+        with patch("ngv_reports_ibkr.rate_limit.time.time", clock):
+            limiter = SQLiteRateLimiter(tmp_path / "rate_limit.sqlite", rate=10.0, global_rate=0.5)
+
+            assert [limiter.reserve(key) for key in ["a", "b"]] == [0.0, 2.0]
+
+    def test_key_booked_at_global_send_time(self, tmp_path):
+        """Test that a request delayed by the global bucket books its key at the delayed send time."""
+        clock = FakeClock()
+        with patch("ngv_reports_ibkr.rate_limit.time.time", clock):
+            limiter = SQLiteRateLimiter(tmp_path / "rate_limit.sqlite", rate=1.0, global_rate=2.0)
+            for i in range(10):
+                limiter.reserve(f"other{i}")
+
+            assert [limiter.reserve("a") for _ in range(2)] == [5.0, 6.0]
+
+
+class TestFlexClientRateLimiting:
+    """Tests for FlexClient pacing through a rate limiter."""
+
+    def test_requests_are_paced_before_sending(self):
+        """Test that every SendRequest/GetStatement waits for its reservation."""
+        http_client = Mock()
+        http_client.send_request.return_value = create_send_request_success()
+        http_client.get_statement.return_value = create_get_statement_success()
+        limiter = Mock()
+        limiter.reserve.return_value = 0.75
+        client = FlexClient(http_client=http_client, rate_limiter=limiter, statement_poll_delay=0.0)
+
+        with patch("ngv_reports_ibkr.flex_client.time.sleep") as mock_sleep:
+            client.fetch_flex_report(token="token123", query_id="654321")
+
+        assert limiter.reserve.call_count == 2
+        limiter.reserve.assert_called_with(hash_token("token123"))
+        assert [c.args[0] for c in mock_sleep.call_args_list].count(0.75) == 2
+
+    def test_token_is_not_used_as_key(self):
+        """Test that the raw token never reaches the limiter (it may be persisted)."""
+        assert hash_token("token123") != "token123"
+        assert hash_token("token123") == hash_token("token123")
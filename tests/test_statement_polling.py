@@ -0,0 +1,178 @@
+"""Tests for statement_polling module."""
+
+from itertools import islice
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ngv_reports_ibkr.flex_client import FlexClient, FlexStatementError, FlexTokenError
+from ngv_reports_ibkr.statement_polling import (
+    GenerationTimeHistory,
+    PollStats,
+    StatementPollScheduler,
+)
+from tests.fixtures import (
+    create_get_statement_error,
+    create_get_statement_success,
+    create_send_request_success,
+)
+
+
+class TestGenerationTimeHistory:
+    """Tests for GenerationTimeHistory."""
+
+    def test_keeps_last_k_samples(self):
+        """Test that only the most recent max_samples are kept."""
+        history = GenerationTimeHistory(max_samples=3)
+        for seconds in [1.0, 2.0, 3.0, 4.0]:
+            history.record("123", seconds)
+
+        assert history.samples("123") == [2.0, 3.0, 4.0]
+        assert history.samples("other") == []
+
+    def test_persists_to_json(self, tmp_path):
+        """Test that samples survive a reload from disk."""
+        path = tmp_path / "generation_times.json"
+        GenerationTimeHistory(path).record("123", 12.5)
+
+        assert GenerationTimeHistory(path).samples("123") == [12.5]
+
+    def test_unreadable_file_is_ignored(self, tmp_path):
+        """Test that a corrupt history file starts an empty history."""
+        path = tmp_path / "generation_times.json"
+        path.write_text("{not json")
+
+        assert GenerationTimeHistory(path).samples("123") == []
+
+
+class TestStatementPollScheduler:
+    """Tests for StatementPollScheduler."""
+
+    def test_estimate_defaults_without_history(self):
+        """Test default estimate for an unknown query."""
+        scheduler = StatementPollScheduler(default_estimate=3.0)
+        assert scheduler.estimate("123") == 3.0
+
+    def test_estimate_is_median_of_history(self):
+        """Test that the estimate ignores a single outlier run."""
+        history = GenerationTimeHistory()
+        for seconds in [10.0, 12.0, 90.0]:
+            history.record("123", seconds)
+
+        scheduler = StatementPollScheduler(history=history)
+        assert scheduler.estimate("123") == 12.0
+
+    def test_delays_start_near_estimate_then_back_off(self):
+        """Test probe schedule around the learned estimate."""
+        history = GenerationTimeHistory()
+        history.record("123", 20.0)
+        scheduler = StatementPollScheduler(history=history, first_probe_fraction=0.9, probe_fraction=0.25, backoff=2.0, max_interval=15.0)
+
+        delays = list(islice(scheduler.delays("123"), 4))
+
+        assert delays == [18.0, 5.0, 10.0, 15.0]
+
+    def test_delays_bounded_by_max_polls(self):
+        """Test that the schedule ends after max_polls probes."""
+        scheduler = StatementPollScheduler(max_polls=4)
+        assert len(list(scheduler.delays("123"))) == 4
+
+    def test_record_updates_history_only_on_success(self):
+        """Test that failed fetches don't skew the estimate."""
+        scheduler = StatementPollScheduler()
+        scheduler.record(PollStats(query_id="123", poll_count=3))
+        scheduler.record(PollStats(query_id="123", poll_count=1, generation_time=7.0))
+
+        assert scheduler.history.samples("123") == [7.0]
+        assert len(scheduler.recent_stats) == 2
+
+
+class TestFlexClientPolling:
+    """Tests for FlexClient.fetch_flex_report with the poll scheduler."""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self):
+        """Skip real waits between probes."""
+        with patch("ngv_reports_ibkr.flex_client.time.sleep") as mock_sleep:
+            yield mock_sleep
+
+    @pytest.fixture
+    def mock_http_client(self):
+        """Create mock HTTP client."""
+        client = Mock()
+        client.send_request.return_value = create_send_request_success("REF_POLL")
+        return client
+
+    def test_in_progress_moves_to_next_probe(self, mock_http_client, no_sleep):
+        """Test that 1019 answers follow the schedule instead of the retry backoff."""
+        mock_http_client.get_statement.side_effect = [
+            create_get_statement_error("1019", "Statement generation in progress"),
+            create_get_statement_error("1019", "Statement generation in progress"),
+            create_get_statement_success(),
+        ]
+        scheduler = StatementPollScheduler(default_estimate=8.0, first_probe_fraction=0.5, probe_fraction=0.25, backoff=1.0)
+        client = FlexClient(http_client=mock_http_client, max_retries=2, poll_scheduler=scheduler)
+
+        xml_data = client.fetch_flex_report(token="token123", query_id="654321")
+
+        assert "<FlexQueryResponse" in xml_data
+        assert [c.args[0] for c in no_sleep.call_args_list] == [4.0, 2.0, 2.0]
+
+        stats = client.last_poll_stats
+        assert stats.query_id == "654321"
+        assert stats.reference_code == "REF_POLL"
+        assert stats.poll_count == 3
+        assert stats.wait_time == 8.0
+        assert stats.generation_time is not None
+        assert scheduler.history.samples("654321") == [round(stats.generation_time, 3)]
+
+    @pytest.mark.parametrize(
+        "in_progress, generation_time",
+        [
+            (0, 4.0),  # first probe ready: no lower bound, its own time
+            (2, 7.0),  # midpoint of the last "in progress" probe (6s) and the ready one (8s)
+        ],
+    )
+    def test_records_midpoint_generation_time(self, mock_http_client, no_sleep, in_progress, generation_time):
+        """Test that the generation time recorded is not just when the statement was first seen."""
+        clock = [100.0]
+        no_sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        mock_http_client.get_statement.side_effect = [create_get_statement_error("1019", "Statement generation in progress")] * in_progress + [
+            create_get_statement_success()
+        ]
+        scheduler = StatementPollScheduler(default_estimate=8.0, first_probe_fraction=0.5, probe_fraction=0.25, backoff=1.0)
+        client = FlexClient(http_client=mock_http_client, poll_scheduler=scheduler)
+
+        with patch("ngv_reports_ibkr.flex_client.time.monotonic", side_effect=lambda: clock[0]):
+            client.fetch_flex_report(token="token123", query_id="654321")
+
+        assert client.last_poll_stats.generation_time == generation_time
+        assert scheduler.history.samples("654321") == [generation_time]
+
+    def test_other_errors_count_against_max_retries(self, mock_http_client):
+        """Test that non-1019 errors still give up after max_retries."""
+        mock_http_client.get_statement.return_value = create_get_statement_error("1009", "Server busy")
+        client = FlexClient(http_client=mock_http_client, max_retries=3)
+
+        with pytest.raises(FlexStatementError, match="not ready after 3 polls"):
+            client.fetch_flex_report(token="token123", query_id="654321")
+
+        assert client.last_poll_stats.generation_time is None
+
+    def test_token_error_not_retried(self, mock_http_client):
+        """Test that token errors while polling are raised immediately."""
+        mock_http_client.get_statement.return_value = create_get_statement_error("1015", "Invalid token")
+        client = FlexClient(http_client=mock_http_client)
+
+        with pytest.raises(FlexTokenError):
+            client.fetch_flex_report(token="token123", query_id="654321")
+
+        assert mock_http_client.get_statement.call_count == 1
+
+    def test_gives_up_after_max_polls(self, mock_http_client):
+        """Test that a statement that never finishes ends the fetch."""
+        mock_http_client.get_statement.return_value = create_get_statement_error("1019", "Statement generation in progress")
+        client = FlexClient(http_client=mock_http_client, poll_scheduler=StatementPollScheduler(max_polls=5))
+
+        with pytest.raises(FlexStatementError, match="not ready after 5 polls"):
+            client.fetch_flex_report(token="token123", query_id="654321")
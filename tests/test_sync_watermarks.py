@@ -0,0 +1,181 @@
+"""Tests for sync_watermarks module and incremental CSV syncs."""
+
+from datetime import date
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from ngv_reports_ibkr.adapters import ReportOutputAdapterCSV
+from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+from ngv_reports_ibkr.sync_watermarks import SyncWatermark, WatermarkStore
+
+
+def _trade(transaction_id: str, date_time: str, open_close: str = "O") -> str:
+    trade_date = date_time.split(";")[0]
+    return (
+        f'<Trade accountId="U1234567" transactionID="{transaction_id}" dateTime="{date_time} EST" '
+        f'orderTime="{date_time} EST" tradeDate="{trade_date}" openCloseIndicator="{open_close}" symbol="AAPL"/>'
+    )
+
+
+def _report(*trades: str) -> CustomFlexReport:
+    return CustomFlexReport.from_xml(_xml(*trades))
+
+
+def _xml(*trades: str) -> str:
+    return f"""<FlexQueryResponse queryName="TestReport" type="AF">
+  <FlexStatements count="1">
+    <FlexStatement accountId="U1234567" fromDate="2026-01-01" toDate="2026-01-31">
+      <AccountInformation accountId="U1234567" currency="USD"/>
+      <Trades>{"".join(trades)}</Trades>
+      <OpenPositions>
+        <OpenPosition accountId="U1234567" symbol="AAPL" levelOfDetail="LOT" openDateTime="2026-01-05;10:00:00 EST"
+          holdingPeriodDateTime="2026-01-05;10:00:00 EST" reportDate="2026-01-31"/>
+      </OpenPositions>
+    </FlexStatement>
+  </FlexStatements>
+</FlexQueryResponse>"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create watermark store in a temporary folder."""
+    return WatermarkStore(tmp_path / "sync_watermarks.json")
+
+
+class TestSyncWatermark:
+    """Tests for SyncWatermark."""
+
+    def test_from_trades(self):
+        """Test that the watermark is the latest tradeDate, dateTime and transactionID."""
+        df = _report(_trade("10", "2026-01-05;10:00:00"), _trade("12", "2026-01-06;09:30:00")).trades_by_account_id("U1234567")
+
+        watermark = SyncWatermark.from_trades("U1234567", "654321", df)
+
+        assert watermark.trade_date == "2026-01-06"
+        assert pd.Timestamp(watermark.date_time) == pd.Timestamp("2026-01-06 09:30:00", tz="America/New_York")
+        assert watermark.transaction_id == 12
+
+    def test_new_rows(self):
+        """Test that only rows past the watermark are kept; rows without transactionID use dateTime."""
+        df = _report(
+            _trade("12", "2026-01-06;09:30:00"),
+            _trade("13", "2026-01-06;11:00:00"),
+            _trade("", "2026-01-06;08:00:00"),
+            _trade("", "2026-01-06;12:00:00"),
+        ).trades_by_account_id("U1234567")
+        watermark = SyncWatermark("U1234567", "654321", "2026-01-06", "2026-01-06T09:30:00-05:00", 12)
+
+        new_df = watermark.new_rows(df)
+
+        assert new_df.dateTime.dt.hour.tolist() == [11, 12]
+
+
+class TestWatermarkStore:
+    """Tests for WatermarkStore."""
+
+    def test_since(self, store):
+        """Test that a query is synced from the oldest watermark of its accounts."""
+        assert store.since("654321") is None
+
+        store.put(SyncWatermark("U1", "654321", trade_date="2026-01-06"))
+        store.put(SyncWatermark("U2", "654321", trade_date="2026-01-02"))
+        store.put(SyncWatermark("U3", "111111", trade_date="2025-01-01"))
+
+        assert store.since("654321") == date(2026, 1, 2)
+        assert WatermarkStore(store.path).get("654321", "U1").trade_date == "2026-01-06"
+
+    def test_since_requires_every_reported_account(self, store):
+        """Test that an account without a watermark (eg, newly added to the query) forces a full sync."""
+        store.put(SyncWatermark("U1", "654321", trade_date="2026-01-06"))
+        store.put(SyncWatermark("U2", "654321"))  # synced, no trades yet
+
+        assert store.since("654321", ["U1", "U2"]) == date(2026, 1, 6)
+        assert store.since("654321", ["U1", "U9"]) is None
+
+    def test_keyed_by_query_and_account(self, store):
+        """Test that an account in two queries keeps one watermark per query."""
+        store.put(SyncWatermark("U1", "654321", trade_date="2026-01-06"))
+        store.put(SyncWatermark("U1", "111111", trade_date="2025-01-01"))
+
+        assert store.get("654321", "U1").trade_date == "2026-01-06"
+        assert store.get("111111", "U1").trade_date == "2025-01-01"
+        assert store.since("654321") == date(2026, 1, 6)
+
+    def test_reads_files_keyed_by_account(self, store):
+        """Test that watermark files written before the (query, account) key still load."""
+        store.path.write_text('{"U1": {"account_id": "U1", "query_id": "654321", "trade_date": "2026-01-06"}}')
+
+        assert store.get("654321", "U1").trade_date == "2026-01-06"
+
+
+class TestIncrementalCSV:
+    """Tests for ReportOutputAdapterCSV.sync_accounts."""
+
+    def test_first_sync_then_append(self, tmp_path, store):
+        """Test that a first sync writes everything and later syncs append only new trades."""
+        first = _report(_trade("10", "2026-01-05;10:00:00"), _trade("11", "2026-01-06;09:30:00", "C"))
+        ReportOutputAdapterCSV(data_folder=str(tmp_path), report=first).sync_accounts(store, "654321")
+
+        assert store.get("654321", "U1234567").transaction_id == 11
+        assert store.since("654321") == date(2026, 1, 6)
+
+        # the next statement starts on the watermark's day, so transactionID=11 is reported again
+        second = _report(_trade("11", "2026-01-06;09:30:00", "C"), _trade("12", "2026-01-07;10:00:00", "C"))
+        ReportOutputAdapterCSV(data_folder=str(tmp_path), report=second).sync_accounts(store, "654321")
+
+        trades = pd.read_csv(tmp_path / "U1234567_trades.csv", index_col=0)
+        close_trades = pd.read_csv(tmp_path / "U1234567_close_trades.csv", index_col=0)
+        assert trades.transactionID.tolist() == [10, 11, 12]
+        assert close_trades.transactionID.tolist() == [11, 12]
+        assert store.get("654321", "U1234567").transaction_id == 12
+
+
+class TestExecuteCSVIncremental:
+    """Tests for execute_csv_for_accounts_incremental."""
+
+    def test_requests_range_from_watermark(self, tmp_path, store, monkeypatch):
+        """Test that a synced query is fetched from its watermark instead of the saved period."""
+        from ngv_reports_ibkr import download_trades
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "data").mkdir()
+        monkeypatch.setattr(download_trades, "get_config", lambda file_name: {})
+        monkeypatch.setattr(
+            download_trades,
+            "get_ib_json",
+            lambda configs: {"accounts": [{"name": "test", "flex_token": "token123", "annual": "654321"}]},
+        )
+        WatermarkStore("data/sync_watermarks.json").put(SyncWatermark("U1234567", "654321", trade_date="2026-01-06"))
+        client = Mock()
+        client.fetch_range.return_value = _report(_trade("12", "2026-01-07;10:00:00"))
+
+        download_trades.execute_csv_for_accounts_incremental("annual", client=client)
+
+        client.fetch_flex_report.assert_not_called()
+        assert client.fetch_range.call_args.args[:3] == ("token123", "654321", date(2026, 1, 6))
+        assert WatermarkStore("data/sync_watermarks.json").get("654321", "U1234567").transaction_id == 12
+
+    def test_new_account_fetches_full_report(self, tmp_path, store, monkeypatch):
+        """Test that an account without a watermark in the range fetch triggers a full fetch, so its files hold its full history."""
+        from ngv_reports_ibkr import download_trades
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "data").mkdir()
+        monkeypatch.setattr(download_trades, "get_config", lambda file_name: {})
+        monkeypatch.setattr(
+            download_trades,
+            "get_ib_json",
+            lambda configs: {"accounts": [{"name": "test", "flex_token": "token123", "annual": "654321"}]},
+        )
+        WatermarkStore("data/sync_watermarks.json").put(SyncWatermark("U7654321", "654321", trade_date="2026-01-06"))
+        client = Mock()
+        client.fetch_range.return_value = _report(_trade("12", "2026-01-07;10:00:00"))
+        client.fetch_flex_report.return_value = _xml(_trade("10", "2026-01-05;10:00:00"), _trade("12", "2026-01-07;10:00:00"))
+
+        download_trades.execute_csv_for_accounts_incremental("annual", client=client)
+
+        client.fetch_flex_report.assert_called_once_with("token123", "654321")
+        assert pd.read_csv("data/U1234567_trades.csv", index_col=0).transactionID.tolist() == [10, 12]
+        assert WatermarkStore("data/sync_watermarks.json").get("654321", "U1234567").transaction_id == 12
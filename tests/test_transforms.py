@@ -0,0 +1,250 @@
+"""Tests for transforms module."""
+
+import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from ngv_reports_ibkr.transforms import (
+    TOPIC_PIPELINES,
+    Transforms,
+    TopicPipeline,
+    parse_datetime_series,
+    parse_option_descriptions,
+)
+
+RAW = pd.Series(
+    [
+        "2026-01-15;10:30:00 EST",
+        "",
+        None,
+        "2026-01-15;103000",
+        "2026-01-15",
+        "2026-07-15;10:30:00 EDT",
+        "garbage",
+        "2026-01-15;10:30:00 EST",
+    ],
+    index=list("abcdefgh"),
+    name="dateTime",
+)
+
+
+class TestParseDatetimeSeries:
+    """Tests for parse_datetime_series."""
+
+    def test_values(self):
+        """Test parsed values, with NaT for empty and unparseable strings."""
+        result = parse_datetime_series(RAW)
+
+        expected = pd.Series(
+            pd.to_datetime(
+                [
+                    "2026-01-15 10:30:00",
+                    None,
+                    None,
+                    "2026-01-15 10:30:00",
+                    None,
+                    "2026-07-15 10:30:00",
+                    None,
+                    "2026-01-15 10:30:00",
+                ]
+            )
+            # resolution follows pandas' default for parsed strings (ns on pandas 2, us on pandas 3)
+            .as_unit(result.dt.unit)
+            .tz_localize("America/New_York"),
+            index=RAW.index,
+            name="dateTime",
+        )
+        pd.testing.assert_series_equal(result, expected)
+
+    @pytest.mark.parametrize("target_tz", ["America/New_York", "UTC"])
+    def test_unique_mode_matches_per_row(self, target_tz):
+        """Test that parsing distinct values only gives the same result as parsing every row."""
+        pd.testing.assert_series_equal(
+            parse_datetime_series(RAW, target_tz, unique=True),
+            parse_datetime_series(RAW, target_tz, unique=False),
+        )
+
+    def test_distinct_values_parsed_once(self, mocker):
+        """Test that repeated timestamps are only parsed once."""
+        from ngv_reports_ibkr import transforms
+
+        spy = mocker.spy(transforms, "_parse_datetime_values")
+        raw = pd.Series(["2026-01-15;10:30:00 EST"] * 1000 + ["2026-01-15;10:31:00 EST"] * 1000)
+
+        result = parse_datetime_series(raw)
+
+        assert len(spy.call_args.args[0]) == 2
+        assert result.nunique() == 2
+        assert len(result) == 2000
+
+    def test_per_row_timezones(self):
+        """Test that each row is localized by its own abbreviation."""
+        raw = pd.Series(
+            [
+                "2026-01-15;09:30:00 CST",
+                "2026-01-15;10:30:00 EST",
+                "2026-07-15;07:30:00 PDT",
+                "2026-07-15;14:30:00 UTC",
+            ]
+        )
+
+        result = parse_datetime_series(raw, target_tz="UTC")
+
+        assert result.dt.strftime("%Y-%m-%d %H:%M").tolist() == [
+            "2026-01-15 15:30",
+            "2026-01-15 15:30",
+            "2026-07-15 14:30",
+            "2026-07-15 14:30",
+        ]
+
+    def test_dst_fall_back_is_unambiguous(self):
+        """Test that the repeated hour at the end of DST is told apart by EDT/EST."""
+        raw = pd.Series(["2026-11-01;01:30:00 EDT", "2026-11-01;01:30:00 EST"])
+
+        result = parse_datetime_series(raw)
+
+        assert (result[1] - result[0]) == pd.Timedelta(hours=1)
+
+    def test_unlabeled_dst_transitions(self):
+        """Test that unlabeled times in the repeated or skipped DST hour parse instead of raising."""
+        raw = pd.Series(["2026-11-01;01:30:00", "2026-03-08;02:30:00", "2026-01-15;10:00:00"])
+
+        result = parse_datetime_series(raw, target_tz="UTC")
+
+        assert result.dt.strftime("%Y-%m-%d %H:%M").tolist() == ["2026-11-01 05:30", "2026-03-08 07:00", "2026-01-15 15:00"]
+
+    def test_rows_without_known_abbreviation(self):
+        """Test that unlabeled and unknown-abbreviation rows use the region of the first known one."""
+        raw = pd.Series(["2026-07-15;10:00:00 CDT", "2026-01-15;10:00:00", "2026-07-15;10:00:00 XYZ"])
+
+        with pytest.warns(UserWarning, match="XYZ"):
+            result = parse_datetime_series(raw, target_tz="America/Chicago")
+
+        assert result.dt.strftime("%H:%M %z").tolist() == ["10:00 -0500", "10:00 -0600", "10:00 -0500"]
+
+
+class TestOptionFields:
+    """Tests for parse_option_descriptions and the option Transforms."""
+
+    def test_parse_option_descriptions(self):
+        """Test that underlying, expiry, strike and right come out of one parse."""
+        parsed = parse_option_descriptions(pd.Series(["SPY 21JAN22 450 C", "ES 17MAR23 4012.5 P", "AAPL"]))
+
+        assert parsed.underlying.tolist()[:2] == ["SPY", "ES"]
+        assert parsed.expiry.tolist()[:2] == [pd.Timestamp("2022-01-21"), pd.Timestamp("2023-03-17")]
+        assert parsed.strike.tolist()[:2] == [450.0, 4012.5]
+        assert parsed.right.tolist()[:2] == ["C", "P"]
+        assert parsed.iloc[2].isna().all()
+
+    def test_add_strike(self):
+        """Test that strike is numeric for option rows and NaN for the others."""
+        df = pd.DataFrame(
+            {
+                "asset_category": ["OPT", "STK", "FOP"],
+                "description": ["SPY 21JAN22 450 C", "AAPL 1 2 3", "ES 17MAR23 4012.5 P"],
+            }
+        )
+
+        Transforms.add_strike(df)
+
+        assert df.strike.iloc[[0, 2]].tolist() == [450.0, 4012.5]
+        assert pd.isna(df.strike.iloc[1])
+
+    def test_structured_columns_preferred(self):
+        """Test that Flex's own option columns win over the description where they have a value."""
+        df = pd.DataFrame(
+            {
+                "asset_category": ["OPT", "OPT", "STK"],
+                "description": ["SPY 21JAN22 450 C", "QQQ 5FEB24 400.25 P", "AAPL"],
+                "underlying_symbol": ["SPY", "", ""],
+                "expiry": ["2022-01-21", "", ""],
+                "strike": ["451", "", ""],
+                "put_call": ["C", "", ""],
+            }
+        )
+
+        Transforms.add_option_fields(df)
+
+        assert df.strike.iloc[:2].tolist() == [451.0, 400.25]
+        assert df.expiry.iloc[:2].tolist() == [pd.Timestamp("2022-01-21"), pd.Timestamp("2024-02-05")]
+        assert df.underlying.iloc[:2].tolist() == ["SPY", "QQQ"]
+        assert df.right.iloc[:2].tolist() == ["C", "P"]
+        assert df.iloc[2][["underlying", "expiry", "strike", "right"]].isna().all()
+
+
+class TestTopicPipeline:
+    """Tests for TopicPipeline and TOPIC_PIPELINES."""
+
+    def test_filters_and_conversions(self):
+        """Test that rows are filtered and columns converted in one pass, leaving the input alone."""
+        df = pd.DataFrame(
+            {
+                "levelOfDetail": ["LOT", "SUMMARY", "LOT"],
+                "openDateTime": ["2026-01-15;10:30:00 EST", "", "2026-01-16;10:30:00 EST"],
+                "reportDate": ["2026-01-31", "2026-01-31", "2026-01-31"],
+            }
+        )
+
+        result = TOPIC_PIPELINES["OpenPosition"].apply(df)
+
+        assert result.index.tolist() == [0, 2]
+        assert result.openDateTime.dt.strftime("%Y-%m-%d %H:%M").tolist() == ["2026-01-15 10:30", "2026-01-16 10:30"]
+        assert str(result.openDateTime.dt.tz) == "America/New_York"
+        assert result.reportDate.tolist() == [datetime.date(2026, 1, 31)] * 2
+        assert df.openDateTime.iloc[0] == "2026-01-15;10:30:00 EST"
+
+    @pytest.mark.parametrize("filters, copies", [({"levelOfDetail": "LOT"}, {"take": 1, "copy": 0}), ({}, {"take": 0, "copy": 1})])
+    def test_frame_copied_once(self, filters, copies):
+        """Test that filtering and converting several columns copies the frame once."""
+        pipeline = TopicPipeline(columns={"openDateTime": "datetime", "reportDate": "date"}, filters=filters)
+        df = pd.DataFrame(
+            {
+                "levelOfDetail": ["LOT", "SUMMARY"],
+                "openDateTime": ["2026-01-15;10:30:00 EST", ""],
+                "reportDate": ["2026-01-31", "2026-01-31"],
+            }
+        )
+
+        with (
+            patch.object(pd.DataFrame, "take", autospec=True, side_effect=pd.DataFrame.take) as take,
+            patch.object(pd.DataFrame, "copy", autospec=True, side_effect=pd.DataFrame.copy) as copy,
+        ):
+            result = pipeline.apply(df)
+
+        assert {"take": take.call_count, "copy": copy.call_count} == copies
+        assert result.reportDate.iloc[0] == datetime.date(2026, 1, 31)
+        assert df.reportDate.iloc[0] == "2026-01-31"
+
+    def test_missing_columns_skipped(self):
+        """Test that columns and filters absent from the frame are ignored."""
+        pipeline = TopicPipeline(columns={"dateTime": "datetime", "tradeDate": "date"}, filters={"assetCategory": "STK"})
+        df = pd.DataFrame({"tradeDate": ["2026-01-05"], "symbol": ["AAPL"]})
+
+        result = pipeline.apply(df)
+
+        assert result.columns.tolist() == ["tradeDate", "symbol"]
+        assert result.tradeDate.tolist() == [datetime.date(2026, 1, 5)]
+
+    def test_unknown_topic_unchanged(self):
+        """Test that topics without a pipeline pass through."""
+        df = pd.DataFrame({"a": ["1"]})
+
+        pd.testing.assert_frame_equal(Transforms.apply_topic_pipeline(df, "Order"), df)
+
+    def test_matches_report_accessors(self):
+        """Test that the report accessors are the topic pipelines applied to the account rows."""
+        from ngv_reports_ibkr.custom_flex_report import CustomFlexReport
+        from tests.fixtures import TWO_ACCOUNT_STATEMENT as STATEMENT
+
+        report = CustomFlexReport.from_xml(STATEMENT)
+
+        pd.testing.assert_frame_equal(
+            report.trades_by_account_id("U1111111"),
+            TOPIC_PIPELINES["Trade"].apply(report.df_by_account_id("Trade", "U1111111")),
+        )
+        pd.testing.assert_frame_equal(
+            report.open_positions_by_account_id("U1111111"),
+            TOPIC_PIPELINES["OpenPosition"].apply(report.df_by_account_id("OpenPosition", "U1111111")),
+        )
@@ -0,0 +1,212 @@
+"""Tests for tws_stream: live capture of TWS fills into the unified trades schema."""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from eventkit import Event
+from ib_async import CommissionReport, Contract, Execution, Fill, LimitOrder, MarketOrder, OrderStatus, Trade, util
+
+from ngv_reports_ibkr.expand_contract_columns import expand_all_trade_columns, expand_fills_and_logs
+from ngv_reports_ibkr.schemas.unified_trades import unified_trades_schema
+from ngv_reports_ibkr.tws_stream import FillRingBuffer, TwsTradeStream
+from ngv_reports_ibkr.unified_df import prepare_tws_trades
+
+START = datetime(2026, 1, 15, 15, 30, tzinfo=timezone.utc)
+
+
+def _trade(order, contract: Contract) -> Trade:
+    """Trade of an order, filled as its fills come in."""
+    order.account = "U1"
+    order.permId = 1000 + order.orderId
+    return Trade(contract=contract, order=order, orderStatus=OrderStatus(orderId=order.orderId, status="Submitted"))
+
+
+def _fill(trade: Trade, n: int, shares: float) -> Fill:
+    """Next fill of a trade, without its commission report yet (as in execDetailsEvent)."""
+    execution = Execution(
+        execId=f"0001.{trade.order.orderId}.{n}",
+        time=START + timedelta(seconds=n),
+        acctNumber="U1",
+        exchange="SMART",
+        side="BOT" if trade.order.action == "BUY" else "SLD",
+        shares=shares,
+        price=100.0 + n,
+        permId=trade.order.permId,
+    )
+    fill = Fill(trade.contract, execution, CommissionReport(), execution.time)
+    trade.fills.append(fill)
+    trade.orderStatus.filled += shares
+    trade.orderStatus.remaining = trade.order.totalQuantity - trade.orderStatus.filled
+    trade.orderStatus.status = "Filled" if trade.orderStatus.remaining == 0 else "Submitted"
+    return fill
+
+
+def _report(fill: Fill, commission: float, pnl: float = 0.0) -> CommissionReport:
+    """Commission report of a fill, set on the fill like ib_async does."""
+    report = CommissionReport(execId=fill.execution.execId, commission=commission, currency="USD", realizedPNL=pnl)
+    fill.commissionReport.execId, fill.commissionReport.commission = report.execId, report.commission
+    fill.commissionReport.currency, fill.commissionReport.realizedPNL = report.currency, report.realizedPNL
+    return report
+
+
+def _values(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame as objects with None for every kind of missing value, to compare values across dtypes."""
+    return df.astype(object).where(df.notna(), None)
+
+
+@pytest.fixture
+def ib():
+    """Stand-in for ib_async.IB with its two fill events."""
+    return SimpleNamespace(execDetailsEvent=Event("execDetailsEvent"), commissionReportEvent=Event("commissionReportEvent"))
+
+
+@pytest.fixture
+def session(ib):
+    """Stream attached to ib, and the trades of a session: a market order in two fills and a limit order."""
+    stream = TwsTradeStream(capacity=2)
+    stream.attach(ib)
+    market = _trade(MarketOrder("BUY", 100, orderId=1), Contract(conId=265598, symbol="AAPL", secType="STK", currency="USD"))
+    limit = _trade(
+        LimitOrder("SELL", 2, 5.5, orderId=2, tif="GTC"),
+        Contract(conId=7, symbol="SPX", secType="OPT", currency="USD", strike=5000.0, right="C", multiplier="100", lastTradeDateOrContractMonth="20260320"),
+    )
+    for trade, shares in [(market, 60), (limit, 2), (market, 40)]:
+        fill = _fill(trade, len(trade.fills), shares)
+        ib.execDetailsEvent.emit(trade, fill)
+        ib.commissionReportEvent.emit(trade, fill, _report(fill, 1.25, pnl=10.0))
+    return stream, [market, limit]
+
+
+def _batch(trades) -> pd.DataFrame:
+    """Unified frame of trades through the batch TWS path, in execution order."""
+    df = expand_fills_and_logs(expand_all_trade_columns(util.df(trades)), fills_col="fills", log_col="log", fills_only=True)
+    return prepare_tws_trades(df).sort_values("execution_time", ignore_index=True)
+
+
+class TestTwsTradeStream:
+    """Tests for TwsTradeStream."""
+
+    def test_same_as_batch(self, session):
+        """Test that the streamed frame has the columns and values of the batch path."""
+        stream, trades = session
+        batch = _batch(trades)
+
+        snapshot = stream.snapshot()
+
+        assert list(snapshot.columns) == list(batch.columns)
+        pd.testing.assert_frame_equal(_values(snapshot.drop(columns=["order_status", "filled", "remaining"])), _values(batch.drop(columns=["order_status", "filled", "remaining"])))
+
+    def test_order_status_as_of_fill(self, session):
+        """Test that each row has the order status of its latest event, not the status at snapshot time."""
+        stream, _ = session
+
+        snapshot = stream.snapshot()
+
+        assert snapshot.filled.tolist() == [60.0, 2.0, 100.0]
+        assert snapshot.order_status.tolist() == ["Submitted", "Filled", "Filled"]
+
+    def test_dtypes(self, session):
+        """Test the fixed column dtypes, including float64 NaN where prepare_tws_trades gives object None."""
+        stream, trades = session
+
+        snapshot = stream.snapshot()
+
+        assert snapshot.trade_money.dtype == "float64" and snapshot.trade_money.isna().all()
+        assert _batch(trades).trade_money.dtype == object
+        assert snapshot.quantity.dtype == "float64"
+        assert snapshot.tws_perm_id.dtype == "Int64"
+        assert str(snapshot.execution_time.dtype) == "datetime64[ns, UTC]"
+
+    def test_schema(self, session):
+        """Test that the snapshot validates against the unified trades schema."""
+        stream, _ = session
+
+        unified_trades_schema.validate(stream.snapshot())
+
+    def test_commission_report_after_execution(self, ib):
+        """Test that commission is empty until its report arrives, then updates the row in place."""
+        stream = TwsTradeStream()
+        stream.attach(ib)
+        trade = _trade(MarketOrder("BUY", 10, orderId=3), Contract(conId=1, symbol="X", secType="STK", currency="USD"))
+        fill = _fill(trade, 0, 10)
+
+        ib.execDetailsEvent.emit(trade, fill)
+        assert pd.isna(stream.snapshot().commission[0])
+
+        ib.commissionReportEvent.emit(trade, fill, _report(fill, 0.5))
+        snapshot = stream.snapshot()
+        assert len(snapshot) == 1
+        assert snapshot.commission[0] == -0.5
+        assert snapshot.commission_currency[0] == "USD"
+
+    def test_incremental_snapshot(self, ib, session):
+        """Test that snapshot(since=version) has only the fills added or changed after that version."""
+        stream, (market, limit) = session
+        version = stream.version
+        assert stream.snapshot(since=version).empty
+
+        fill = _fill(limit, 1, 1)
+        ib.execDetailsEvent.emit(limit, fill)
+        ib.commissionReportEvent.emit(market, market.fills[0], _report(market.fills[0], 2.0))
+
+        assert stream.snapshot(since=version).ib_execution_id.tolist() == ["0001.1.0", fill.execution.execId]
+
+    def test_detach(self, ib, session):
+        """Test that a detached stream ignores further fills."""
+        stream, (market, _) = session
+        stream.detach(ib)
+
+        ib.execDetailsEvent.emit(market, _fill(market, 2, 1))
+
+        assert len(stream.snapshot()) == 3
+
+
+class TestFillRingBuffer:
+    """Tests for FillRingBuffer."""
+
+    def test_grows(self):
+        """Test that the buffer doubles when full and keeps every row."""
+        buffer = FillRingBuffer(capacity=2)
+        for i in range(5):
+            buffer.append({"ib_execution_id": str(i), "contract_id": i})
+
+        assert buffer.capacity == 8
+        assert buffer.snapshot().ib_execution_id.tolist() == ["0", "1", "2", "3", "4"]
+
+    def test_ring(self):
+        """Test that with max_rows the oldest rows are overwritten, and snapshots stay in arrival order."""
+        buffer = FillRingBuffer(capacity=2, max_rows=3)
+        evicted = [buffer.append({"ib_execution_id": str(i), "tws_perm_id": i})[1] for i in range(5)]
+
+        assert buffer.capacity == 3
+        assert [row and row["ib_execution_id"] for row in evicted] == [None, None, None, "0", "1"]
+        snapshot = buffer.snapshot()
+        assert snapshot.ib_execution_id.tolist() == ["2", "3", "4"]
+        assert snapshot.tws_perm_id.tolist() == [2, 3, 4]
+        with pytest.raises(IndexError):
+            buffer.update(1, {"price": 1.0})
+
+    def test_overwritten_slot_is_reset(self):
+        """Test that a reused slot does not keep values of the row it replaced."""
+        buffer = FillRingBuffer(capacity=1, max_rows=1)
+        buffer.append({"ib_execution_id": "a", "tws_perm_id": 1, "price": 1.0})
+        buffer.append({"ib_execution_id": "b"})
+
+        row = buffer.snapshot().iloc[0]
+        assert pd.isna(row.tws_perm_id) and pd.isna(row.price)
+
+    def test_ring_evicts_exec_ids(self, ib):
+        """Test that a fill of an overwritten row is added again, not written to the reused slot."""
+        stream = TwsTradeStream(capacity=1, max_rows=1)
+        stream.attach(ib)
+        trade = _trade(MarketOrder("BUY", 10, orderId=4), Contract(conId=1, symbol="X", secType="STK", currency="USD"))
+        first, second = _fill(trade, 0, 5), _fill(trade, 1, 5)
+
+        ib.execDetailsEvent.emit(trade, first)
+        ib.execDetailsEvent.emit(trade, second)
+        ib.commissionReportEvent.emit(trade, first, _report(first, 1.0))
+
+        assert stream.snapshot().ib_execution_id.tolist() == [first.execution.execId]
+        assert "0001.4.1" not in stream._seq_by_exec_id
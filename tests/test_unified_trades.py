@@ -217,6 +217,27 @@ def test_prepare_tws_trades_basic_mapping(sample_tws_df):
     assert pd.isna(unified["flex_order_id"]).all()
 
 
+def test_prepare_tws_trades_order_prices_are_float64(sample_tws_df):
+    """
+    Test that nullable Float64 order columns (from expand_order_column) come out as float64.
+
+    Verifies:
+    - limit_price, aux_price and total_quantity are float64
+    - NA (IBKR's UNSET) becomes NaN
+    """
+    tws_df = sample_tws_df.assign(
+        lmtPrice=pd.array([150.0, None], dtype="Float64"),
+        auxPrice=pd.array([None, None], dtype="Float64"),
+        totalQuantity=pd.array([100.0, 50.0], dtype="Float64"),
+    )
+
+    unified = prepare_tws_trades(tws_df)
+
+    for column in ["limit_price", "aux_price", "total_quantity"]:
+        assert unified[column].dtype == "float64"
+    assert unified["limit_price"].isna().tolist() == [False, True]
+
+
 # ============================================================================
 # Test prepare_flex_trades
 # ============================================================================